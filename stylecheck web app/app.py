@@ -1,12 +1,31 @@
 # Import necessary libraries
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, g
 from flask_cors import CORS
-from llm_handlers import get_all_corrections
+from llm_handlers import get_all_corrections, get_batch_corrections
+from logs import begin_request, end_request, current_request_id
 
 # Initialize Flask app and routes
 app = Flask(__name__)
 CORS(app)
 
+# Largest number of texts accepted by /check/batch in one request
+MAX_BATCH_SIZE = 100
+
+@app.before_request
+def start_request_log():
+    # Log records of this request (and of the pool threads working for it) carry its ID
+    g.log_token = begin_request(request.headers.get('X-Request-Id'))
+
+@app.after_request
+def tag_request_id(response):
+    response.headers["X-Request-Id"] = current_request_id()
+    return response
+
+@app.teardown_request
+def finish_request_log(error=None):
+    if "log_token" in g:
+        end_request(g.pop("log_token"))
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -30,5 +49,29 @@ def check_text():
     
     return jsonify(corrections_data)
 
+@app.route('/check/batch', methods=['POST'])
+def check_batch():
+    texts = request.json.get('texts', [])
+    
+    if not isinstance(texts, list) or not texts:
+        return jsonify({
+            "error": "Please provide a list of texts to check."
+        }), 400
+    if len(texts) > MAX_BATCH_SIZE:
+        return jsonify({
+            "error": f"Please provide at most {MAX_BATCH_SIZE} texts per batch."
+        }), 400
+    
+    # Empty items get their own error instead of failing the whole batch
+    valid = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+    outcomes = dict(zip(valid, get_batch_corrections([texts[i] for i in valid])))
+    
+    results = []
+    for i in range(len(texts)):
+        outcome = outcomes.get(i, {"error": "Please provide some text to check."})
+        results.append({"index": i, **outcome.get("result", outcome)})
+    
+    return jsonify({"results": results})
+
 if __name__ == '__main__':
     app.run(debug=True)
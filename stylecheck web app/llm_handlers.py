@@ -1,16 +1,30 @@
 # Import necessary libraries
 import os
-from mistralai import Mistral
-import anthropic
-import google.generativeai as genai
-from openai import OpenAI
+from provider_clients import get_mistral_client, get_anthropic_client, get_openai_client, get_gemini_model
+from logs import get_logger, log_payload
 import re
 import json
+import copy
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+logger = get_logger("llm_handlers")
+
+# Expert calls are network-bound, so fan them out over a shared, bounded pool.
+# Set STYLECHECK_CONCURRENT_EXPERTS=0 to fall back to sequential calls.
+CONCURRENT_EXPERTS = os.getenv("STYLECHECK_CONCURRENT_EXPERTS", "1") != "0"
+EXPERT_WORKERS = int(os.getenv("STYLECHECK_EXPERT_WORKERS", "12"))
+_expert_pool = ThreadPoolExecutor(max_workers=EXPERT_WORKERS, thread_name_prefix="stylecheck-expert")
+
+# Batch mode: how many sentences are corrected at once. Kept separate from the
+# expert pool, whose workers the sentence workers wait on.
+BATCH_WORKERS = int(os.getenv("STYLECHECK_BATCH_WORKERS", "4"))
+_batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="stylecheck-batch")
+
 # regex to extract the corrected sentence
 def extract_correction(text):
     """Extract the corrected sentence from within double curly braces."""
@@ -23,7 +37,7 @@ def extract_correction(text):
 def get_mistral_correction(sentence):
     """Get correction from Mistral AI"""
     try:
-        client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
+        client = get_mistral_client()
         chat_response = client.chat.complete(
             model="mistral-large-latest",
             messages=[
@@ -41,19 +55,17 @@ Your output: Reasoning followed by {{She doesn't like pizza anymore.}}"""
             ]
         )
         response_text = chat_response.choices[0].message.content
-        print(f"Mistral Response: {response_text}")
+        log_payload(logger, "Mistral response", provider="Mistral", response=response_text)
         return extract_correction(response_text)
     except Exception as e:
-        print(f"Mistral AI returned Error: {str(e)}")
+        logger.warning("Mistral AI returned Error: %s", e, extra={"provider": "Mistral"})
         return None
 
 
 def get_anthropic_correction(sentence):
     """Get correction from Anthropic Claude"""
     try:
-        client = anthropic.Anthropic(
-            api_key=os.getenv("ANTHROPIC_API_KEY"),
-        )
+        client = get_anthropic_client()
 
         message = client.messages.create(
             model="claude-3-haiku-20240307",
@@ -73,18 +85,16 @@ def get_anthropic_correction(sentence):
             ]
         )
         response_text = message.content[0].text
-        print(f"Anthropic Response: {response_text}")
+        log_payload(logger, "Anthropic response", provider="Anthropic", response=response_text)
         return extract_correction(response_text)
     except Exception as e:
-        print(f"Anthropic returned Error: {str(e)}")
+        logger.warning("Anthropic returned Error: %s", e, extra={"provider": "Anthropic"})
         return None
 
 
 def get_gemini_correction(sentence):
     """Get correction from Gemini"""
     try:
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-
         generation_config = {
             "temperature": 0.1,
             "top_p": 0.95,
@@ -93,20 +103,20 @@ def get_gemini_correction(sentence):
             "response_mime_type": "text/plain",
         }
 
-        model = genai.GenerativeModel(
+        model = get_gemini_model(
             model_name="gemini-1.5-flash",
             generation_config=generation_config,
             system_instruction="Given a sentence, your task is to help correct it's grammar and style. First, think about how to correct it and then return only one final corrected sentence within double curly braces.\n\nExample Input: She don't likes pizza no more.\nYour output: Reasoning followed by {{She doesn't like pizza anymore.}}",
         )
 
-        chat_session = model.start_chat(history=[])
-        response = chat_session.send_message(f"Sentence: {sentence}")
+        # A single-turn generate_content call needs no per-request chat session
+        response = model.generate_content(f"Sentence: {sentence}")
         response_text = response.text
-        print(f"Gemini Response: {response_text}")
+        log_payload(logger, "Gemini response", provider="Gemini", response=response_text)
         return extract_correction(response_text)
 
     except Exception as e:
-        print(f"Gemini returned Error: {str(e)}")
+        logger.warning("Gemini returned Error: %s", e, extra={"provider": "Gemini"})
         return None
 
 
@@ -114,7 +124,7 @@ def get_gemini_correction(sentence):
 def get_openai_final_corrections(original_text, corrections):
     """Get final corrections from OpenAI"""
     try:
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        client = get_openai_client()
         
         # Format the corrections for OpenAI input
         corrections_str = str(corrections)
@@ -150,29 +160,40 @@ def get_openai_final_corrections(original_text, corrections):
         )
         
         response_text = response.choices[0].message.content
-        print(f"OpenAI Response: {response_text}")
+        log_payload(logger, "OpenAI response", provider="OpenAI", response=response_text)
         return json.loads(response_text)
     except Exception as e:
-        print(f"OpenAI returned Error: {str(e)}")
+        logger.error("OpenAI returned Error: %s", e, extra={"provider": "OpenAI"})
         return None
 
 
-def get_all_corrections(sentence):
+# Experts in the order their corrections are reported to OpenAI
+EXPERTS = [
+    ("Mistral", get_mistral_correction),
+    ("Anthropic", get_anthropic_correction),
+    ("Gemini", get_gemini_correction),
+]
+
+
+def get_expert_corrections(sentence, concurrent=None):
+    """Get (name, correction) pairs from every expert LLM, in EXPERTS order"""
+    if concurrent is None:
+        concurrent = CONCURRENT_EXPERTS
+
+    if concurrent:
+        # Each call runs in a copy of this request's context, so its log records keep the request ID
+        futures = [(name, _expert_pool.submit(contextvars.copy_context().run, func, sentence)) for name, func in EXPERTS]
+        results = [(name, future.result()) for name, future in futures]
+    else:
+        results = [(name, func(sentence)) for name, func in EXPERTS]
+
+    # Drop experts that failed or returned no {{...}} correction
+    return [(name, correction) for name, correction in results if correction]
+
+
+def get_all_corrections(sentence, concurrent=None):
     """Get corrections from all LLMs and final analysis from OpenAI"""
-    corrections = []
-    
-    # Get corrections from each LLM
-    mistral_correction = get_mistral_correction(sentence)
-    if mistral_correction:
-        corrections.append(("Mistral", mistral_correction))
-    
-    anthropic_correction = get_anthropic_correction(sentence)
-    if anthropic_correction:
-        corrections.append(("Anthropic", anthropic_correction))
-    
-    gemini_correction = get_gemini_correction(sentence)
-    if gemini_correction:
-        corrections.append(("Gemini", gemini_correction))
+    corrections = get_expert_corrections(sentence, concurrent=concurrent)
     
     # Get final analysis from OpenAI
     if corrections:
@@ -181,3 +202,20 @@ def get_all_corrections(sentence):
             return final_corrections
     
     return None
+
+
+def get_batch_corrections(sentences):
+    """Get corrections for many sentences, one {"result"} or {"error"} dict per sentence, in order"""
+    # Identical sentences are only corrected once
+    unique = list(dict.fromkeys(sentence.strip() for sentence in sentences))
+    context = contextvars.copy_context()
+    results = dict(zip(unique, _batch_pool.map(lambda sentence: context.copy().run(get_all_corrections, sentence), unique)))
+
+    outcomes = []
+    for sentence in sentences:
+        result = results[sentence.strip()]
+        if result:
+            outcomes.append({"result": copy.deepcopy(result)})
+        else:
+            outcomes.append({"error": "Failed to get corrections from LLMs."})
+    return outcomes
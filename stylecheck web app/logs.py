@@ -0,0 +1,148 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+
+# Structured logging for the request path. Loggers only put records on a
+# queue; a background QueueListener formats them (JSON lines, or text with
+# STYLECHECK_LOG_FORMAT=text) and writes them to stderr or STYLECHECK_LOG_FILE,
+# so a request never waits on log I/O. Every record carries the ID of the
+# request it was logged for. Verbose payloads (full LLM responses, final
+# results) are logged at DEBUG, or at INFO for a sampled share of requests.
+LOG_LEVEL = os.getenv("STYLECHECK_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("STYLECHECK_LOG_FORMAT", "json")
+LOG_FILE = os.getenv("STYLECHECK_LOG_FILE") or None
+PAYLOAD_SAMPLE_RATE = float(os.getenv("STYLECHECK_LOG_PAYLOAD_SAMPLE", "0.01"))
+
+# (request ID, whether the request's payloads are logged) for the current request
+_request = contextvars.ContextVar("stylecheck_request_log", default=None)
+
+# A client-supplied X-Request-Id is kept only if it looks like an ID
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+_configure_lock = threading.Lock()
+_listener = None
+
+def begin_request(request_id=None):
+    """Give the current request an ID (the client's, if valid) and decide whether its payloads are logged.
+
+    Returns a token for end_request().
+    """
+    if not request_id or not _REQUEST_ID.match(request_id):
+        request_id = uuid.uuid4().hex
+    return _request.set((request_id, random.random() < PAYLOAD_SAMPLE_RATE))
+
+def end_request(token):
+    _request.reset(token)
+
+def current_request_id():
+    current = _request.get()
+    return current[0] if current else None
+
+def payload_sampled():
+    """Whether this request's verbose payloads are logged; outside a request each payload is sampled on its own."""
+    current = _request.get()
+    return current[1] if current else random.random() < PAYLOAD_SAMPLE_RATE
+
+def log_payload(logger, message, **fields):
+    """Log a verbose payload (fields go into the record): always at DEBUG, for sampled requests at INFO."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, extra=fields)
+    elif logger.isEnabledFor(logging.INFO) and payload_sampled():
+        logger.info(message, extra=fields)
+
+def record_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+def format_time(record):
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z"
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, request_id, message, any extra fields, exception."""
+
+    def format(self, record):
+        entry = {
+            "time": format_time(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": record.request_id,
+            "message": record.getMessage(),
+        }
+        entry.update(record_fields(record))
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class TextFormatter(logging.Formatter):
+    """time level logger [request_id] message key=value ..."""
+
+    def format(self, record):
+        line = f"{format_time(record)} {record.levelname} {record.name} [{record.request_id or '-'}] {record.getMessage()}"
+        for key, value in record_fields(record).items():
+            line += f" {key}={value if isinstance(value, str) else json.dumps(value, default=str)}"
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the current request's ID; runs on the logging thread, where the ID is known."""
+
+    def filter(self, record):
+        record.request_id = current_request_id()
+        return True
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues a snapshot of each record, leaving formatting and output to the listener thread."""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        # The message arguments and extra fields may be dicts the caller keeps
+        # changing, so they are rendered now and the listener only sees copies
+        record.msg = record.getMessage()
+        record.args = None
+        for key, value in record_fields(record).items():
+            if not isinstance(value, (str, int, float, bool, type(None))):
+                setattr(record, key, json.loads(json.dumps(value, default=str)))
+        # Tracebacks hold frames that must not outlive the request, so they are rendered now
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def configure():
+    """Attach the queue handler to the "stylecheck" logger and start the listener, once per process."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        output = logging.FileHandler(LOG_FILE, encoding="utf-8") if LOG_FILE else logging.StreamHandler(sys.stderr)
+        output.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+        log_queue = queue.SimpleQueue()
+        handler = BackgroundQueueHandler(log_queue)
+        handler.addFilter(RequestIdFilter())
+        root = logging.getLogger("stylecheck")
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(handler)
+        root.propagate = False
+        _listener = logging.handlers.QueueListener(log_queue, output)
+        _listener.start()
+        # Flush whatever is still queued when the process exits
+        atexit.register(_listener.stop)
+
+def get_logger(name):
+    """The "stylecheck.<name>" logger, configuring logging on first use."""
+    configure()
+    return logging.getLogger(f"stylecheck.{name}")
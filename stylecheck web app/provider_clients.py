@@ -0,0 +1,68 @@
+# Import necessary libraries
+import os
+import threading
+from mistralai import Mistral
+import anthropic
+import google.generativeai as genai
+from openai import OpenAI
+
+# Process-wide registry of provider SDK clients. Each client owns an HTTP
+# connection pool, so building it once keeps keep-alive and TLS sessions warm
+# across requests. The SDK clients are safe to share between Flask threads.
+_clients = {}
+_clients_pid = os.getpid()
+_lock = threading.Lock()
+
+
+def get_client(key, factory):
+    """Return the shared client for key, building it with factory on first use"""
+    global _clients_pid
+    client = _clients.get(key)
+    if client is not None and _clients_pid == os.getpid():
+        return client
+
+    with _lock:
+        # Connection pools must not be shared with a forked worker process
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        client = _clients.get(key)
+        if client is None:
+            client = factory()
+            _clients[key] = client
+    return client
+
+
+def reset_clients():
+    """Drop every cached client, e.g. after rotating API keys"""
+    with _lock:
+        _clients.clear()
+
+
+def get_mistral_client():
+    """Get the shared Mistral client"""
+    return get_client("mistral", lambda: Mistral(api_key=os.getenv("MISTRAL_API_KEY")))
+
+
+def get_anthropic_client():
+    """Get the shared Anthropic client"""
+    return get_client("anthropic", lambda: anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY")))
+
+
+def get_openai_client():
+    """Get the shared OpenAI client"""
+    return get_client("openai", lambda: OpenAI(api_key=os.getenv("OPENAI_API_KEY")))
+
+
+def get_gemini_model(model_name, generation_config, system_instruction):
+    """Get a shared Gemini model, configuring the SDK when it is first built"""
+    def build():
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        return genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=generation_config,
+            system_instruction=system_instruction,
+        )
+
+    key = ("gemini", model_name, system_instruction, tuple(sorted(generation_config.items())))
+    return get_client(key, build)
@@ -0,0 +1,35 @@
+import json
+
+# Response building shared by the Flask app (app.py) and the ASGI app (asgi_app.py)
+
+# Largest number of texts accepted by /check/batch in one request
+MAX_BATCH_SIZE = 100
+
+def format_correction_result(correction_result):
+    """Turn a pipeline result into the /check response body; returns (data, error)."""
+    # An empty list is a valid answer: the experts found nothing to correct
+    corrections = correction_result.get("corrections")
+    if corrections is None:
+        return None, "No corrections available"
+
+    # Add IDs to the corrections
+    for i, correction in enumerate(corrections, 1):
+        correction["id"] = i
+
+    response_data = {
+        "corrections": corrections,
+        "corrected_text": correction_result.get("corrected_phrase", ""),
+        "overall_explanation": correction_result.get("overall_explanation", ""),
+        "experts": correction_result.get("experts", [])
+    }
+    # Paragraph mode: per-sentence spans in the submitted text
+    if "sentences" in correction_result:
+        response_data["sentences"] = correction_result["sentences"]
+    # Stage timings and token counts, for requests that asked for them
+    if "timings" in correction_result:
+        response_data["timings"] = correction_result["timings"]
+    return response_data, None
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -1,8 +1,112 @@
-from flask import Flask, render_template, request, jsonify
-from llm_integrations import get_all_corrections
-import traceback
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, g
+from llm_integrations import get_document_corrections, get_batch_corrections, stream_corrections, get_cache_stats, get_expert_cache_entries, invalidate_expert_cache, expert_caches, get_provider_health, get_routing_stats
+from stage_timings import track_timings, timing_stats
+from metrics import registry, REQUESTS, REQUEST_SECONDS, REQUESTS_IN_FLIGHT
+from tracing import start_trace, span, traces
+from profiling import profile_mode, start_profile, finish_profile
+from logs import get_logger, log_payload, begin_request, end_request, current_request_id
+from api_responses import format_correction_result, sse_event, MAX_BATCH_SIZE
+import time
 
 app = Flask(__name__)
+logger = get_logger("app")
+
+# Views a request can ask to have profiled (the stream's pipeline outlives the view)
+PROFILED_ENDPOINTS = {'check_text', 'check_batch'}
+
+def metrics_endpoint():
+    """Route pattern of the current request, so /cache/experts/<provider> is one label value."""
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+@app.before_request
+def start_request_log():
+    # Log records of this request (and of the pool threads working for it) carry its ID
+    g.log_token = begin_request(request.headers.get('X-Request-Id'))
+
+@app.after_request
+def tag_request_id(response):
+    response.headers["X-Request-Id"] = current_request_id()
+    return response
+
+@app.teardown_request
+def finish_request_log(error=None):
+    if "log_token" in g:
+        end_request(g.pop("log_token"))
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc(metrics_endpoint())
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = metrics_endpoint()
+    REQUESTS.inc(endpoint, request.method, str(response.status_code))
+    if response.is_streamed:
+        # The body has not been generated yet; time the stream to its first chunk instead
+        response.response = observe_first_chunk(response.response, g.metrics_started, endpoint, request.method)
+    else:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.metrics_started, endpoint, request.method)
+    return response
+
+def observe_first_chunk(chunks, started, endpoint, method):
+    """Pass a streamed body through, recording REQUEST_SECONDS when its first chunk (or its end) is reached."""
+    observed = False
+    try:
+        for chunk in chunks:
+            if not observed:
+                REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint, method)
+                observed = True
+            yield chunk
+    finally:
+        if not observed:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint, method)
+        # Closing the wrapped body runs stream_with_context's teardown
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    # Runs after a streamed response has been sent in full
+    if "metrics_started" in g:
+        REQUESTS_IN_FLIGHT.dec(metrics_endpoint())
+
+@app.before_request
+def start_request_profile():
+    # Opt-in per request; everything else pays only for the endpoint check and header lookup
+    if request.endpoint not in PROFILED_ENDPOINTS:
+        return
+    body = request.get_json(silent=True)
+    mode = profile_mode(request.headers.get('X-Profile') or (body.get('profile') if isinstance(body, dict) else None))
+    if mode:
+        g.profile = (mode, *start_profile())
+
+@app.after_request
+def attach_request_profile(response):
+    if "profile" not in g:
+        return response
+    mode, profiler, token = g.pop("profile")
+    summary = finish_profile(profiler, token, mode)
+    if mode == "save":
+        response.headers["X-Profile-File"] = summary["file"]
+        return response
+    data = response.get_json(silent=True)
+    if isinstance(data, dict):
+        response.set_data(app.json.dumps(dict(data, profile=summary)))
+    return response
+
+@app.teardown_request
+def discard_request_profile(error=None):
+    # A view that raised never reached after_request: stop the sampler anyway
+    if "profile" in g:
+        mode, profiler, token = g.pop("profile")
+        finish_profile(profiler, token, None)
+
+def traced_response(response, trace):
+    """Tag a response with its trace ID, for looking the request up at /debug/traces/<trace_id>."""
+    if trace.trace_id:
+        response.headers["X-Trace-Id"] = trace.trace_id
+    return response
 
 @app.route('/')
 def home():
@@ -12,41 +116,144 @@ def home():
 def check_text():
     try:
         text = request.json.get('text', '')
-        print(f"\nReceived text for correction: {text}")
+        logger.info("Received text for correction", extra={"text_length": len(text)})
         if not text:
-            print("Error: Empty text received")
+            logger.info("Empty text received")
             return jsonify({"error": "No text provided"}), 400
         
-        # Get corrections from all LLMs and final OpenAI analysis
-        correction_result = get_all_corrections(text)
-        print("\nFinal correction result:", correction_result)
-        
-        if not correction_result:
-            print("Error: No correction result returned")
-            return jsonify({"error": "Failed to get corrections"}), 500
+        with start_trace("check", text_length=len(text)) as trace:
+            # Get corrections from all LLMs and final OpenAI analysis, sentence by sentence
+            with track_timings() as timings:
+                correction_result = get_document_corrections(text)
+            log_payload(logger, "Final correction result", result=correction_result)
             
-        # Extract corrections and add IDs
-        corrections = correction_result.get("corrections", [])
-        if not corrections:
-            print("Error: No corrections in result")
-            return jsonify({"error": "No corrections available"}), 400
-            
-        for i, correction in enumerate(corrections, 1):
-            correction["id"] = i
-        
-        response_data = {
-            "corrections": corrections,
-            "corrected_text": correction_result.get("corrected_phrase", ""),
-            "overall_explanation": correction_result.get("overall_explanation", "")
-        }
-        print("\nSending response:", response_data)
-        return jsonify(response_data)
+            if not correction_result:
+                logger.error("No correction result returned")
+                trace.set(outcome="failed")
+                return traced_response(jsonify({"error": "Failed to get corrections"}), trace), 500
+            if request.json.get('timings'):
+                correction_result = dict(correction_result, timings=timings.as_dict())
+                
+            with span("response_build"):
+                response_data, error = format_correction_result(correction_result)
+                if error:
+                    logger.error("Could not build the response: %s", error)
+                    trace.set(outcome="failed")
+                    return traced_response(jsonify({"error": error}), trace), 400
+                
+                log_payload(logger, "Sending response", response=response_data)
+                trace.set(outcome="ok", corrections=len(response_data["corrections"]))
+                return traced_response(jsonify(response_data), trace)
         
     except Exception as e:
-        error_trace = traceback.format_exc()
-        print(f"Error in check_text: {str(e)}")
-        print(f"Traceback: {error_trace}")
+        logger.exception("Error in check_text: %s", e)
         return jsonify({"error": str(e)}), 500
 
+@app.route('/check/stream', methods=['POST'])
+def check_stream():
+    try:
+        payload = request.json
+        text = payload.get('text', '')
+        timings = bool(payload.get('timings'))
+    except Exception as e:
+        # A missing or malformed body is answered as an empty one
+        logger.warning("Could not parse the streaming request: %s", e)
+        text, timings = '', False
+    if not isinstance(text, str) or not text:
+        return jsonify({"error": "No text provided"}), 400
+    logger.info("Received text for streaming correction", extra={"text_length": len(text)})
+
+    def generate():
+        for event, data in stream_corrections(text, timings=timings):
+            if event == "result":
+                if not data:
+                    yield sse_event("error", {"error": "Failed to get corrections"})
+                    continue
+                response_data, error = format_correction_result(data)
+                if error:
+                    yield sse_event("error", {"error": error})
+                    continue
+                data = response_data
+            yield sse_event(event, data)
+
+    # Tell proxies not to buffer, so each event reaches the browser as it happens
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/check/batch', methods=['POST'])
+def check_batch():
+    try:
+        texts = request.json.get('texts', [])
+        if not isinstance(texts, list) or not texts:
+            return jsonify({"error": "No texts provided"}), 400
+        if len(texts) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"At most {MAX_BATCH_SIZE} texts per batch"}), 400
+        logger.info("Received batch of %d texts for correction", len(texts))
+
+        # Empty items get their own error instead of failing the whole batch
+        valid = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+        with start_trace("check_batch", texts=len(texts)) as trace:
+            with track_timings() as timings:
+                outcomes = dict(zip(valid, get_batch_corrections([texts[i] for i in valid])))
+
+            with span("response_build"):
+                results = []
+                for i in range(len(texts)):
+                    outcome = outcomes.get(i, {"error": "No text provided"})
+                    if "result" in outcome:
+                        response_data, error = format_correction_result(outcome["result"])
+                        outcome = response_data if response_data else {"error": error}
+                    results.append({**outcome, "index": i})
+                body = {"results": results}
+                if request.json.get('timings'):
+                    body["timings"] = timings.as_dict()
+                return traced_response(jsonify(body), trace)
+
+    except Exception as e:
+        logger.exception("Error in check_batch: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(get_cache_stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/debug/traces', methods=['GET'])
+def list_traces():
+    limit = request.args.get('limit', 50, type=int)
+    min_duration = request.args.get('min_duration', 0.0, type=float)
+    return jsonify({"traces": traces.recent(limit=limit, min_duration=min_duration)})
+
+@app.route('/debug/traces/<trace_id>', methods=['GET'])
+def show_trace(trace_id):
+    trace = traces.tree(trace_id)
+    if trace is None:
+        return jsonify({"error": f"Unknown trace: {trace_id}"}), 404
+    return jsonify(trace)
+
+@app.route('/stats/timings', methods=['GET'])
+def stage_timing_stats():
+    return jsonify(timing_stats.stats())
+
+@app.route('/stats/routing', methods=['GET'])
+def routing_stats():
+    return jsonify(get_routing_stats())
+
+@app.route('/health/providers', methods=['GET'])
+def provider_health():
+    return jsonify(get_provider_health())
+
+@app.route('/cache/experts/<provider>', methods=['GET', 'DELETE'])
+def expert_cache(provider):
+    if provider not in expert_caches:
+        return jsonify({"error": f"Unknown expert provider: {provider}"}), 404
+    if request.method == 'DELETE':
+        invalidate_expert_cache(provider)
+        return jsonify({"invalidated": provider})
+    return jsonify({"provider": provider, "entries": get_expert_cache_entries(provider)})
+
 if __name__ == '__main__':
     app.run(debug=True)
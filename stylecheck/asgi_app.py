@@ -0,0 +1,308 @@
+import os
+import time
+import json
+import asyncio
+from jinja2 import Environment, FileSystemLoader
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, JSONResponse, StreamingResponse, PlainTextResponse
+from starlette.routing import Route, Mount, Match
+from starlette.middleware import Middleware
+from starlette.staticfiles import StaticFiles
+from async_llm_integrations import get_document_corrections, get_batch_corrections, single_flight
+from llm_integrations import (get_cache_stats, get_provider_health, get_routing_stats, get_expert_cache_entries,
+                              invalidate_expert_cache, expert_caches)
+from api_responses import format_correction_result, sse_event, MAX_BATCH_SIZE
+from stage_timings import track_timings, timing_stats
+from metrics import registry, REQUESTS, REQUEST_SECONDS, REQUESTS_IN_FLIGHT
+from tracing import start_trace, span, traces
+from profiling import profile_mode, start_profile, finish_profile
+from logs import get_logger, begin_request, end_request, current_request_id
+
+# Async serving mode: the same endpoints as app.py, served by an ASGI server
+# (`uvicorn asgi_app:app`) on top of the providers' async SDK clients.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+logger = get_logger("asgi_app")
+
+# index.html uses Flask's url_for('static', filename=...) signature
+templates = Environment(loader=FileSystemLoader(os.path.join(BASE_DIR, "templates")), autoescape=True)
+templates.globals["url_for"] = lambda endpoint, filename: f"/static/{filename}"
+
+def traced_response(response, trace):
+    """Tag a response with its trace ID, for looking the request up at /debug/traces/<trace_id>."""
+    if trace.trace_id:
+        response.headers["X-Trace-Id"] = trace.trace_id
+    return response
+
+async def home(request):
+    return HTMLResponse(templates.get_template("index.html").render())
+
+async def check_text(request):
+    try:
+        payload = await request.json()
+        text = payload.get('text', '')
+        logger.info("Received text for correction", extra={"text_length": len(text)})
+        if not text:
+            logger.info("Empty text received")
+            return JSONResponse({"error": "No text provided"}, status_code=400)
+
+        with start_trace("check", text_length=len(text)) as trace:
+            # Get corrections from all LLMs and final OpenAI analysis, sentence by sentence
+            with track_timings() as timings:
+                correction_result = await get_document_corrections(text)
+
+            if not correction_result:
+                logger.error("No correction result returned")
+                trace.set(outcome="failed")
+                return traced_response(JSONResponse({"error": "Failed to get corrections"}, status_code=500), trace)
+            if payload.get('timings'):
+                correction_result = dict(correction_result, timings=timings.as_dict())
+
+            with span("response_build"):
+                response_data, error = format_correction_result(correction_result)
+                if error:
+                    logger.error("Could not build the response: %s", error)
+                    trace.set(outcome="failed")
+                    return traced_response(JSONResponse({"error": error}, status_code=400), trace)
+
+                trace.set(outcome="ok", corrections=len(response_data["corrections"]))
+                return traced_response(JSONResponse(response_data), trace)
+
+    except Exception as e:
+        logger.exception("Error in check_text: %s", e)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def check_stream(request):
+    try:
+        payload = await request.json()
+        text = payload.get('text', '')
+    except Exception as e:
+        # A missing or malformed body is answered as an empty one
+        logger.warning("Could not parse the streaming request: %s", e)
+        payload, text = {}, ''
+    if not isinstance(text, str) or not text:
+        return JSONResponse({"error": "No text provided"}, status_code=400)
+    logger.info("Received text for streaming correction", extra={"text_length": len(text)})
+
+    events = asyncio.Queue()
+
+    async def on_expert(sentence, name, correction):
+        await events.put(("expert", {"sentence": sentence, "name": name, "correction": correction}))
+
+    async def run():
+        try:
+            with start_trace("check_stream", text_length=len(text)) as trace:
+                with track_timings() as timings:
+                    result = await get_document_corrections(text, on_expert=on_expert)
+                if not result:
+                    trace.set(outcome="failed")
+                    await events.put(("error", {"error": "Failed to get corrections"}))
+                    return
+                if payload.get('timings'):
+                    result = dict(result, timings=timings.as_dict())
+                with span("response_build"):
+                    response_data, error = format_correction_result(result)
+                trace.set(outcome="failed" if error else "ok")
+                await events.put(("error", {"error": error}) if error else ("result", response_data))
+        except Exception as e:
+            await events.put(("error", {"error": str(e)}))
+
+    async def generate():
+        task = asyncio.ensure_future(run())
+        try:
+            while True:
+                event, data = await events.get()
+                yield sse_event(event, data)
+                if event != "expert":
+                    return
+        finally:
+            # The client went away before the result: stop paying for the pipeline
+            task.cancel()
+
+    return StreamingResponse(generate(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+async def check_batch(request):
+    try:
+        payload = await request.json()
+        texts = payload.get('texts', [])
+        if not isinstance(texts, list) or not texts:
+            return JSONResponse({"error": "No texts provided"}, status_code=400)
+        if len(texts) > MAX_BATCH_SIZE:
+            return JSONResponse({"error": f"At most {MAX_BATCH_SIZE} texts per batch"}, status_code=400)
+        logger.info("Received batch of %d texts for correction", len(texts))
+
+        # Empty items get their own error instead of failing the whole batch
+        valid = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+        with start_trace("check_batch", texts=len(texts)) as trace:
+            with track_timings() as timings:
+                outcomes = dict(zip(valid, await get_batch_corrections([texts[i] for i in valid])))
+
+            with span("response_build"):
+                results = []
+                for i in range(len(texts)):
+                    outcome = outcomes.get(i, {"error": "No text provided"})
+                    if "result" in outcome:
+                        response_data, error = format_correction_result(outcome["result"])
+                        outcome = response_data if response_data else {"error": error}
+                    results.append({**outcome, "index": i})
+                body = {"results": results}
+                if payload.get('timings'):
+                    body["timings"] = timings.as_dict()
+                return traced_response(JSONResponse(body), trace)
+
+    except Exception as e:
+        logger.exception("Error in check_batch: %s", e)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def cache_stats(request):
+    stats = get_cache_stats()
+    stats["single_flight"] = single_flight.stats()
+    return JSONResponse(stats)
+
+async def expert_cache(request):
+    provider = request.path_params['provider']
+    if provider not in expert_caches:
+        return JSONResponse({"error": f"Unknown expert provider: {provider}"}, status_code=404)
+    # Both read or clear the SQLite tier, so they run off the event loop
+    if request.method == 'DELETE':
+        await asyncio.to_thread(invalidate_expert_cache, provider)
+        return JSONResponse({"invalidated": provider})
+    entries = await asyncio.to_thread(get_expert_cache_entries, provider)
+    return JSONResponse({"provider": provider, "entries": entries})
+
+async def metrics(request):
+    return PlainTextResponse(registry.render(), media_type='text/plain; version=0.0.4')
+
+async def list_traces(request):
+    try:
+        limit = int(request.query_params.get('limit', 50))
+        min_duration = float(request.query_params.get('min_duration', 0.0))
+    except ValueError:
+        return JSONResponse({"error": "limit and min_duration must be numbers"}, status_code=400)
+    return JSONResponse({"traces": traces.recent(limit=limit, min_duration=min_duration)})
+
+async def show_trace(request):
+    trace_id = request.path_params['trace_id']
+    trace = traces.tree(trace_id)
+    if trace is None:
+        return JSONResponse({"error": f"Unknown trace: {trace_id}"}, status_code=404)
+    return JSONResponse(trace)
+
+async def stage_timing_stats(request):
+    return JSONResponse(timing_stats.stats())
+
+async def routing_stats(request):
+    return JSONResponse(get_routing_stats())
+
+async def provider_health(request):
+    return JSONResponse(get_provider_health())
+
+class RequestLogging:
+    """ASGI middleware giving each HTTP request an ID (X-Request-Id, echoed back) that its log records carry."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = begin_request(dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1"))
+        request_id = current_request_id().encode()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=list(message.get("headers", [])) + [(b"x-request-id", request_id)])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            end_request(token)
+
+class RequestMetrics:
+    """ASGI middleware counting requests, their latency (to the first body chunk) and those in flight."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        endpoint = next((route.path for route in routes if route.matches(scope)[0] == Match.FULL), "unmatched")
+        started = time.perf_counter()
+        observed = False
+
+        async def send_with_metrics(message):
+            nonlocal observed
+            if message["type"] == "http.response.start":
+                REQUESTS.inc(endpoint, scope["method"], str(message["status"]))
+            elif message["type"] == "http.response.body" and not observed:
+                # A streamed response starts before its body is generated, so latency runs to the first chunk
+                REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint, scope["method"])
+                observed = True
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc(endpoint)
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            REQUESTS_IN_FLIGHT.dec(endpoint)
+
+class RequestProfiler:
+    """ASGI middleware sampling /check and /check/batch requests sent with an X-Profile header.
+
+    The whole event loop thread is sampled, so concurrent requests' coroutines show up in the profile too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in ('/check', '/check/batch'):
+            return await self.app(scope, receive, send)
+        mode = profile_mode(dict(scope["headers"]).get(b"x-profile", b"").decode("latin-1"))
+        if not mode:
+            return await self.app(scope, receive, send)
+
+        # Hold the response back until the profile can be added to it
+        messages = []
+
+        async def hold(message):
+            messages.append(message)
+
+        profiler, token = start_profile()
+        try:
+            await self.app(scope, receive, hold)
+        finally:
+            # An exception still propagates once the sampler is stopped
+            summary = finish_profile(profiler, token, mode)
+        if not messages:
+            return  # Nothing was sent, e.g. the client went away
+        start, body = messages[0], b"".join(message.get("body", b"") for message in messages[1:])
+        headers = [(name, value) for name, value in start["headers"] if name != b"content-length"]
+        if mode == "save":
+            headers.append((b"x-profile-file", summary["file"].encode()))
+        elif dict(headers).get(b"content-type") == b"application/json":
+            data = json.loads(body)
+            if isinstance(data, dict):
+                body = JSONResponse(dict(data, profile=summary)).body
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send(dict(start, headers=headers))
+        await send({"type": "http.response.body", "body": body})
+
+routes = [
+    Route('/', home),
+    Route('/check', check_text, methods=['POST']),
+    Route('/check/stream', check_stream, methods=['POST']),
+    Route('/check/batch', check_batch, methods=['POST']),
+    Route('/cache/stats', cache_stats, methods=['GET']),
+    Route('/cache/experts/{provider}', expert_cache, methods=['GET', 'DELETE']),
+    Route('/metrics', metrics, methods=['GET']),
+    Route('/debug/traces', list_traces, methods=['GET']),
+    Route('/debug/traces/{trace_id}', show_trace, methods=['GET']),
+    Route('/stats/timings', stage_timing_stats, methods=['GET']),
+    Route('/stats/routing', routing_stats, methods=['GET']),
+    Route('/health/providers', provider_health, methods=['GET']),
+    Mount('/static', StaticFiles(directory=os.path.join(BASE_DIR, "static")), name='static'),
+]
+app = Starlette(routes=routes, middleware=[Middleware(RequestLogging), Middleware(RequestMetrics), Middleware(RequestProfiler)])
@@ -0,0 +1,595 @@
+import asyncio
+import copy
+import functools
+import json
+import time
+from provider_clients import get_mistral_client, get_async_anthropic_client, get_async_openai_client, get_gemini_model
+from correction_cache import normalize_text, make_key
+from single_flight import AsyncSingleFlight, SingleFlightTimeout
+from segmentation import split_sentences
+from rate_limiter import estimate_tokens
+from stage_timings import record, record_cache, timed_stage
+from tracing import span, traced, annotate
+from logs import get_logger, log_payload
+from metrics import PROVIDER_CALL_SECONDS, PROVIDER_SKIPS, EXPERTS_ABANDONED, ARBITER_JSON_ERRORS
+from rate_limiter import RateLimitTimeout
+import llm_integrations as sync
+from llm_integrations import (
+    MISTRAL_MODEL, ANTHROPIC_MODEL, GEMINI_MODEL, OPENAI_MODEL, GEMINI_GENERATION_CONFIG,
+    ARBITER_SYSTEM_PROMPT, ARBITER_BATCH_SYSTEM_PROMPT, expert_system_prompt, expert_output_budget, extract_correction, remaining_time,
+    correction_cache, expert_memos, pipeline_cache_key, stitch_document, breakers, call_succeeded,
+    rate_limiters, retry_delay, STOP_SEQUENCE, gemini_chunk_text, PROVIDER_STAGES, record_usage,
+    vote_locally, record_call_failure, fast_tier_enabled, route_fast_answer, cache_result, arbiter_prompt,
+    arbiter_batch_prompt, parse_arbiter_batch, resolves_locally, unique_texts, lookup_batch, triage_expert_results,
+    pack_arbiter_items, record_arbiter_results, finish_batch, single_flight_deadline,
+)
+
+# asyncio counterparts of the llm_integrations pipeline for the ASGI app. They
+# share its prompts, models, caches and expert memos, but wait on the provider
+# SDKs' async clients instead of blocking a thread per call, so one process can
+# keep hundreds of corrections in flight.
+
+logger = get_logger("async_llm_integrations")
+
+# Coalesces identical concurrent requests on this event loop
+single_flight = AsyncSingleFlight()
+
+async def cache_call(cache, func, *args, **kwargs):
+    """Run a cache read or write in a worker thread when it touches SQLite, so the event loop never blocks on disk."""
+    if cache.db_path:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return func(*args, **kwargs)
+
+def memoize_expert_async(name):
+    """Async version of llm_integrations.memoize_expert, sharing the same memo."""
+    memo = expert_memos[name]
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(text, timeout=None):
+            if not sync.CACHE_ENABLED:
+                return await func(text, timeout=timeout)
+            cached = await cache_call(memo.cache, memo.get, text)
+            if cached is not None:
+                record("experts", name, memo_hits=1)
+                annotate(memo_hit=True)
+                return cached
+
+            correction = await func(text, timeout=timeout)
+            if correction:
+                await cache_call(memo.cache, memo.set, text, correction)
+            return correction
+        return wrapper
+    return decorator
+
+async def call_provider_async(name, request, tokens=1, timeout=None):
+    """Async version of llm_integrations.call_provider; request(timeout) returns an awaitable."""
+    deadline = time.monotonic() + timeout if timeout else None
+    attempt = 0
+    while True:
+        queued = time.monotonic()
+        try:
+            await rate_limiters[name].acquire_async(tokens, timeout=remaining_time(deadline))
+        except RateLimitTimeout as e:
+            record_call_failure(name, e, 0)
+            raise
+        waited = time.monotonic() - queued
+        record(PROVIDER_STAGES[name], name, rate_limit_wait=waited)
+        started = time.monotonic()
+        try:
+            with span("provider_call", provider=name, attempt=attempt + 1, rate_limit_wait=waited):
+                response = await request(remaining_time(deadline))
+        except Exception as e:
+            record_call_failure(name, e, time.monotonic() - started)
+            delay = retry_delay(name, e, attempt, deadline)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        PROVIDER_CALL_SECONDS.observe(time.monotonic() - started, name, "ok")
+        return response
+
+def guard_provider_async(name, rejected=lambda *args, **kwargs: None):
+    """Async version of llm_integrations.guard_provider, sharing the same breaker."""
+    breaker = breakers[name]
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not sync.BREAKER_ENABLED:
+                return await func(*args, **kwargs)
+            if not breaker.allow():
+                logger.warning("Skipping %s: circuit breaker is open", name, extra={"provider": name})
+                record(PROVIDER_STAGES[name], name, breaker_skips=1)
+                PROVIDER_SKIPS.inc(name)
+                annotate(breaker="open")
+                return rejected(*args, **kwargs)
+            started = time.monotonic()
+            try:
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                # Abandoned by the quorum or deadline: says nothing about the provider
+                breaker.release()
+                raise
+            except BaseException:
+                breaker.record(False, time.monotonic() - started)
+                raise
+            breaker.record(call_succeeded(result), time.monotonic() - started)
+            return result
+        return wrapper
+    return decorator
+
+async def read_until_correction_async(chunks):
+    """Async version of llm_integrations.read_until_correction."""
+    response_text = ""
+    async for chunk in chunks:
+        scanned = len(response_text)
+        response_text += chunk
+        if "}}" in response_text[max(scanned - 1, 0):] and extract_correction(response_text):
+            break
+    return response_text
+
+async def mistral_chunks_async(stream):
+    async for event in stream:
+        if getattr(event.data, "usage", None):
+            record_usage("Mistral", event.data.usage)
+        choice = event.data.choices[0]
+        if isinstance(choice.delta.content, str):
+            yield choice.delta.content
+        if choice.finish_reason == "stop":
+            yield STOP_SEQUENCE
+
+async def anthropic_chunks_async(stream):
+    async for text in stream.text_stream:
+        yield text
+    if stream.current_message_snapshot.stop_reason == "stop_sequence":
+        yield STOP_SEQUENCE
+
+async def gemini_chunks_async(response):
+    async for chunk in response:
+        yield gemini_chunk_text(chunk)
+
+@traced("expert", provider="Mistral", model=MISTRAL_MODEL)
+@timed_stage("experts", "Mistral")
+@memoize_expert_async("Mistral")
+@guard_provider_async("Mistral")
+async def get_mistral_correction(text, timeout=None):
+    """Get correction from Mistral AI."""
+    try:
+        client = get_mistral_client()
+        system_prompt = expert_system_prompt()
+        max_tokens = expert_output_budget(text)
+        messages = [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": f"Sentence: {text}"
+            }
+        ]
+
+        async def request(timeout):
+            request_options = {"timeout_ms": int(timeout * 1000)} if timeout else {}
+            if max_tokens:
+                request_options["max_tokens"] = max_tokens
+            if not sync.EXPERT_STREAMING:
+                chat_response = await client.chat.complete_async(model=MISTRAL_MODEL, messages=messages,
+                                                                 **request_options)
+                record_usage("Mistral", chat_response.usage)
+                return chat_response.choices[0].message.content
+            stream = await client.chat.stream_async(model=MISTRAL_MODEL, messages=messages, stop=[STOP_SEQUENCE],
+                                                    **request_options)
+            async with stream:
+                return await read_until_correction_async(mistral_chunks_async(stream))
+
+        response_text = await call_provider_async("Mistral", request, estimate_tokens(system_prompt, text), timeout)
+        log_payload(logger, "Mistral response", provider="Mistral", response=response_text)
+        with span("extract_correction"):
+            return extract_correction(response_text)
+    except Exception as e:
+        logger.warning("Error with Mistral AI: %s", e, extra={"provider": "Mistral"})
+        return None
+
+@traced("expert", provider="Anthropic", model=ANTHROPIC_MODEL)
+@timed_stage("experts", "Anthropic")
+@memoize_expert_async("Anthropic")
+@guard_provider_async("Anthropic")
+async def get_anthropic_correction(text, timeout=None):
+    """Get correction from Anthropic's Claude."""
+    try:
+        client = get_async_anthropic_client()
+        system_prompt = expert_system_prompt()
+
+        async def request(timeout):
+            request_options = {"timeout": timeout} if timeout else {}
+            params = dict(
+                model=ANTHROPIC_MODEL,
+                max_tokens=expert_output_budget(text) or 2808,
+                temperature=0.1,
+                system=system_prompt,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": f"Sentence: {text}"
+                            }
+                        ]
+                    }
+                ],
+                **request_options
+            )
+            if not sync.EXPERT_STREAMING:
+                message = await client.messages.create(**params)
+                record_usage("Anthropic", message.usage)
+                return message.content[0].text
+            async with client.messages.stream(stop_sequences=[STOP_SEQUENCE], **params) as stream:
+                response_text = await read_until_correction_async(anthropic_chunks_async(stream))
+                record_usage("Anthropic", stream.current_message_snapshot.usage)
+                return response_text
+
+        response_text = await call_provider_async("Anthropic", request, estimate_tokens(system_prompt, text), timeout)
+        log_payload(logger, "Anthropic response", provider="Anthropic", response=response_text)
+        with span("extract_correction"):
+            return extract_correction(response_text)
+    except Exception as e:
+        logger.warning("Error with Anthropic: %s", e, extra={"provider": "Anthropic"})
+        return None
+
+@traced("expert", provider="Gemini", model=GEMINI_MODEL)
+@timed_stage("experts", "Gemini")
+@memoize_expert_async("Gemini")
+@guard_provider_async("Gemini")
+async def get_gemini_correction(text, timeout=None):
+    """Get correction from Google's Gemini."""
+    try:
+        system_prompt = expert_system_prompt()
+        model = get_gemini_model(
+            model_name=GEMINI_MODEL,
+            generation_config=GEMINI_GENERATION_CONFIG,
+            system_instruction=system_prompt,
+        )
+        max_tokens = expert_output_budget(text)
+        generation_config = {"max_output_tokens": max_tokens} if max_tokens else {}
+
+        async def request(timeout):
+            request_options = {"timeout": timeout} if timeout else None
+            if not sync.EXPERT_STREAMING:
+                response = await model.generate_content_async(
+                    f"Sentence: {text}", generation_config=generation_config or None, request_options=request_options
+                )
+                record_usage("Gemini", response.usage_metadata)
+                return response.text
+            response = await model.generate_content_async(
+                f"Sentence: {text}", generation_config={**generation_config, "stop_sequences": [STOP_SEQUENCE]},
+                stream=True, request_options=request_options
+            )
+            response_text = await read_until_correction_async(gemini_chunks_async(response))
+            record_usage("Gemini", response.usage_metadata)
+            return response_text
+
+        response_text = await call_provider_async("Gemini", request, estimate_tokens(system_prompt, text), timeout)
+        log_payload(logger, "Gemini response", provider="Gemini", response=response_text)
+        with span("extract_correction"):
+            return extract_correction(response_text)
+    except Exception as e:
+        logger.warning("Error with Gemini: %s", e, extra={"provider": "Gemini"})
+        return None
+
+@traced("arbiter", provider="OpenAI", model=OPENAI_MODEL)
+@timed_stage("arbiter", "OpenAI")
+@guard_provider_async("OpenAI")
+async def get_final_correction(text, llm_corrections, timeout=None):
+    """Get final correction from OpenAI, considering all LLM responses."""
+    try:
+        client = get_async_openai_client()
+        user_content = arbiter_prompt(text, llm_corrections)
+
+        def request(timeout):
+            request_options = {"timeout": timeout} if timeout else {}
+            return client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": ARBITER_SYSTEM_PROMPT
+                    },
+                    {
+                        "role": "user",
+                        "content": user_content
+                    }
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.1,
+                max_tokens=2048,
+                top_p=1,
+                frequency_penalty=0,
+                presence_penalty=0,
+                **request_options
+            )
+
+        response = await call_provider_async(
+            "OpenAI", request, estimate_tokens(ARBITER_SYSTEM_PROMPT, user_content, completion=512), timeout
+        )
+        record_usage("OpenAI", response.usage)
+
+        with span("json_decode"):
+            final_response = json.loads(response.choices[0].message.content)
+        log_payload(logger, "OpenAI final response", provider="OpenAI", result=final_response)
+        return final_response
+    except json.JSONDecodeError as e:
+        ARBITER_JSON_ERRORS.inc("single")
+        logger.error("Error with OpenAI: invalid JSON: %s", e, extra={"provider": "OpenAI"})
+        return None
+    except Exception as e:
+        logger.error("Error with OpenAI: %s", e, extra={"provider": "OpenAI"})
+        return None
+
+@traced("arbiter", succeeded=call_succeeded, provider="OpenAI", model=OPENAI_MODEL, batch=True)
+@timed_stage("arbiter", "OpenAI", succeeded=call_succeeded)
+@guard_provider_async("OpenAI", rejected=lambda items, **kwargs: [None] * len(items))
+async def get_final_corrections_batch(items, timeout=None):
+    """Async twin of llm_integrations.get_final_corrections_batch: one OpenAI call for several sentences."""
+    try:
+        client = get_async_openai_client()
+        sentences_str = arbiter_batch_prompt(items)
+
+        def request(timeout):
+            request_options = {"timeout": timeout} if timeout else {}
+            return client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": ARBITER_BATCH_SYSTEM_PROMPT
+                    },
+                    {
+                        "role": "user",
+                        "content": sentences_str
+                    }
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.1,
+                max_tokens=min(2048 * len(items), 16384),
+                top_p=1,
+                frequency_penalty=0,
+                presence_penalty=0,
+                **request_options
+            )
+
+        tokens = estimate_tokens(ARBITER_BATCH_SYSTEM_PROMPT, sentences_str, completion=512 * len(items))
+        response = await call_provider_async("OpenAI", request, tokens, timeout)
+        record_usage("OpenAI", response.usage)
+        return parse_arbiter_batch(response.choices[0].message.content, len(items))
+    except json.JSONDecodeError as e:
+        ARBITER_JSON_ERRORS.inc("batch")
+        logger.error("Error with OpenAI batch: invalid JSON: %s", e, extra={"provider": "OpenAI"})
+        return [None] * len(items)
+    except Exception as e:
+        logger.error("Error with OpenAI batch: %s", e, extra={"provider": "OpenAI"})
+        return [None] * len(items)
+
+# Experts in the order their corrections are reported to the arbiter
+EXPERTS = [
+    (name, func) for name, func in [
+        ("Mistral", get_mistral_correction),
+        ("Anthropic", get_anthropic_correction),
+        ("Gemini", get_gemini_correction),
+    ]
+    if name in sync.ENABLED_EXPERTS
+]
+
+@traced("experts", succeeded=bool)
+async def get_expert_corrections(text, quorum=None, quorum_wait=None, deadline=None, on_expert=None, known=None):
+    """Get (name, correction) pairs from the expert LLMs, in EXPERTS order.
+
+    Same quorum, deadline and `known` rules as llm_integrations.get_expert_corrections,
+    except that stragglers are cancelled outright.
+    """
+    known = known or {}
+    if quorum is None:
+        quorum = sync.EXPERT_QUORUM
+    if quorum_wait is None:
+        quorum_wait = sync.QUORUM_WAIT
+
+    timeout = remaining_time(deadline)
+    submitted = time.monotonic()
+
+    async def run_expert(name, func):
+        record("experts", name, queue_wait=time.monotonic() - submitted)
+        return await func(text, timeout=timeout)
+
+    tasks = {asyncio.ensure_future(run_expert(name, func)): name for name, func in EXPERTS if name not in known}
+    answers = {name: correction for name, correction in known.items() if correction}
+    quorum = min(quorum, len(tasks) + len(answers))
+    started = time.monotonic()
+    pending = set(tasks)
+
+    try:
+        while pending and len(answers) < quorum:
+            # Sleep until the next expert finishes, the quorum wait ends or the deadline passes
+            wake_at = [deadline] if deadline is not None else []
+            if quorum_wait is not None and time.monotonic() < started + quorum_wait:
+                wake_at.append(started + quorum_wait)
+            wait_for = max(min(wake_at) - time.monotonic(), 0) if wake_at else None
+
+            done, pending = await asyncio.wait(pending, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                correction = task.result()
+                if on_expert:
+                    await on_expert(text, tasks[task], correction)
+                # Drop experts that failed or returned no {{...}} correction
+                if correction:
+                    answers[tasks[task]] = correction
+
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            if quorum_wait is not None and answers and now - started >= quorum_wait:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+            logger.info("Proceeding without %s: no answer in time", tasks[task], extra={"provider": tasks[task]})
+            record("experts", tasks[task], abandoned=1)
+            EXPERTS_ABANDONED.inc(tasks[task])
+
+    return [(name, answers[name]) for name, _ in EXPERTS if name in answers]
+
+async def get_routed_corrections(text, quorum=None, quorum_wait=None, deadline=None, on_expert=None):
+    """Async twin of llm_integrations.get_routed_corrections: (expert corrections, fast result)."""
+    known = None
+    if fast_tier_enabled():
+        with span("routing", expert=sync.FAST_EXPERT):
+            correction = await dict(EXPERTS)[sync.FAST_EXPERT](text, timeout=remaining_time(deadline))
+            if on_expert:
+                await on_expert(text, sync.FAST_EXPERT, correction)
+            result, known = route_fast_answer(text, correction)
+        if result:
+            return [(sync.FAST_EXPERT, correction)], result
+    return await get_expert_corrections(text, quorum=quorum, quorum_wait=quorum_wait, deadline=deadline,
+                                        on_expert=on_expert, known=known), None
+
+async def resolve_corrections(text, corrections, arbiter=None, timeout=None):
+    """Reconcile expert corrections locally or with the OpenAI arbiter."""
+    if arbiter is None:
+        arbiter = sync.ARBITER_MODE
+    if resolves_locally(corrections, arbiter):
+        return vote_locally(text, corrections)
+    return await get_final_correction(text, corrections, timeout=timeout)
+
+async def get_all_corrections(text, use_cache=True, quorum=None, quorum_wait=None, timeout=None, arbiter=None,
+                              on_expert=None):
+    """Get corrections from all LLMs; the async twin of llm_integrations.get_all_corrections."""
+    use_cache = use_cache and sync.CACHE_ENABLED
+    key = pipeline_cache_key(text, arbiter=arbiter)
+    if use_cache:
+        with span("cache_lookup", cache="pipeline") as lookup:
+            cached = await cache_call(correction_cache, correction_cache.get, key)
+            lookup.set(hit=cached is not None)
+        if cached is not None:
+            record_cache("hit")
+            return cached
+
+    ran = False
+
+    def run():
+        nonlocal ran
+        ran = True
+        record_cache("miss" if use_cache else "bypass")
+        return run_pipeline(text, use_cache=use_cache, quorum=quorum, quorum_wait=quorum_wait, timeout=timeout,
+                            arbiter=arbiter, on_expert=on_expert)
+
+    if not sync.SINGLE_FLIGHT:
+        return await run()
+    try:
+        result = await single_flight.do(make_key(key, quorum, quorum_wait), run,
+                                        deadline=single_flight_deadline(timeout))
+    except SingleFlightTimeout as e:
+        logger.warning("Gave up waiting on a coalesced request: %s", e)
+        return None
+    if not ran:
+        record_cache("coalesced")
+    return result
+
+async def run_pipeline(text, use_cache=True, quorum=None, quorum_wait=None, timeout=None, arbiter=None,
+                       on_expert=None):
+    """Async twin of llm_integrations.run_pipeline."""
+    key = pipeline_cache_key(text, arbiter=arbiter)
+    timeout = timeout or sync.REQUEST_TIMEOUT
+    deadline = time.monotonic() + timeout if timeout else None
+    corrections, final_correction = await get_routed_corrections(
+        text, quorum=quorum, quorum_wait=quorum_wait, deadline=deadline, on_expert=on_expert
+    )
+
+    # If we have corrections, reconcile them locally or get final analysis from OpenAI
+    if corrections:
+        if final_correction is None:
+            final_correction = await resolve_corrections(text, corrections, arbiter=arbiter,
+                                                         timeout=remaining_time(deadline))
+        if final_correction:
+            final_correction["experts"] = [name for name, _ in corrections]
+        if final_correction and use_cache:
+            await cache_call(correction_cache, cache_result, key, corrections, final_correction, arbiter=arbiter)
+        return final_correction
+
+    return None
+
+async def gather_limited(func, items, limit=None):
+    """[await func(item) for item in items], run concurrently with at most `limit` (BATCH_WORKERS) at a time."""
+    semaphore = asyncio.Semaphore(limit or sync.BATCH_WORKERS)
+
+    async def run(item):
+        async with semaphore:
+            return await func(item)
+
+    return await asyncio.gather(*(run(item) for item in items))
+
+async def get_batch_corrections(texts, use_cache=True, timeout=None, arbiter=None, on_expert=None):
+    """Async twin of llm_integrations.get_batch_corrections: one {"result"} or {"error"} dict per text, in order.
+
+    Identical inputs are corrected once, uncached texts go through the experts
+    at most BATCH_WORKERS at a time, and the ones that still need the OpenAI
+    arbiter are packed ARBITER_BATCH_SIZE to a call.
+    """
+    if arbiter is None:
+        arbiter = sync.ARBITER_MODE
+    use_cache = use_cache and sync.CACHE_ENABLED
+    timeout = timeout or sync.REQUEST_TIMEOUT
+    deadline = time.monotonic() + timeout if timeout else None
+
+    unique = unique_texts(texts)
+    outcomes, pending = await cache_call(correction_cache, lookup_batch, unique, use_cache, arbiter)
+
+    expert_results = await gather_limited(
+        lambda item: get_routed_corrections(item[1], deadline=deadline, on_expert=on_expert), pending
+    )
+    needs_arbiter = triage_expert_results(pending, expert_results, arbiter, outcomes)
+
+    # Packed arbiter calls, falling back to concurrent single calls for anything left unanswered
+    batch_results = await gather_limited(
+        lambda chunk: get_final_corrections_batch(
+            [(text, corrections) for _, text, corrections in chunk], timeout=remaining_time(deadline)
+        ),
+        pack_arbiter_items(needs_arbiter),
+    )
+    unanswered = record_arbiter_results(needs_arbiter, [result for results in batch_results for result in results],
+                                        outcomes)
+    fallback_results = await gather_limited(
+        lambda item: get_final_correction(item[1], item[2], timeout=remaining_time(deadline)), unanswered
+    )
+    for normalized, _, _ in record_arbiter_results(unanswered, fallback_results, outcomes):
+        outcomes[normalized] = {"error": "Failed to get corrections"}
+
+    await cache_call(correction_cache, finish_batch, pending, outcomes, use_cache, arbiter)
+    # Copy per input so duplicate texts don't share mutable result dicts
+    return [copy.deepcopy(outcomes[normalize_text(text)]) for text in texts]
+
+async def get_document_corrections(text, use_cache=True, timeout=None, arbiter=None, on_expert=None):
+    """Correct a paragraph sentence by sentence; the async twin of get_document_corrections."""
+    sentences = split_sentences(text)
+    if not sync.PARAGRAPH_MODE or len(sentences) <= 1:
+        return await get_all_corrections(text, use_cache=use_cache, timeout=timeout, arbiter=arbiter,
+                                         on_expert=on_expert)
+
+    async def run():
+        outcomes = await get_batch_corrections(
+            [sentence for sentence, _, _ in sentences], use_cache=use_cache, timeout=timeout, arbiter=arbiter,
+            on_expert=on_expert
+        )
+        if not any("result" in outcome for outcome in outcomes):
+            return None
+        return stitch_document(text, sentences, outcomes)
+
+    if not sync.SINGLE_FLIGHT:
+        return await run()
+    try:
+        return await single_flight.do(make_key("document", pipeline_cache_key(text, arbiter=arbiter), use_cache),
+                                      run, deadline=single_flight_deadline(timeout))
+    except SingleFlightTimeout as e:
+        logger.warning("Gave up waiting on a coalesced request: %s", e)
+        return None
@@ -0,0 +1,252 @@
+"""Load-test a StyleCheck server and report throughput and tail latency.
+
+Drives /check, /check/batch or /check/stream with a fixed number of
+concurrent clients (closed loop) or at a fixed arrival rate (open loop).
+Point it at a running server with --url, or let it start one in-process,
+optionally on the offline mock providers:
+
+    python benchmarks/load_test.py --mock --server asgi --concurrency 50 --duration 30
+    python benchmarks/load_test.py --url http://localhost:5000 --endpoint stream --rate 5 --requests 200
+
+Besides client-side latency it reports per-stage timings: each expert's
+answer time and the wait for the final result after the last expert, as
+seen on /check/stream, plus any numeric "timings" the server includes in
+its responses.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import random
+import socket
+import argparse
+import threading
+import statistics
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+STYLECHECK_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_SENTENCES = os.path.join(STYLECHECK_ROOT, "evaluation", "data", "test_sentences.csv")
+
+ENDPOINTS = {"check": "/check", "batch": "/check/batch", "stream": "/check/stream"}
+
+def load_sentences():
+    with open(TEST_SENTENCES, newline="", encoding="utf-8") as f:
+        return [row["original"] for row in csv.DictReader(f)]
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "mean": statistics.mean(values) if values else None,
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values) if values else None,
+    }
+
+def collect_timings(stages, timings, prefix="server"):
+    """Add every numeric leaf of a response's "timings" block to stages, keyed by its path."""
+    for key, value in timings.items():
+        path = f"{prefix}.{key}"
+        if isinstance(value, dict):
+            collect_timings(stages, value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            stages.setdefault(path, []).append(value)
+
+def post(url, payload, timeout):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    return urllib.request.urlopen(request, timeout=timeout)
+
+def run_request(base_url, endpoint, texts, timeout):
+    """Send one request; returns (ok, status, seconds, stages)."""
+    stages = {}
+    started = time.perf_counter()
+    try:
+        # Ask for the server's per-request stage timings along with each result
+        if endpoint == "batch":
+            response = post(base_url + ENDPOINTS[endpoint], {"texts": texts, "timings": True}, timeout)
+        else:
+            response = post(base_url + ENDPOINTS[endpoint], {"text": texts[0], "timings": True}, timeout)
+
+        with response:
+            if endpoint != "stream":
+                parse_started = time.perf_counter()
+                data = json.loads(response.read())
+                stages.setdefault("client.json_parse", []).append(time.perf_counter() - parse_started)
+                results = data.get("results", [data])
+                if "results" in data:
+                    # /check/batch reports one timings block for the whole batch
+                    collect_timings(stages, data.get("timings") or {})
+                for result in results:
+                    collect_timings(stages, result.get("timings") or {})
+                ok = all("error" not in result for result in results)
+                return ok, response.status, time.perf_counter() - started, stages
+
+            # Server-Sent Events: time each expert's event and the final result
+            event, last_expert, ok = None, None, False
+            for raw_line in response:
+                line = raw_line.decode("utf-8").rstrip("\n")
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    now = time.perf_counter()
+                    data = json.loads(line[len("data: "):])
+                    if event == "expert":
+                        stages.setdefault(f"stream.expert.{data['name']}", []).append(now - started)
+                        last_expert = now
+                    elif event == "result":
+                        if last_expert is not None:
+                            stages.setdefault("stream.after_last_expert", []).append(now - last_expert)
+                        collect_timings(stages, data.get("timings") or {})
+                        ok = True
+                    elif event == "error":
+                        ok = False
+            return ok, response.status, time.perf_counter() - started, stages
+    except urllib.error.HTTPError as e:
+        return False, e.code, time.perf_counter() - started, stages
+    except Exception as e:
+        return False, type(e).__name__, time.perf_counter() - started, stages
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(kind):
+    """Serve app.py (Flask, threaded) or asgi_app.py (uvicorn) in a background thread; returns its URL."""
+    sys.path.insert(0, STYLECHECK_ROOT)
+    port = free_port()
+    if kind == "flask":
+        from werkzeug.serving import make_server
+        from app import app
+        server = make_server("127.0.0.1", port, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        import uvicorn
+        from asgi_app import app
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running server (default: start one in-process)")
+    parser.add_argument("--server", choices=["flask", "asgi"], default="flask", help="in-process server to start")
+    parser.add_argument("--mock", action="store_true", help="use the offline mock providers (in-process only)")
+    parser.add_argument("--endpoint", choices=list(ENDPOINTS), default="check")
+    parser.add_argument("--concurrency", type=int, default=10, help="clients sending requests back to back")
+    parser.add_argument("--rate", type=float, help="open loop: start this many requests per second instead")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to keep sending requests")
+    parser.add_argument("--requests", type=int, help="stop after this many requests instead")
+    parser.add_argument("--batch-size", type=int, default=10, help="texts per /check/batch request")
+    parser.add_argument("--unique", action="store_true", help="make every text unique so nothing is served from cache")
+    parser.add_argument("--timeout", type=float, default=120, help="per-request client timeout in seconds")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.mock:
+        os.environ["STYLECHECK_MOCK_PROVIDERS"] = "1"
+    base_url = args.url or start_server(args.server)
+    sentences = load_sentences()
+    counter = iter(range(sys.maxsize))
+    lock = threading.Lock()
+    records = []
+
+    def next_texts():
+        with lock:
+            n = next(counter)
+        count = args.batch_size if args.endpoint == "batch" else 1
+        texts = [sentences[(n * count + i) % len(sentences)] for i in range(count)]
+        if args.unique:
+            texts = [f"{text} ({n}-{i})" for i, text in enumerate(texts)]
+        return texts
+
+    def one():
+        record = run_request(base_url, args.endpoint, next_texts(), args.timeout)
+        with lock:
+            records.append(record)
+
+    claimed = iter(range(1, sys.maxsize))
+
+    def claim(started):
+        """Reserve the next request slot for a closed-loop client; False once the run is over."""
+        if args.requests:
+            with lock:
+                return next(claimed) <= args.requests
+        return time.perf_counter() - started < args.duration
+
+    print(f"Load testing {base_url}{ENDPOINTS[args.endpoint]} "
+          + (f"at {args.rate:g} req/s" if args.rate else f"with {args.concurrency} concurrent clients"))
+    started = time.perf_counter()
+    if args.rate:
+        # Open loop: Poisson arrivals, regardless of how fast responses come back
+        with ThreadPoolExecutor(max_workers=max(args.concurrency, 1)) as pool:
+            submitted = 0
+            next_at = started
+            while not (args.requests and submitted >= args.requests) and \
+                    (args.requests or time.perf_counter() - started < args.duration):
+                time.sleep(max(next_at - time.perf_counter(), 0))
+                pool.submit(one)
+                submitted += 1
+                next_at += random.expovariate(args.rate)
+    else:
+        def client():
+            while claim(started):
+                one()
+        threads = [threading.Thread(target=client) for _ in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [seconds for ok, _, seconds, _ in records if ok]
+    statuses = {}
+    stages = {}
+    for ok, status, _, request_stages in records:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        for stage, values in request_stages.items():
+            stages.setdefault(stage, []).extend(values)
+    errors = sum(1 for ok, _, _, _ in records if not ok)
+
+    results = {
+        "url": base_url + ENDPOINTS[args.endpoint],
+        "config": vars(args),
+        "requests": len(records),
+        "duration": elapsed,
+        "rps": len(records) / elapsed if elapsed else 0,
+        "error_rate": errors / len(records) if records else 0,
+        "statuses": statuses,
+        "latency": summarize(latencies),
+        "stages": {stage: summarize(values) for stage, values in sorted(stages.items())},
+    }
+
+    latency = results["latency"]
+    print(f"\nRequests: {results['requests']} in {elapsed:.1f}s ({results['rps']:.1f} req/s), "
+          f"errors: {results['error_rate']:.1%}, statuses: {statuses}")
+    if latencies:
+        print(f"Latency: p50 {latency['p50']:.3f}s  p95 {latency['p95']:.3f}s  p99 {latency['p99']:.3f}s  "
+              f"max {latency['max']:.3f}s")
+    if stages:
+        print(f"\n{'stage':40}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for stage, summary in results["stages"].items():
+            print(f"{stage:40}{summary['p50']:>10.3f}{summary['p95']:>10.3f}{summary['p99']:>10.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Performance regression suite for StyleCheck's hot paths.
+
+Times expert answer extraction, arbiter JSON handling, /check response
+assembly, readability metrics, GLEU and the end-to-end pipeline on the
+offline mock providers (with no simulated latency, so only our own
+overhead is measured). Each run is stored in a history file keyed by
+git commit, and `compare` flags benchmarks that got slower than a
+threshold:
+
+    python benchmarks/perf_suite.py run
+    python benchmarks/perf_suite.py compare --base HEAD~1 --threshold 0.2
+    python benchmarks/perf_suite.py run --compare   # run, then compare with the previous commit
+
+`compare` exits with status 1 when it finds a regression, so it can gate a deploy.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from contextlib import redirect_stdout
+
+STYLECHECK_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HISTORY = os.path.join(STYLECHECK_ROOT, "benchmarks", "perf_history.json")
+
+# Offline providers with no simulated latency, and no caching, so every
+# end-to-end iteration runs the whole pipeline
+os.environ["STYLECHECK_MOCK_PROVIDERS"] = "1"
+os.environ["STYLECHECK_MOCK_LATENCY"] = "0"
+os.environ["STYLECHECK_CACHE"] = "0"
+os.environ.pop("STYLECHECK_CACHE_DB", None)
+os.environ.pop("STYLECHECK_EXPERT_CACHE_DB", None)
+# The pipeline logs every request; keep that cost in the timings but off the terminal
+os.environ["STYLECHECK_LOG_FILE"] = os.devnull
+sys.path.insert(0, STYLECHECK_ROOT)
+sys.path.insert(0, os.path.join(STYLECHECK_ROOT, "evaluation"))
+
+SENTENCE = "She don't likes pizza no more, and her brother have never ate it neither."
+CORRECTED = "She doesn't like pizza anymore, and her brother has never eaten it either."
+EXPERT_RESPONSE = (
+    "The subject 'She' needs the third-person form 'doesn't', and 'likes' should be the base form after it. "
+    "'No more' reads better as 'anymore'. 'Have' should agree with 'her brother', 'ate' should be the past "
+    "participle 'eaten', and the double negative 'never ... neither' becomes 'either'. "
+    f"{{{{{CORRECTED}}}}}"
+)
+PARAGRAPH = " ".join([SENTENCE, "The cats is sleeping.", "Me and him went shopping.", "I has a apple."])
+
+def git(*args):
+    return subprocess.run(["git", *args], cwd=STYLECHECK_ROOT, capture_output=True, text=True).stdout.strip()
+
+def current_commit():
+    """Commit of the working tree, marked "+dirty" when it has uncommitted changes."""
+    commit = git("rev-parse", "--short", "HEAD") or "unknown"
+    return commit + "+dirty" if git("status", "--porcelain", "--", ".") else commit
+
+def time_benchmark(func, min_sample=0.05, samples=7):
+    """Seconds per call of func: median and best over `samples` timed batches of auto-sized loops."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_sample or loops >= 1_000_000:
+            break
+        loops *= 10
+
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - started) / loops)
+    return {"median": statistics.median(timings), "best": min(timings), "loops": loops, "samples": samples}
+
+def build_benchmarks():
+    """Name -> zero-argument callable for every benchmark."""
+    import llm_integrations
+    from api_responses import format_correction_result
+    from consensus import vote_corrections
+    from main import calculate_gleu, calculate_readability_metrics
+    from segmentation import split_sentences
+
+    expert_corrections = [("Mistral", CORRECTED), ("Anthropic", CORRECTED), ("Gemini", SENTENCE)]
+    arbiter_result = vote_corrections(SENTENCE, expert_corrections)
+    arbiter_result.pop("arbiter")
+    arbiter_content = json.dumps(arbiter_result)
+    chunks = [EXPERT_RESPONSE[i:i + 12] for i in range(0, len(EXPERT_RESPONSE), 12)]
+
+    def arbiter_json():
+        # What get_final_correction does with the arbiter's message content
+        final_response = json.loads(arbiter_content)
+        json.dumps(final_response, indent=2)
+
+    def response_assembly():
+        format_correction_result(json.loads(arbiter_content))
+
+    return {
+        "extract_correction": lambda: llm_integrations.extract_correction(EXPERT_RESPONSE),
+        "read_until_correction": lambda: llm_integrations.read_until_correction(iter(chunks)),
+        "arbiter_json": arbiter_json,
+        "local_vote": lambda: vote_corrections(SENTENCE, expert_corrections),
+        "response_assembly": response_assembly,
+        "split_sentences": lambda: split_sentences(PARAGRAPH),
+        "readability_metrics": lambda: calculate_readability_metrics(CORRECTED),
+        "gleu": lambda: calculate_gleu(CORRECTED, SENTENCE),
+        "pipeline_local_arbiter": lambda: llm_integrations.get_all_corrections(SENTENCE, arbiter="local"),
+        "pipeline_llm_arbiter": lambda: llm_integrations.get_all_corrections(SENTENCE, arbiter="llm"),
+        "pipeline_paragraph": lambda: llm_integrations.get_document_corrections(PARAGRAPH, arbiter="llm"),
+    }
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+def save_history(path, history):
+    with open(path, "w") as f:
+        json.dump(history, f, indent=2)
+
+def run(args):
+    benchmarks = build_benchmarks()
+    selected = args.only.split(",") if args.only else list(benchmarks)
+    results = {}
+    for name in selected:
+        # Keep anything the benchmarked code prints off the terminal
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            results[name] = time_benchmark(benchmarks[name], samples=args.samples)
+        print(f"{name:28}{results[name]['median'] * 1e6:>14.1f} us/call")
+
+    record = {
+        "commit": current_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.node(),
+        "results": results,
+    }
+    # One record per commit: re-running replaces the earlier measurement
+    history = [entry for entry in load_history(args.history) if entry["commit"] != record["commit"]]
+    history.append(record)
+    save_history(args.history, history)
+    print(f"\nRecorded {len(results)} benchmarks for {record['commit']} in {args.history}")
+
+    if args.compare:
+        args.base, args.head = None, record["commit"]
+        return compare(args)
+    return 0
+
+def find_record(history, ref):
+    """History record for a commit-ish (resolved through git), or None."""
+    commit = git("rev-parse", "--short", ref) or ref
+    # Prefer a clean run of the commit over one made with uncommitted changes on top
+    for candidate in (ref, commit, commit + "+dirty"):
+        for entry in reversed(history):
+            if entry["commit"] == candidate:
+                return entry
+    return None
+
+def parse_thresholds(values, default):
+    """--threshold 0.2 sets the default; --threshold name=0.5 sets one benchmark's."""
+    thresholds = {"*": default}
+    for value in values or []:
+        name, _, limit = value.rpartition("=")
+        thresholds[name or "*"] = float(limit)
+    return thresholds
+
+def compare(args):
+    history = load_history(args.history)
+    if not history:
+        print(f"No history in {args.history}; run the suite first")
+        return 2
+
+    head = find_record(history, args.head) if args.head else history[-1]
+    if head is None:
+        print(f"No recorded run for {args.head}")
+        return 2
+    if args.base:
+        base = find_record(history, args.base)
+    else:
+        # Latest run of a different commit
+        earlier = [entry for entry in history if entry["commit"] != head["commit"]]
+        base = earlier[-1] if earlier else None
+    if base is None:
+        print(f"No recorded run to compare {head['commit']} against")
+        return 2
+
+    thresholds = parse_thresholds(args.threshold, 0.2)
+    regressions = []
+    print(f"{'benchmark':28}{base['commit']:>14}{head['commit']:>14}{'change':>10}")
+    for name, result in head["results"].items():
+        if name not in base["results"]:
+            continue
+        before, after = base["results"][name]["median"], result["median"]
+        change = after / before - 1
+        limit = thresholds.get(name, thresholds["*"])
+        flag = "  REGRESSION" if change > limit else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:28}{before * 1e6:>11.1f} us{after * 1e6:>11.1f} us{change:>+10.0%}{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed beyond their threshold: {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="history file (JSON)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks and record them for the current commit")
+    run_parser.add_argument("--only", help="comma-separated benchmark names")
+    run_parser.add_argument("--samples", type=int, default=7, help="timed samples per benchmark")
+    run_parser.add_argument("--compare", action="store_true", help="compare with the previous commit afterwards")
+    run_parser.add_argument("--threshold", action="append", help="allowed slowdown, e.g. 0.2 or gleu=0.5")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two recorded runs")
+    compare_parser.add_argument("--base", help="baseline commit (default: latest run of another commit)")
+    compare_parser.add_argument("--head", help="commit to check (default: latest run)")
+    compare_parser.add_argument("--threshold", action="append", help="allowed slowdown, e.g. 0.2 or gleu=0.5")
+
+    args = parser.parse_args()
+    sys.exit(run(args) if args.command == "run" else compare(args))
+
+if __name__ == "__main__":
+    main()
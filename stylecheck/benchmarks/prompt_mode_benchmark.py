@@ -0,0 +1,94 @@
+"""Compare expert latency and GLEU between the full and fast expert prompt modes.
+
+Each expert corrects every sentence of evaluation/data/test_sentences.csv once
+per mode, with the memo and pipeline caches bypassed so every call reaches
+the provider. Needs the provider API keys in .env:
+
+    python benchmarks/prompt_mode_benchmark.py --limit 20 --output prompt_modes.json
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import statistics
+
+from nltk.translate.gleu_score import sentence_gleu
+
+STYLECHECK_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(STYLECHECK_ROOT)
+import llm_integrations
+
+TEST_SENTENCES = os.path.join(STYLECHECK_ROOT, "evaluation", "data", "test_sentences.csv")
+
+def calculate_gleu(reference, candidate):
+    """GLEU of candidate against reference, tokenized as in evaluation/main.py."""
+    return sentence_gleu([reference.lower().split()], candidate.lower().split())
+
+def load_sentences(limit=None):
+    with open(TEST_SENTENCES, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    return rows[:limit] if limit else rows
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def run_mode(mode, rows):
+    """Per-expert latency and GLEU for one EXPERT_MODE."""
+    llm_integrations.EXPERT_MODE = mode
+    results = {}
+    for name, func in llm_integrations.EXPERTS:
+        latencies, scores, failures = [], [], 0
+        for row in rows:
+            started = time.perf_counter()
+            correction = func(row["original"])
+            latencies.append(time.perf_counter() - started)
+            if not correction:
+                failures += 1
+            # A failed call leaves the sentence uncorrected, as in the evaluation
+            scores.append(calculate_gleu(row["ground_truth"], correction or row["original"]))
+        results[name] = {
+            "mean_latency": statistics.mean(latencies),
+            "p50_latency": percentile(latencies, 0.5),
+            "p95_latency": percentile(latencies, 0.95),
+            "gleu": statistics.mean(scores),
+            "failures": failures,
+        }
+        print(f"  {mode:5} {name:10} mean {results[name]['mean_latency']:6.2f}s  "
+              f"p95 {results[name]['p95_latency']:6.2f}s  GLEU {results[name]['gleu']:.3f}  failures {failures}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, help="only use the first N sentences")
+    parser.add_argument("--modes", default="full,fast", help="comma-separated expert modes to compare")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    # Every call must reach the provider, so skip the expert memos
+    llm_integrations.CACHE_ENABLED = False
+    rows = load_sentences(args.limit)
+    print(f"Benchmarking {len(rows)} sentences with experts: {', '.join(name for name, _ in llm_integrations.EXPERTS)}")
+
+    results = {"sentences": len(rows), "modes": {}}
+    for mode in args.modes.split(","):
+        results["modes"][mode] = run_mode(mode, rows)
+
+    modes = list(results["modes"])
+    if len(modes) == 2:
+        baseline, candidate = (results["modes"][mode] for mode in modes)
+        print(f"\n{'expert':12}{'latency change':>16}{'GLEU change':>14}")
+        for name in baseline:
+            latency = candidate[name]["mean_latency"] / baseline[name]["mean_latency"] - 1
+            gleu = candidate[name]["gleu"] - baseline[name]["gleu"]
+            print(f"{name:12}{latency:>+16.0%}{gleu:>+14.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+if __name__ == "__main__":
+    main()
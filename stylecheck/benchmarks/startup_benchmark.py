@@ -0,0 +1,106 @@
+"""Measure cold import time of StyleCheck's entry points.
+
+Each target is imported in a fresh interpreter, several times, and the median
+is reported. Pass --ref to measure a git revision side by side with the
+working tree, e.g. the commit before an import-time optimization:
+
+    python benchmarks/startup_benchmark.py --ref HEAD~1 --output startup.json
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+STYLECHECK_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, directory the script is normally run from, module to import)
+TARGETS = [
+    ("llm_integrations", ".", "llm_integrations"),
+    ("Flask app", ".", "app"),
+    ("ASGI app", ".", "asgi_app"),
+    ("evaluation main", "evaluation", "main"),
+    ("behavioral tests", os.path.join("evaluation", "behavioral_tests"), "run_tests"),
+    ("advanced behavioral tests", os.path.join("evaluation", "behavioral_tests"), "run_advanced_tests"),
+    ("GLEU visualization", "evaluation", "gleu_visualization"),
+    ("Flesch visualization", "evaluation", "flesch_visualization"),
+    ("results visualization", "evaluation", "visualize_results"),
+]
+
+IMPORT_SNIPPET = (
+    "import sys, time\n"
+    "sys.path.insert(0, '.')\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+def time_import(root, directory, module, runs):
+    """Median import time in seconds over `runs` fresh interpreters, or None if it fails."""
+    cwd = os.path.join(root, directory)
+    if not os.path.exists(os.path.join(cwd, f"{module}.py")):
+        return None
+
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", IMPORT_SNIPPET.format(module=module)],
+            cwd=cwd, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            print(f"  {module}: import failed: {result.stderr.strip().splitlines()[-1:]}")
+            return None
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+def measure(root, runs):
+    return {label: time_import(root, directory, module, runs) for label, directory, module in TARGETS}
+
+def export_revision(ref, destination):
+    """Write the stylecheck/ tree at a git revision into destination."""
+    toplevel, prefix = subprocess.run(
+        ["git", "rev-parse", "--show-toplevel", "--show-prefix"],
+        cwd=STYLECHECK_ROOT, capture_output=True, text=True, check=True,
+    ).stdout.splitlines()
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", f"{ref}:{prefix.rstrip('/')}"], cwd=toplevel, capture_output=True, check=True
+    ).stdout
+    subprocess.run(["tar", "-x", "-C", destination], input=archive, check=True)
+
+def format_seconds(value):
+    return f"{value * 1000:9.1f} ms" if value is not None else "      n/a"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per target")
+    parser.add_argument("--ref", help="git revision to compare against (e.g. HEAD~1)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {"runs": args.runs, "current": measure(STYLECHECK_ROOT, args.runs)}
+    if args.ref:
+        with tempfile.TemporaryDirectory() as directory:
+            export_revision(args.ref, directory)
+            results["ref"] = args.ref
+            results["baseline"] = measure(directory, args.runs)
+
+    print(f"\n{'target':28}{'current':>12}" + (f"{args.ref:>14}{'change':>10}" if args.ref else ""))
+    for label, _, _ in TARGETS:
+        current = results["current"][label]
+        line = f"{label:28}{format_seconds(current):>12}"
+        if args.ref:
+            baseline = results["baseline"][label]
+            line += f"{format_seconds(baseline):>14}"
+            if current and baseline:
+                line += f"{(current - baseline) / baseline:>+10.0%}"
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+if __name__ == "__main__":
+    main()
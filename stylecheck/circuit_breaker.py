@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import deque
+from logs import get_logger
+
+logger = get_logger("circuit_breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Per-provider circuit breaker over a rolling window of recent calls.
+
+    The breaker opens when, over the last `window` seconds and at least
+    `min_calls` calls, the share of failed calls reaches `error_rate` or the
+    share of calls slower than `slow_call` seconds reaches `slow_rate`. While
+    open every call is refused without touching the provider. After
+    `cooldown` seconds it goes half-open and lets a single probe call
+    through: success closes it again, failure re-opens it for another
+    cooldown.
+    """
+
+    def __init__(self, name, window=60, min_calls=5, error_rate=0.5, slow_call=20, slow_rate=0.8, cooldown=30):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.cooldown = cooldown
+        self._calls = deque()  # (finished_at, ok, latency)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def _trim(self, now):
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+
+    def _open(self, now):
+        self._state = OPEN
+        self._opened_at = now
+        self._probing = False
+        self._stats["opened"] += 1
+        logger.warning("Circuit breaker for %s opened", self.name, extra={"provider": self.name})
+
+    @property
+    def state(self):
+        """Current state; an open breaker whose cooldown has passed reports half-open."""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                return HALF_OPEN
+            return self._state
+
+    def available(self):
+        """True unless the breaker is open; unlike allow() this never claims the probe."""
+        return self.state != OPEN
+
+    def allow(self):
+        """Claim permission for one call. A caller that gets True must report back with record() or release()."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN and now - self._opened_at >= self.cooldown:
+                self._state = HALF_OPEN
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record(self, ok, latency):
+        """Report the outcome and duration in seconds of an allowed call."""
+        with self._lock:
+            now = time.monotonic()
+            self._stats["calls"] += 1
+            if not ok:
+                self._stats["failures"] += 1
+
+            if self._state == HALF_OPEN:
+                self._probing = False
+                if ok and latency < self.slow_call:
+                    logger.info("Circuit breaker for %s closed", self.name, extra={"provider": self.name})
+                    self._state = CLOSED
+                    self._calls.clear()
+                else:
+                    self._open(now)
+                return
+            if self._state == OPEN:
+                # A call that started before the breaker opened
+                return
+
+            self._calls.append((now, ok, latency))
+            self._trim(now)
+            total = len(self._calls)
+            if total < self.min_calls:
+                return
+            failures = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+            slow = sum(1 for _, _, call_latency in self._calls if call_latency >= self.slow_call)
+            if failures / total >= self.error_rate or slow / total >= self.slow_rate:
+                self._open(now)
+
+    def release(self):
+        """Give back an allowed call that was abandoned before it finished, without judging the provider."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probing = False
+
+    def stats(self):
+        """State, lifetime counters and the rolling window's error rate and latencies."""
+        state = self.state
+        with self._lock:
+            self._trim(time.monotonic())
+            stats = dict(self._stats)
+            latencies = sorted(latency for _, _, latency in self._calls)
+            failures = sum(1 for _, ok, _ in self._calls if not ok)
+        stats["state"] = state
+        stats["window_calls"] = len(latencies)
+        stats["window_error_rate"] = failures / len(latencies) if latencies else 0.0
+        stats["window_p50"] = latencies[len(latencies) // 2] if latencies else None
+        stats["window_p95"] = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] if latencies else None
+        return stats
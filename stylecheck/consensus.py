@@ -0,0 +1,129 @@
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+
+# Words (keeping contractions like "doesn't" whole) and single punctuation marks
+TOKEN_PATTERN = re.compile(r"\w+(?:['’]\w+)*|[^\w\s]")
+
+def tokenize(text):
+    """Split text into (token, start, end) triples."""
+    return [(m.group(0), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text)]
+
+def normalize_sentence(text):
+    """Whitespace-insensitive form used to compare expert outputs."""
+    return " ".join(token for token, _, _ in tokenize(text))
+
+def experts_agree(llm_corrections):
+    """True when every expert proposed the same sentence."""
+    return len({normalize_sentence(correction) for _, correction in llm_corrections}) == 1
+
+def extract_edits(original_tokens, corrected, corrected_tokens):
+    """Align a corrected sentence to the original and return its edits.
+
+    Each edit is (start, end, replacement) where start/end index original
+    tokens. Pure insertions and deletions are widened to cover a neighbouring
+    token, so every edit replaces a non-empty span of the original and reads
+    naturally as "original -> corrected".
+    """
+    matcher = SequenceMatcher(
+        None,
+        [token for token, _, _ in original_tokens],
+        [token for token, _, _ in corrected_tokens],
+        autojunk=False,
+    )
+    spans = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if i1 == i2 or j1 == j2:
+            if i1 > 0:
+                i1, j1 = i1 - 1, j1 - 1
+            elif i2 < len(original_tokens):
+                i2, j2 = i2 + 1, j2 + 1
+        if i1 == i2:
+            # Nothing in the original to anchor the edit to
+            continue
+        # Widening can make neighbouring edits overlap; merge them into one
+        if spans and i1 < spans[-1][1]:
+            prev_i1, _, prev_j1, _ = spans.pop()
+            i1, j1 = prev_i1, prev_j1
+        spans.append((i1, i2, j1, j2))
+
+    edits = []
+    for i1, i2, j1, j2 in spans:
+        replacement = corrected[corrected_tokens[j1][1]:corrected_tokens[j2 - 1][2]] if j2 > j1 else ""
+        edits.append((i1, i2, replacement))
+    return edits
+
+def edit_size(text, correction):
+    """How much correction changes text: (edits, tokens changed, share of the original's tokens replaced).
+
+    An edit's tokens changed are those of its longer side, so rewriting one
+    word as three counts as three.
+    """
+    original_tokens = tokenize(text)
+    edits = extract_edits(original_tokens, correction, tokenize(correction))
+    replaced = sum(i2 - i1 for i1, i2, _ in edits)
+    changed = sum(max(i2 - i1, len(tokenize(replacement))) for i1, i2, replacement in edits)
+    return len(edits), changed, replaced / len(original_tokens) if original_tokens else 0.0
+
+def vote_corrections(text, llm_corrections, min_votes=None):
+    """Build a final correction by majority-voting the experts' token-level edits.
+
+    Returns the same original/corrected/corrected_phrase schema as the OpenAI
+    arbiter. An edit is applied when more than half of the experts made it,
+    unless min_votes says otherwise.
+    """
+    expert_count = len(llm_corrections)
+    if min_votes is None:
+        min_votes = expert_count // 2 + 1
+
+    original_tokens = tokenize(text)
+    votes = Counter()
+    voters = {}
+    replacements = {}
+    for name, correction in llm_corrections:
+        for i1, i2, replacement in extract_edits(original_tokens, correction, tokenize(correction)):
+            key = (i1, i2, normalize_sentence(replacement))
+            votes[key] += 1
+            voters.setdefault(key, []).append(name)
+            replacements.setdefault(key, replacement)
+
+    # Highest-voted edits win; an edit overlapping one already accepted is dropped
+    accepted = []
+    for key, count in sorted(votes.items(), key=lambda item: -item[1]):
+        i1, i2, _ = key
+        if count < min_votes:
+            continue
+        if any(i1 < end and start < i2 for start, end, _ in accepted):
+            continue
+        accepted.append((i1, i2, key))
+    accepted.sort()
+
+    corrected_phrase = text
+    corrections = []
+    for i1, i2, key in reversed(accepted):
+        start, end = original_tokens[i1][1], original_tokens[i2 - 1][2]
+        corrected_phrase = corrected_phrase[:start] + replacements[key] + corrected_phrase[end:]
+    for i1, i2, key in accepted:
+        start, end = original_tokens[i1][1], original_tokens[i2 - 1][2]
+        corrections.append({
+            "original": text[start:end],
+            "corrected": replacements[key],
+            "explanation": f"{votes[key]} of {expert_count} experts ({', '.join(voters[key])}) made this change.",
+        })
+
+    if not corrections:
+        overall_explanation = "The experts found nothing that a majority agreed needed correcting."
+    elif experts_agree(llm_corrections):
+        overall_explanation = f"All {expert_count} experts proposed the same correction."
+    else:
+        overall_explanation = f"Applied the changes that a majority of the {expert_count} experts agreed on."
+
+    return {
+        "original_phrase": text,
+        "corrected_phrase": corrected_phrase,
+        "corrections": corrections,
+        "overall_explanation": overall_explanation,
+        "arbiter": "local",
+    }
@@ -0,0 +1,210 @@
+import os
+import re
+import copy
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from logs import get_logger
+
+logger = get_logger("correction_cache")
+
+def normalize_text(text):
+    """Normalize input text so trivially different submissions share a cache entry."""
+    return re.sub(r'\s+', ' ', text).strip()
+
+def make_key(*parts):
+    """Build a content-addressed cache key from JSON-serializable parts."""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class CorrectionCache:
+    """Two-tier cache: an in-memory LRU with TTL in front of an optional SQLite file.
+
+    The SQLite tier is opened in WAL mode, so several worker processes can
+    point at the same file and share entries. Entries live in a namespace,
+    which lets one database file hold several independent caches. Values are
+    copied on the way out, so callers may mutate what they get back.
+
+    An expired row is deleted when a lookup finds it, and every `prune_every`
+    writes the namespace is pruned: expired rows go, then the rows closest to
+    expiry until at most `max_rows` are left.
+    """
+
+    def __init__(self, namespace="pipeline", max_entries=1024, ttl=86400, db_path=None,
+                 max_rows=100000, prune_every=256):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.max_rows = max_rows
+        self.prune_every = prune_every
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "sets": 0, "evictions": 0, "pruned": 0}
+        if db_path:
+            self._init_db()
+
+    def _connection(self):
+        """Get this thread's SQLite connection, reopening it after a fork."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_db(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expiry ON cache (namespace, expires_at)")
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+
+        if self.db_path:
+            try:
+                row = self._connection().execute(
+                    "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning("Correction cache read error: %s", e)
+                row = None
+            if row and row[1] > now:
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                self._count("disk_hits")
+                return copy.deepcopy(value)
+            if row:
+                # Another process may have refreshed the row since, so only an expired one is deleted
+                self._delete_expired(key, now)
+
+        self._count("misses")
+        return None
+
+    def set(self, key, value, ttl=None):
+        """Store a JSON-serializable value under key in every tier, for `ttl` seconds (default: the cache's TTL)."""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._remember(key, copy.deepcopy(value), expires_at)
+        self._count("sets")
+
+        if self.db_path:
+            try:
+                with self._connection() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cache (namespace, key, value, created_at, expires_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (self.namespace, key, json.dumps(value), time.time(), expires_at),
+                    )
+            except sqlite3.Error as e:
+                logger.warning("Correction cache write error: %s", e)
+            with self._lock:
+                self._writes += 1
+                due = self._writes % self.prune_every == 0
+            if due:
+                self.prune()
+
+    def _delete_expired(self, key, now):
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                    (self.namespace, key, now),
+                )
+        except sqlite3.Error as e:
+            logger.warning("Correction cache delete error: %s", e)
+
+    def prune(self):
+        """Delete this namespace's expired SQLite rows, then the ones closest to expiry beyond max_rows."""
+        if not self.db_path:
+            return 0
+        try:
+            with self._connection() as conn:
+                deleted = conn.execute(
+                    "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?", (self.namespace, time.time())
+                ).rowcount
+                excess = conn.execute(
+                    "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+                ).fetchone()[0] - self.max_rows
+                if excess > 0:
+                    deleted += conn.execute(
+                        "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                        "SELECT key FROM cache WHERE namespace = ? ORDER BY expires_at LIMIT ?)",
+                        (self.namespace, self.namespace, excess),
+                    ).rowcount
+        except sqlite3.Error as e:
+            logger.warning("Correction cache prune error: %s", e)
+            return 0
+        with self._lock:
+            self._stats["pruned"] += deleted
+        return deleted
+
+    def _remember(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def items(self):
+        """Return (key, value) pairs for every live entry in this namespace."""
+        now = time.time()
+        with self._lock:
+            entries = {key: value for key, (value, expires_at) in self._entries.items() if expires_at > now}
+        if self.db_path:
+            rows = self._connection().execute(
+                "SELECT key, value FROM cache WHERE namespace = ? AND expires_at > ?",
+                (self.namespace, now),
+            ).fetchall()
+            for key, value in rows:
+                entries.setdefault(key, json.loads(value))
+        return [(key, copy.deepcopy(value)) for key, value in entries.items()]
+
+    def clear(self):
+        """Remove every entry in this namespace from both tiers."""
+        with self._lock:
+            self._entries.clear()
+        if self.db_path:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def stats(self):
+        """Return hit/miss counters and the current in-memory size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["namespace"] = self.namespace
+        stats["persistent"] = bool(self.db_path)
+        return stats
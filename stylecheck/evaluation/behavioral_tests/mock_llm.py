@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Runs the StyleCheck pipeline against the offline mock providers, so the
+# behavioral suites need no API keys or network. Mock settings (latency,
+# error rates, ...) can still be set through STYLECHECK_MOCK_* variables.
+STYLECHECK_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(STYLECHECK_ROOT)
+os.environ["STYLECHECK_MOCK_PROVIDERS"] = "1"
+os.environ.setdefault("STYLECHECK_MOCK_LATENCY", "0")
+from llm_integrations import get_all_corrections
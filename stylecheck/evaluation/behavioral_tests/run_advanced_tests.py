@@ -2,8 +2,6 @@ import os
 import json
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.metrics import f1_score, precision_score, recall_score
 from test_suite import BehavioralTestSuite
 from mock_llm import get_all_corrections
@@ -57,6 +55,10 @@ def calculate_metrics(results):
 
 def create_metrics_visualization(metrics, family_results, output_dir):
     """Create visualization for precision, recall, and F1 scores"""
+    # Plotting libraries are slow to import, so only load them when charts are drawn
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
     # Overall metrics plot
     plt.figure(figsize=(10, 6))
     metrics_data = pd.DataFrame({
@@ -116,6 +118,9 @@ def create_metrics_visualization(metrics, family_results, output_dir):
 
 def create_family_visualizations(family_results, output_dir):
     """Create visualizations for test family results"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
     # Set style
     sns.set_theme(style="whitegrid")
     colors = ["#2ecc71", "#e74c3c"]  # Green for pass, Red for fail
@@ -1,9 +1,6 @@
 import os
 import sys
 import json
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from test_suite import BehavioralTestSuite
 sys.path.append('../..')
 from llm_integrations import get_all_corrections
@@ -17,6 +14,11 @@ def create_model_corrector():
 
 def create_visualizations(results, output_dir):
     """Create visualizations for test results"""
+    # Plotting libraries are slow to import, so only load them when charts are drawn
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
     # Set style
     sns.set_theme(style="whitegrid")
     colors = ["#2ecc71", "#e74c3c"]
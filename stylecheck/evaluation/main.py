@@ -1,6 +1,4 @@
 import pandas as pd
-from transformers import T5ForConditionalGeneration, T5Tokenizer
-import torch
 from nltk.translate.gleu_score import sentence_gleu
 import re
 from models.stylecheck_eval import StyleCheckEvaluator
@@ -10,14 +8,33 @@ import numpy as np
 import os
 import textstat
 
+def calculate_gleu(reference, candidate):
+    """Calculate GLEU score between reference and candidate sentence"""
+    reference_tokens = reference.lower().split()
+    candidate_tokens = candidate.lower().split()
+    return sentence_gleu([reference_tokens], candidate_tokens)
+
+def calculate_readability_metrics(text):
+    """Calculate various readability metrics"""
+    metrics = {
+        'flesch_kincaid_grade': textstat.flesch_kincaid_grade(text),
+        'flesch_reading_ease': textstat.flesch_reading_ease(text),
+        'gunning_fog': textstat.gunning_fog(text),
+        'smog_index': textstat.smog_index(text),
+        'automated_readability_index': textstat.automated_readability_index(text),
+        'coleman_liau_index': textstat.coleman_liau_index(text),
+        'linsear_write_formula': textstat.linsear_write_formula(text),
+        'dale_chall_readability_score': textstat.dale_chall_readability_score(text)
+    }
+    return metrics
+
 class GrammarEvaluator:
     def __init__(self):
         print("Initializing evaluation system...")
         
-        # Initialize T5
-        print("Loading T5 model...")
-        self.t5_tokenizer = T5Tokenizer.from_pretrained('t5-base')
-        self.t5_model = T5ForConditionalGeneration.from_pretrained('t5-base')
+        # T5 (and torch/transformers) are loaded on first use, see load_t5
+        self.t5_tokenizer = None
+        self.t5_model = None
         
         # Initialize StyleCheck
         print("Initializing StyleCheck...")
@@ -34,9 +51,20 @@ class GrammarEvaluator:
         df = pd.read_csv('evaluation/data/test_sentences.csv')
         return df
     
+    def load_t5(self):
+        """Import torch/transformers and load T5 the first time it is needed"""
+        if self.t5_model is None:
+            from transformers import T5ForConditionalGeneration, T5Tokenizer
+            print("Loading T5 model...")
+            self.t5_tokenizer = T5Tokenizer.from_pretrained('t5-base')
+            self.t5_model = T5ForConditionalGeneration.from_pretrained('t5-base')
+        return self.t5_tokenizer, self.t5_model
+    
     def get_t5_correction(self, text):
         """Get correction from T5 model"""
         try:
+            import torch
+            self.load_t5()
             device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
             self.t5_model.to(device)
             
@@ -64,23 +92,11 @@ class GrammarEvaluator:
     
     def calculate_gleu(self, reference, candidate):
         """Calculate GLEU score between reference and candidate sentence"""
-        reference_tokens = reference.lower().split()
-        candidate_tokens = candidate.lower().split()
-        return sentence_gleu([reference_tokens], candidate_tokens)
+        return calculate_gleu(reference, candidate)
     
     def calculate_readability_metrics(self, text):
         """Calculate various readability metrics"""
-        metrics = {
-            'flesch_kincaid_grade': textstat.flesch_kincaid_grade(text),
-            'flesch_reading_ease': textstat.flesch_reading_ease(text),
-            'gunning_fog': textstat.gunning_fog(text),
-            'smog_index': textstat.smog_index(text),
-            'automated_readability_index': textstat.automated_readability_index(text),
-            'coleman_liau_index': textstat.coleman_liau_index(text),
-            'linsear_write_formula': textstat.linsear_write_formula(text),
-            'dale_chall_readability_score': textstat.dale_chall_readability_score(text)
-        }
-        return metrics
+        return calculate_readability_metrics(text)
     
     def evaluate_corrections(self):
         """Run evaluation on test cases"""
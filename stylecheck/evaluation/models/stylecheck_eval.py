@@ -1,6 +1,11 @@
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+STYLECHECK_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(STYLECHECK_ROOT)
+# Persist only the expert memos so re-runs don't pay for the same expert answers again.
+# The whole-pipeline cache stays in memory: a persisted final result would skip the
+# arbiter and pipeline entirely, and the evaluation would score a stale answer.
+os.environ.setdefault("STYLECHECK_EXPERT_CACHE_DB", os.path.join(STYLECHECK_ROOT, "cache", "evaluation.sqlite3"))
 from llm_integrations import get_all_corrections
 
 class StyleCheckEvaluator:
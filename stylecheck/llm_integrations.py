@@ -1,15 +1,411 @@
 import os
-from mistralai import Mistral
-import anthropic
-import google.generativeai as genai
-from openai import OpenAI
 from dotenv import load_dotenv
+from provider_clients import get_mistral_client, get_anthropic_client, get_openai_client, get_gemini_model, mock_enabled
+from correction_cache import CorrectionCache, normalize_text, make_key
+from consensus import experts_agree, vote_corrections, edit_size
+from circuit_breaker import CircuitBreaker
+from single_flight import SingleFlight, SingleFlightTimeout
+from rate_limiter import RateLimiter, RateLimitTimeout, estimate_tokens, is_transient, retry_after, backoff_delay, status_code
+from segmentation import split_sentences
+from stage_timings import record, record_cache, bind_context, timed_stage, track_timings, usage_counts
+from tracing import span, traced, annotate, start_trace
+from logs import get_logger, log_payload
+from metrics import registry, PROVIDER_CALL_SECONDS, PROVIDER_ERRORS, PROVIDER_SKIPS, EXPERTS_ABANDONED, ARBITER_JSON_ERRORS, ROUTED, error_kind
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import copy
+import functools
+import hashlib
+import queue
+import threading
+import time
 import re
 import json
 
 # Load environment variables
 load_dotenv()
 
+logger = get_logger("llm_integrations")
+
+MISTRAL_MODEL = "mistral-large-latest"
+ANTHROPIC_MODEL = "claude-3-haiku-20240307"
+GEMINI_MODEL = "gemini-1.5-flash"
+OPENAI_MODEL = "gpt-4o-mini"
+
+GEMINI_GENERATION_CONFIG = {
+    "temperature": 0.1,
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 8192,
+    "response_mime_type": "text/plain",
+}
+
+# Bump when a change alters corrections without touching the prompts or models,
+# so cached pipeline results from the old behaviour are not served.
+PROMPT_VERSION = "1"
+
+EXPERT_SYSTEM_PROMPT = """Given a sentence, your task is to help correct it's grammar and style. First, think about how to correct it and then return the final corrected sentence within double curly braces.
+
+Example Input: She don't likes pizza no more.
+Your output: Reasoning followed by {{She doesn't like pizza anymore.}}"""
+
+# Answer-only variant for fast mode: no reasoning to generate before the answer
+EXPERT_FAST_SYSTEM_PROMPT = """Given a sentence, correct its grammar and style. Reply with only the corrected sentence within double curly braces and nothing else. If the sentence is already correct, return it unchanged.
+
+Example Input: She don't likes pizza no more.
+Your output: {{She doesn't like pizza anymore.}}"""
+
+# Expert prompt mode. "full" asks each expert to reason before answering;
+# "fast" uses the answer-only prompt with an output budget scaled to the
+# sentence, trading the experts' reasoning (which only the arbiter reads) for
+# latency. Explanations shown to the user still come from the arbiter.
+EXPERT_PROMPTS = {"full": EXPERT_SYSTEM_PROMPT, "fast": EXPERT_FAST_SYSTEM_PROMPT}
+EXPERT_MODE = os.getenv("STYLECHECK_EXPERT_MODE", "full")
+
+# Expert answers are streamed and the stream is closed as soon as the {{...}}
+# correction is complete. "}}" is also sent as a stop sequence, so providers
+# stop generating right there. STYLECHECK_EXPERT_STREAMING=0 waits for whole
+# responses instead.
+EXPERT_STREAMING = os.getenv("STYLECHECK_EXPERT_STREAMING", "1") != "0"
+STOP_SEQUENCE = "}}"
+
+ARBITER_SYSTEM_PROMPT = "Review and correct grammar or style issues found in an English sentence, considering reasoning and corrections proposed by multiple language experts. Return a final response in JSON format, with details for each specific correction.\n\n# Output Format\nThe output should be a JSON array where each element contains a structured JSON object with the following fields:\n- `\"original\"`: The incorrect word or phrase.\n- `\"corrected\"`: The corrected version of the word or phrase.\n- `\"explanation\"`: The reasoning behind the correction based on the experts' analysis.\n\nFor the entire sentence, include additional fields summarizing the final correction:\n- `\"original_phrase\"`: The original input sentence.\n- `\"corrected_phrase\"`: The corrected version of the entire sentence with all corrections applied.\n- `\"overall_explanation\"`: A summary of the reasoning behind the final corrected phrase.\n"
+
+# Used when several sentences are packed into one arbiter call
+ARBITER_BATCH_SYSTEM_PROMPT = ARBITER_SYSTEM_PROMPT + "\n# Multiple Sentences\nYou may receive several numbered sentences, each with its own expert corrections. Review each one independently and return a JSON object of the form {\"results\": [...]} with exactly one element per sentence, in the same order. Each element must contain `\"index\"` (the sentence number), `\"original_phrase\"`, `\"corrected_phrase\"`, `\"overall_explanation\"` and `\"corrections\"`, a list of the per-correction objects described above.\n"
+
+# Experts to query, e.g. STYLECHECK_EXPERTS=Anthropic,Gemini. A disabled
+# expert's SDK is never imported.
+ENABLED_EXPERTS = [name.strip() for name in os.getenv("STYLECHECK_EXPERTS", "Mistral,Anthropic,Gemini").split(",")]
+
+# Expert calls are network-bound, so fan them out over a shared, bounded pool.
+# Set STYLECHECK_CONCURRENT_EXPERTS=0 to fall back to sequential calls.
+CONCURRENT_EXPERTS = os.getenv("STYLECHECK_CONCURRENT_EXPERTS", "1") != "0"
+EXPERT_WORKERS = int(os.getenv("STYLECHECK_EXPERT_WORKERS", "96"))
+_expert_pool = ThreadPoolExecutor(max_workers=EXPERT_WORKERS, thread_name_prefix="stylecheck-expert")
+
+# Quorum mode: go to the arbiter once EXPERT_QUORUM experts have answered, or once
+# QUORUM_WAIT seconds have passed with at least one answer. REQUEST_TIMEOUT is the
+# overall per-request budget; what is left of it is passed to every provider call.
+EXPERT_QUORUM = int(os.getenv("STYLECHECK_EXPERT_QUORUM", "3"))
+QUORUM_WAIT = float(os.getenv("STYLECHECK_QUORUM_WAIT", "0")) or None
+REQUEST_TIMEOUT = float(os.getenv("STYLECHECK_REQUEST_TIMEOUT", "60")) or None
+
+# Batch mode: how many of one request's sentences run through the experts at
+# once, and how many share a single packed arbiter call. The sentence workers
+# come from a pool shared by all requests (BATCH_POOL_WORKERS), kept separate
+# from the expert pool, whose workers they wait on. Both pools only hold threads
+# waiting on the network, so they are sized for many requests in flight.
+BATCH_WORKERS = int(os.getenv("STYLECHECK_BATCH_WORKERS", "8"))
+BATCH_POOL_WORKERS = int(os.getenv("STYLECHECK_BATCH_POOL_WORKERS", "32"))
+ARBITER_BATCH_SIZE = int(os.getenv("STYLECHECK_ARBITER_BATCH_SIZE", "8"))
+_batch_pool = ThreadPoolExecutor(max_workers=BATCH_POOL_WORKERS, thread_name_prefix="stylecheck-batch")
+
+def batch_map(func, items, limit=None):
+    """[func(item) for item in items] on the shared batch pool, at most `limit` (BATCH_WORKERS) at a time.
+
+    func runs in the caller's context, so its timings and traces belong to the calling request.
+    """
+    slots = threading.BoundedSemaphore(limit or BATCH_WORKERS)
+    bound = bind_context(func)
+
+    def run(item):
+        try:
+            return bound(item)
+        finally:
+            slots.release()
+
+    futures = []
+    for item in items:
+        slots.acquire()
+        futures.append(_batch_pool.submit(run, item))
+    return [future.result() for future in futures]
+
+# Paragraph mode: multi-sentence input is split and corrected sentence by sentence
+PARAGRAPH_MODE = os.getenv("STYLECHECK_PARAGRAPH_MODE", "1") != "0"
+
+# How expert corrections are reconciled: "llm" always asks the OpenAI arbiter,
+# "local" always majority-votes edits locally, and "auto" skips the arbiter
+# when at least two experts agree unanimously.
+ARBITER_MODE = os.getenv("STYLECHECK_ARBITER", "auto")
+
+# Tiered routing: with STYLECHECK_ROUTING=tiered a sentence first goes to
+# FAST_EXPERT alone, and its answer is used as is (edits applied locally)
+# unless it needs a second opinion: no usable answer, more than ESCALATE_CHANGE
+# of the sentence's tokens (and at least ESCALATE_MIN_TOKENS of them) rewritten,
+# or more than ESCALATE_EDITS separate edits. Those sentences escalate to the other experts and the arbiter, reusing
+# the fast answer. "full" sends every sentence through all experts.
+ROUTING_MODE = os.getenv("STYLECHECK_ROUTING", "full")
+FAST_EXPERT = os.getenv("STYLECHECK_FAST_EXPERT", "Gemini")
+ESCALATE_CHANGE = float(os.getenv("STYLECHECK_ESCALATE_CHANGE", "0.2"))
+ESCALATE_MIN_TOKENS = int(os.getenv("STYLECHECK_ESCALATE_MIN_TOKENS", "2"))
+ESCALATE_EDITS = int(os.getenv("STYLECHECK_ESCALATE_EDITS", "2"))
+
+# Cache of final pipeline results. STYLECHECK_CACHE_DB adds a SQLite tier that
+# gunicorn workers on the same host can share; STYLECHECK_CACHE=0 disables it.
+CACHE_ENABLED = os.getenv("STYLECHECK_CACHE", "1") != "0"
+correction_cache = CorrectionCache(
+    namespace="pipeline",
+    max_entries=int(os.getenv("STYLECHECK_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("STYLECHECK_CACHE_TTL", "86400")),
+    db_path=os.getenv("STYLECHECK_CACHE_DB") or None,
+    max_rows=int(os.getenv("STYLECHECK_CACHE_DB_ROWS", "100000")),
+)
+# Degraded results (an expert missing through quorum, deadline or breaker, or the
+# arbiter replaced by local voting) are only kept this long, so the full answer is
+# fetched again once the providers recover. 0 = do not cache them at all.
+DEGRADED_CACHE_TTL = float(os.getenv("STYLECHECK_DEGRADED_CACHE_TTL", "60"))
+
+# Concurrent requests for the same text share one pipeline run.
+# STYLECHECK_SINGLE_FLIGHT_LOCKS names a directory for per-text lock files, so
+# worker processes also wait for each other and pick the result up from the
+# shared STYLECHECK_CACHE_DB. STYLECHECK_SINGLE_FLIGHT=0 disables coalescing.
+SINGLE_FLIGHT = os.getenv("STYLECHECK_SINGLE_FLIGHT", "1") != "0"
+single_flight = SingleFlight(lock_dir=os.getenv("STYLECHECK_SINGLE_FLIGHT_LOCKS") or None)
+
+# Per-expert memo of extracted {{...}} corrections, one namespace per provider,
+# so arbiter-only changes and evaluation re-runs reuse paid expert answers.
+EXPERT_CACHE_TTL = float(os.getenv("STYLECHECK_EXPERT_CACHE_TTL", "604800"))
+expert_caches = {}
+expert_memos = {}
+
+# Per-provider circuit breakers: a provider failing (or timing out) on most
+# recent calls is skipped outright for a cooldown, then probed with a single
+# call. STYLECHECK_BREAKER=0 disables them.
+BREAKER_ENABLED = os.getenv("STYLECHECK_BREAKER", "1") != "0"
+breakers = {
+    name: CircuitBreaker(
+        name,
+        window=float(os.getenv("STYLECHECK_BREAKER_WINDOW", "60")),
+        min_calls=int(os.getenv("STYLECHECK_BREAKER_MIN_CALLS", "5")),
+        error_rate=float(os.getenv("STYLECHECK_BREAKER_ERROR_RATE", "0.5")),
+        slow_call=float(os.getenv("STYLECHECK_BREAKER_SLOW_CALL", "20")),
+        cooldown=float(os.getenv("STYLECHECK_BREAKER_COOLDOWN", "30")),
+    )
+    for name in ["Mistral", "Anthropic", "Gemini", "OpenAI"]
+}
+
+# Client-side rate limits per provider, e.g. STYLECHECK_OPENAI_RPM=500 and
+# STYLECHECK_OPENAI_TPM=200000 (0 = unlimited). Calls over the limit queue in
+# arrival order for up to STYLECHECK_RATE_LIMIT_WAIT seconds. Transient
+# 429/5xx errors are retried up to STYLECHECK_RETRIES times with jittered
+# exponential backoff, within the request's time budget.
+rate_limiters = {
+    name: RateLimiter(
+        name,
+        requests_per_minute=float(os.getenv(f"STYLECHECK_{name.upper()}_RPM", "0")),
+        tokens_per_minute=float(os.getenv(f"STYLECHECK_{name.upper()}_TPM", "0")),
+        max_wait=float(os.getenv("STYLECHECK_RATE_LIMIT_WAIT", "10")),
+    )
+    for name in ["Mistral", "Anthropic", "Gemini", "OpenAI"]
+}
+MAX_RETRIES = int(os.getenv("STYLECHECK_RETRIES", "2"))
+RETRY_BASE = float(os.getenv("STYLECHECK_RETRY_BASE", "0.5"))
+RETRY_MAX = float(os.getenv("STYLECHECK_RETRY_MAX", "8"))
+
+# Section of the per-request timings each provider's calls are recorded under
+PROVIDER_STAGES = {"Mistral": "experts", "Anthropic": "experts", "Gemini": "experts", "OpenAI": "arbiter"}
+
+def expert_system_prompt():
+    """System prompt for the current EXPERT_MODE."""
+    return EXPERT_PROMPTS[EXPERT_MODE]
+
+def expert_output_budget(text):
+    """Max output tokens for an expert answer in fast mode (None in full mode).
+
+    A corrected sentence is about as long as the input, and English averages
+    about four characters a token, so half the character count leaves ample room.
+    """
+    if EXPERT_MODE != "fast":
+        return None
+    return len(text) // 2 + 32
+
+def backend_model(model):
+    """Model name for cache keys; mock answers never share entries with real ones."""
+    return f"{model}@mock" if mock_enabled() else model
+
+def prompt_hash(prompt):
+    """Short, stable fingerprint of a system prompt."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+class ExpertMemo:
+    """One provider's memoized corrections, keyed by model, system-prompt hash and sentence.
+
+    The prompt is the one for the current EXPERT_MODE, so fast and full mode
+    answers are memoized separately.
+    """
+
+    def __init__(self, name, model):
+        self.name = name
+        self.model = model
+        self.cache = expert_caches[name] = CorrectionCache(
+            namespace=f"expert:{name}",
+            max_entries=int(os.getenv("STYLECHECK_CACHE_SIZE", "1024")),
+            ttl=EXPERT_CACHE_TTL,
+            db_path=os.getenv("STYLECHECK_EXPERT_CACHE_DB") or os.getenv("STYLECHECK_CACHE_DB") or None,
+            max_rows=int(os.getenv("STYLECHECK_CACHE_DB_ROWS", "100000")),
+        )
+
+    @property
+    def prompt_hash(self):
+        return prompt_hash(expert_system_prompt())
+
+    def key(self, sentence):
+        return make_key(self.name, backend_model(self.model), self.prompt_hash, sentence)
+
+    def get(self, text):
+        """Return the memoized correction for text, or None."""
+        entry = self.cache.get(self.key(normalize_text(text)))
+        return entry["correction"] if entry else None
+
+    def set(self, text, correction):
+        sentence = normalize_text(text)
+        self.cache.set(self.key(sentence), {
+            "provider": self.name,
+            "model": self.model,
+            "prompt_hash": self.prompt_hash,
+            "sentence": sentence,
+            "correction": correction,
+        })
+
+def memoize_expert(name, model):
+    """Memoize an expert's extracted correction by provider, model, prompt hash and sentence."""
+    memo = expert_memos[name] = ExpertMemo(name, model)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(text, timeout=None):
+            if not CACHE_ENABLED:
+                return func(text, timeout=timeout)
+            cached = memo.get(text)
+            if cached is not None:
+                record("experts", name, memo_hits=1)
+                annotate(memo_hit=True)
+                return cached
+
+            correction = func(text, timeout=timeout)
+            if correction:
+                memo.set(text, correction)
+            return correction
+        return wrapper
+    return decorator
+
+def call_succeeded(result):
+    """Provider calls report failure as None, or a list of Nones for batched calls."""
+    if isinstance(result, list):
+        return any(item is not None for item in result)
+    return result is not None
+
+def guard_provider(name, rejected=lambda *args, **kwargs: None):
+    """Route calls to a provider through its circuit breaker.
+
+    While the breaker is open the call is skipped and `rejected(*args, **kwargs)`
+    is returned instead, without waiting on the provider.
+    """
+    breaker = breakers[name]
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not BREAKER_ENABLED:
+                return func(*args, **kwargs)
+            if not breaker.allow():
+                logger.warning("Skipping %s: circuit breaker is open", name, extra={"provider": name})
+                record(PROVIDER_STAGES[name], name, breaker_skips=1)
+                PROVIDER_SKIPS.inc(name)
+                annotate(breaker="open")
+                return rejected(*args, **kwargs)
+            started = time.monotonic()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                breaker.record(False, time.monotonic() - started)
+                raise
+            breaker.record(call_succeeded(result), time.monotonic() - started)
+            return result
+        return wrapper
+    return decorator
+
+def arbiter_available():
+    """False while the OpenAI arbiter's circuit breaker is open."""
+    return not BREAKER_ENABLED or breakers["OpenAI"].available()
+
+def get_provider_health():
+    """Circuit breaker and rate limiter state for every provider."""
+    return {
+        name: {**breaker.stats(), "rate_limit": rate_limiters[name].stats()}
+        for name, breaker in breakers.items()
+    }
+
+def retry_delay(name, error, attempt, deadline):
+    """Seconds to wait before retrying a failed provider call, or None to give up."""
+    if attempt >= MAX_RETRIES or not is_transient(error):
+        return None
+    delay = retry_after(error) or backoff_delay(attempt, RETRY_BASE, RETRY_MAX)
+    if deadline is not None and time.monotonic() + delay >= deadline:
+        return None
+    logger.warning("%s returned %s, retrying in %.1fs", name, status_code(error), delay, extra={"provider": name})
+    record(PROVIDER_STAGES[name], name, retries=1)
+    return delay
+
+def record_usage(name, usage):
+    """Add the token counts of a provider SDK's usage object to the current request's timings and span."""
+    counts = usage_counts(usage)
+    record(PROVIDER_STAGES[name], name, **counts)
+    annotate(**counts)
+
+def record_call_failure(name, error, seconds):
+    """Count a failed provider call attempt in the /metrics error counters and latency histogram."""
+    kind = error_kind(error)
+    PROVIDER_ERRORS.inc(name, kind)
+    PROVIDER_CALL_SECONDS.observe(seconds, name, kind)
+
+def call_provider(name, request, tokens=1, timeout=None):
+    """Call request(timeout) once the provider's rate limiter admits it, retrying transient errors.
+
+    `timeout` is the time left for the whole call; each attempt gets what remains.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    attempt = 0
+    while True:
+        queued = time.monotonic()
+        try:
+            rate_limiters[name].acquire(tokens, timeout=remaining_time(deadline))
+        except RateLimitTimeout as e:
+            record_call_failure(name, e, 0)
+            raise
+        waited = time.monotonic() - queued
+        record(PROVIDER_STAGES[name], name, rate_limit_wait=waited)
+        started = time.monotonic()
+        try:
+            with span("provider_call", provider=name, attempt=attempt + 1, rate_limit_wait=waited):
+                response = request(remaining_time(deadline))
+        except Exception as e:
+            record_call_failure(name, e, time.monotonic() - started)
+            delay = retry_delay(name, e, attempt, deadline)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            attempt += 1
+            continue
+        PROVIDER_CALL_SECONDS.observe(time.monotonic() - started, name, "ok")
+        return response
+
+def get_expert_cache_entries(name):
+    """List the memoized corrections stored for one expert provider."""
+    return [entry for _, entry in expert_caches[name].items()]
+
+def invalidate_expert_cache(name=None):
+    """Forget memoized corrections for one expert provider, or for all of them."""
+    names = [name] if name else list(expert_caches)
+    for cache_name in names:
+        expert_caches[cache_name].clear()
+
+def remaining_time(deadline):
+    """Seconds left before a time.monotonic() deadline, or None without one."""
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.1)
+
 def extract_correction(response_text):
     """Extract the corrected sentence from within double curly braces."""
     match = re.search(r'\{\{(.*?)\}\}', response_text)
@@ -17,143 +413,814 @@ def extract_correction(response_text):
         return match.group(1).strip()
     return None
 
-def get_mistral_correction(text):
+def read_until_correction(chunks):
+    """Read streamed text chunks until the first {{...}} correction is complete; returns the text read.
+
+    Stops consuming as soon as a closing "}}" completes a correction, so the
+    caller can close the stream instead of waiting for the rest of the answer.
+    """
+    response_text = ""
+    for chunk in chunks:
+        scanned = len(response_text)
+        response_text += chunk
+        # Only look for "}}" in the new text (and one character before it, for a split pair)
+        if "}}" in response_text[max(scanned - 1, 0):] and extract_correction(response_text):
+            break
+    return response_text
+
+def mistral_chunks(stream):
+    """Text chunks of a Mistral chat stream; a stop on the stop sequence gives the "}}" back."""
+    for event in stream:
+        # Usage arrives once, on the final event
+        if getattr(event.data, "usage", None):
+            record_usage("Mistral", event.data.usage)
+        choice = event.data.choices[0]
+        if isinstance(choice.delta.content, str):
+            yield choice.delta.content
+        if choice.finish_reason == "stop":
+            yield STOP_SEQUENCE
+
+def anthropic_chunks(stream):
+    """Text chunks of an Anthropic message stream; a stop on the stop sequence gives the "}}" back."""
+    yield from stream.text_stream
+    if stream.current_message_snapshot.stop_reason == "stop_sequence":
+        yield STOP_SEQUENCE
+
+def gemini_chunk_text(chunk):
+    """Text of one Gemini stream chunk, plus "}}" if generation stopped there."""
+    if not chunk.candidates:
+        return ""
+    candidate = chunk.candidates[0]
+    text = "".join(getattr(part, "text", "") for part in candidate.content.parts)
+    if getattr(candidate.finish_reason, "name", None) == "STOP":
+        text += STOP_SEQUENCE
+    return text
+
+def gemini_chunks(response):
+    """Text chunks of a streamed Gemini response."""
+    for chunk in response:
+        yield gemini_chunk_text(chunk)
+
+@traced("expert", provider="Mistral", model=MISTRAL_MODEL)
+@timed_stage("experts", "Mistral")
+@memoize_expert("Mistral", MISTRAL_MODEL)
+@guard_provider("Mistral")
+def get_mistral_correction(text, timeout=None):
     """Get correction from Mistral AI."""
     try:
-        client = Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
-        chat_response = client.chat.complete(
-            model="mistral-large-latest",
-            messages=[
-                {
-                    "role": "system",
-                    "content": """Given a sentence, your task is to help correct it's grammar and style. First, think about how to correct it and then return the final corrected sentence within double curly braces.
+        client = get_mistral_client()
+        system_prompt = expert_system_prompt()
+        max_tokens = expert_output_budget(text)
+        messages = [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": f"Sentence: {text}"
+            }
+        ]
 
-Example Input: She don't likes pizza no more.
-Your output: Reasoning followed by {{She doesn't like pizza anymore.}}"""
-                },
-                {
-                    "role": "user",
-                    "content": f"Sentence: {text}"
-                }
-            ]
-        )
-        response_text = chat_response.choices[0].message.content
-        print(f"Mistral Response: {response_text}")
-        return extract_correction(response_text)
+        def request(timeout):
+            request_options = {"timeout_ms": int(timeout * 1000)} if timeout else {}
+            if max_tokens:
+                request_options["max_tokens"] = max_tokens
+            if not EXPERT_STREAMING:
+                chat_response = client.chat.complete(model=MISTRAL_MODEL, messages=messages, **request_options)
+                record_usage("Mistral", chat_response.usage)
+                return chat_response.choices[0].message.content
+            with client.chat.stream(model=MISTRAL_MODEL, messages=messages, stop=[STOP_SEQUENCE],
+                                    **request_options) as stream:
+                return read_until_correction(mistral_chunks(stream))
+
+        response_text = call_provider("Mistral", request, estimate_tokens(system_prompt, text), timeout)
+        log_payload(logger, "Mistral response", provider="Mistral", response=response_text)
+        with span("extract_correction"):
+            return extract_correction(response_text)
     except Exception as e:
-        print(f"Error with Mistral AI: {str(e)}")
+        logger.warning("Error with Mistral AI: %s", e, extra={"provider": "Mistral"})
         return None
 
-def get_anthropic_correction(text):
+@traced("expert", provider="Anthropic", model=ANTHROPIC_MODEL)
+@timed_stage("experts", "Anthropic")
+@memoize_expert("Anthropic", ANTHROPIC_MODEL)
+@guard_provider("Anthropic")
+def get_anthropic_correction(text, timeout=None):
     """Get correction from Anthropic's Claude."""
     try:
-        client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        message = client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=2808,
-            temperature=0.1,
-            system="Given a sentence, your task is to help correct it's grammar and style. First, think about how to correct it and then return the final corrected sentence within double curly braces.\n\nExample Input: She don't likes pizza no more.\nYour output: Reasoning followed by {{She doesn't like pizza anymore.}}",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"Sentence: {text}"
-                        }
-                    ]
-                }
-            ]
-        )
-        response_text = message.content[0].text
-        print(f"Anthropic Response: {response_text}")
-        return extract_correction(response_text)
+        client = get_anthropic_client()
+        system_prompt = expert_system_prompt()
+
+        def request(timeout):
+            request_options = {"timeout": timeout} if timeout else {}
+            params = dict(
+                model=ANTHROPIC_MODEL,
+                max_tokens=expert_output_budget(text) or 2808,
+                temperature=0.1,
+                system=system_prompt,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": f"Sentence: {text}"
+                            }
+                        ]
+                    }
+                ],
+                **request_options
+            )
+            if not EXPERT_STREAMING:
+                message = client.messages.create(**params)
+                record_usage("Anthropic", message.usage)
+                return message.content[0].text
+            with client.messages.stream(stop_sequences=[STOP_SEQUENCE], **params) as stream:
+                response_text = read_until_correction(anthropic_chunks(stream))
+                record_usage("Anthropic", stream.current_message_snapshot.usage)
+                return response_text
+
+        response_text = call_provider("Anthropic", request, estimate_tokens(system_prompt, text), timeout)
+        log_payload(logger, "Anthropic response", provider="Anthropic", response=response_text)
+        with span("extract_correction"):
+            return extract_correction(response_text)
     except Exception as e:
-        print(f"Error with Anthropic: {str(e)}")
+        logger.warning("Error with Anthropic: %s", e, extra={"provider": "Anthropic"})
         return None
 
-def get_gemini_correction(text):
+@traced("expert", provider="Gemini", model=GEMINI_MODEL)
+@timed_stage("experts", "Gemini")
+@memoize_expert("Gemini", GEMINI_MODEL)
+@guard_provider("Gemini")
+def get_gemini_correction(text, timeout=None):
     """Get correction from Google's Gemini."""
     try:
-        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-        
-        generation_config = {
-            "temperature": 0.1,
-            "top_p": 0.95,
-            "top_k": 40,
-            "max_output_tokens": 8192,
-            "response_mime_type": "text/plain",
-        }
-
-        model = genai.GenerativeModel(
-            model_name="gemini-1.5-flash",
-            generation_config=generation_config,
-            system_instruction="Given a sentence, your task is to help correct it's grammar and style. First, think about how to correct it and then return the final corrected sentence within double curly braces.\n\nExample Input: She don't likes pizza no more.\nYour output: Reasoning followed by {{She doesn't like pizza anymore.}}",
+        system_prompt = expert_system_prompt()
+        model = get_gemini_model(
+            model_name=GEMINI_MODEL,
+            generation_config=GEMINI_GENERATION_CONFIG,
+            system_instruction=system_prompt,
         )
+        # Overrides the model's max_output_tokens only, in fast mode
+        max_tokens = expert_output_budget(text)
+        generation_config = {"max_output_tokens": max_tokens} if max_tokens else {}
 
-        chat_session = model.start_chat(history=[])
-        response = chat_session.send_message(f"Sentence: {text}")
-        response_text = response.text
-        print(f"Gemini Response: {response_text}")
-        return extract_correction(response_text)
+        # A single-turn generate_content call needs no per-request chat session
+        def request(timeout):
+            request_options = {"timeout": timeout} if timeout else None
+            if not EXPERT_STREAMING:
+                response = model.generate_content(f"Sentence: {text}", generation_config=generation_config or None,
+                                                  request_options=request_options)
+                record_usage("Gemini", response.usage_metadata)
+                return response.text
+            # Gemini streams can't be closed early, but the stop sequence ends generation at "}}"
+            response = model.generate_content(
+                f"Sentence: {text}", generation_config={**generation_config, "stop_sequences": [STOP_SEQUENCE]},
+                stream=True, request_options=request_options
+            )
+            response_text = read_until_correction(gemini_chunks(response))
+            # The stream's usage covers the chunks read so far
+            record_usage("Gemini", response.usage_metadata)
+            return response_text
+
+        response_text = call_provider("Gemini", request, estimate_tokens(system_prompt, text), timeout)
+        log_payload(logger, "Gemini response", provider="Gemini", response=response_text)
+        with span("extract_correction"):
+            return extract_correction(response_text)
     except Exception as e:
-        print(f"Error with Gemini: {str(e)}")
+        logger.warning("Error with Gemini: %s", e, extra={"provider": "Gemini"})
         return None
 
-def get_final_correction(text, llm_corrections):
+def arbiter_prompt(text, llm_corrections):
+    """The arbiter's user message for one sentence."""
+    corrections_str = str([(name, corr) for name, corr in llm_corrections])
+    return f"Sentence: {text}\n\nReceived corrections from Experts: {corrections_str}"
+
+def arbiter_batch_prompt(items):
+    """The packed arbiter's user message for (text, llm_corrections) items."""
+    # Number the sentences so results can be matched back to their inputs
+    return "\n\n".join(
+        f"Sentence {index}: {text}\nReceived corrections from Experts: {str(list(llm_corrections))}"
+        for index, (text, llm_corrections) in enumerate(items, 1)
+    )
+
+def parse_arbiter_batch(content, count):
+    """Results of a packed arbiter response, aligned with its `count` sentences (None where unanswered)."""
+    with span("json_decode"):
+        batch_response = json.loads(content)
+    logger.info("OpenAI batch response: %d of %d sentences", len(batch_response.get('results', [])), count,
+                extra={"provider": "OpenAI"})
+    results = [None] * count
+    for position, result in enumerate(batch_response.get("results", [])):
+        if not isinstance(result, dict):
+            continue
+        index = result.pop("index", position + 1)
+        if isinstance(index, int) and 1 <= index <= count:
+            results[index - 1] = result
+    return results
+
+@traced("arbiter", provider="OpenAI", model=OPENAI_MODEL)
+@timed_stage("arbiter", "OpenAI")
+@guard_provider("OpenAI")
+def get_final_correction(text, llm_corrections, timeout=None):
     """Get final correction from OpenAI, considering all LLM responses."""
     try:
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        
-        # Format the corrections for OpenAI input
-        corrections_str = str([(name, corr) for name, corr in llm_corrections])
-        
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Review and correct grammar or style issues found in an English sentence, considering reasoning and corrections proposed by multiple language experts. Return a final response in JSON format, with details for each specific correction.\n\n# Output Format\nThe output should be a JSON array where each element contains a structured JSON object with the following fields:\n- `\"original\"`: The incorrect word or phrase.\n- `\"corrected\"`: The corrected version of the word or phrase.\n- `\"explanation\"`: The reasoning behind the correction based on the experts' analysis.\n\nFor the entire sentence, include additional fields summarizing the final correction:\n- `\"original_phrase\"`: The original input sentence.\n- `\"corrected_phrase\"`: The corrected version of the entire sentence with all corrections applied.\n- `\"overall_explanation\"`: A summary of the reasoning behind the final corrected phrase.\n"
-                },
-                {
-                    "role": "user",
-                    "content": f"Sentence: {text}\n\nReceived corrections from Experts: {corrections_str}"
-                }
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.1,
-            max_tokens=2048,
-            top_p=1,
-            frequency_penalty=0,
-            presence_penalty=0
-        )
+        client = get_openai_client()
+        user_content = arbiter_prompt(text, llm_corrections)
+
+        def request(timeout):
+            request_options = {"timeout": timeout} if timeout else {}
+            return client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": ARBITER_SYSTEM_PROMPT
+                    },
+                    {
+                        "role": "user",
+                        "content": user_content
+                    }
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.1,
+                max_tokens=2048,
+                top_p=1,
+                frequency_penalty=0,
+                presence_penalty=0,
+                **request_options
+            )
+
+        response = call_provider("OpenAI", request, estimate_tokens(ARBITER_SYSTEM_PROMPT, user_content, completion=512),
+                                 timeout)
+        record_usage("OpenAI", response.usage)
         
-        final_response = json.loads(response.choices[0].message.content)
-        print(f"OpenAI Final Response: {json.dumps(final_response, indent=2)}")
+        with span("json_decode"):
+            final_response = json.loads(response.choices[0].message.content)
+        log_payload(logger, "OpenAI final response", provider="OpenAI", result=final_response)
         return final_response
+    except json.JSONDecodeError as e:
+        ARBITER_JSON_ERRORS.inc("single")
+        logger.error("Error with OpenAI: invalid JSON: %s", e, extra={"provider": "OpenAI"})
+        return None
     except Exception as e:
-        print(f"Error with OpenAI: {str(e)}")
+        logger.error("Error with OpenAI: %s", e, extra={"provider": "OpenAI"})
         return None
 
-def get_all_corrections(text):
-    """Get corrections from all LLMs."""
-    corrections = []
-    
-    # Get corrections from each LLM
-    mistral_correction = get_mistral_correction(text)
-    if mistral_correction:
-        corrections.append(("Mistral", mistral_correction))
-    
-    anthropic_correction = get_anthropic_correction(text)
-    if anthropic_correction:
-        corrections.append(("Anthropic", anthropic_correction))
-    
-    gemini_correction = get_gemini_correction(text)
-    if gemini_correction:
-        corrections.append(("Gemini", gemini_correction))
+@traced("arbiter", succeeded=call_succeeded, provider="OpenAI", model=OPENAI_MODEL, batch=True)
+@timed_stage("arbiter", "OpenAI", succeeded=call_succeeded)
+@guard_provider("OpenAI", rejected=lambda items, **kwargs: [None] * len(items))
+def get_final_corrections_batch(items, timeout=None):
+    """Get final corrections for several (text, llm_corrections) items from one OpenAI call.
+
+    Returns a list aligned with items; entries the arbiter did not answer are None.
+    """
+    try:
+        client = get_openai_client()
+        sentences_str = arbiter_batch_prompt(items)
+
+        def request(timeout):
+            request_options = {"timeout": timeout} if timeout else {}
+            return client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": ARBITER_BATCH_SYSTEM_PROMPT
+                    },
+                    {
+                        "role": "user",
+                        "content": sentences_str
+                    }
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.1,
+                max_tokens=min(2048 * len(items), 16384),
+                top_p=1,
+                frequency_penalty=0,
+                presence_penalty=0,
+                **request_options
+            )
+
+        tokens = estimate_tokens(ARBITER_BATCH_SYSTEM_PROMPT, sentences_str, completion=512 * len(items))
+        response = call_provider("OpenAI", request, tokens, timeout)
+        record_usage("OpenAI", response.usage)
+
+        return parse_arbiter_batch(response.choices[0].message.content, len(items))
+    except json.JSONDecodeError as e:
+        ARBITER_JSON_ERRORS.inc("batch")
+        logger.error("Error with OpenAI batch: invalid JSON: %s", e, extra={"provider": "OpenAI"})
+        return [None] * len(items)
+    except Exception as e:
+        logger.error("Error with OpenAI batch: %s", e, extra={"provider": "OpenAI"})
+        return [None] * len(items)
+
+# Local majority voting, timed as the "local" arbiter
+vote_locally = traced("arbiter", provider="local")(timed_stage("arbiter", "local")(vote_corrections))
+
+# Experts in the order their corrections are reported to the arbiter
+EXPERTS = [
+    (name, func) for name, func in [
+        ("Mistral", get_mistral_correction),
+        ("Anthropic", get_anthropic_correction),
+        ("Gemini", get_gemini_correction),
+    ]
+    if name in ENABLED_EXPERTS
+]
+
+@traced("experts", succeeded=bool)
+def get_expert_corrections(text, concurrent=None, quorum=None, quorum_wait=None, deadline=None, on_expert=None,
+                           known=None):
+    """Get (name, correction) pairs from the expert LLMs, in EXPERTS order.
+
+    In concurrent mode this returns as soon as `quorum` experts have produced a
+    correction, or once `quorum_wait` seconds have passed and at least one has.
+    Experts still running at that point, or at the deadline, are abandoned.
+    `on_expert(text, name, correction)` is called as each expert finishes.
+    Experts with an answer in `known` ({name: correction or None}) are not asked again.
+    """
+    known = known or {}
+    experts = [(name, func) for name, func in EXPERTS if name not in known]
+    if concurrent is None:
+        concurrent = CONCURRENT_EXPERTS
+    if quorum is None:
+        quorum = EXPERT_QUORUM
+    if quorum_wait is None:
+        quorum_wait = QUORUM_WAIT
+
+    if not concurrent:
+        results = dict(known)
+        for name, func in experts:
+            correction = func(text, timeout=remaining_time(deadline))
+            if on_expert:
+                on_expert(text, name, correction)
+            results[name] = correction
+        return [(name, results[name]) for name, _ in EXPERTS if results.get(name)]
+
+    timeout = remaining_time(deadline)
+    submitted = time.monotonic()
+
+    def run_expert(name, func):
+        record("experts", name, queue_wait=time.monotonic() - submitted)
+        return func(text, timeout=timeout)
+
+    futures = {_expert_pool.submit(bind_context(run_expert), name, func): name for name, func in experts}
+    answers = {name: correction for name, correction in known.items() if correction}
+    quorum = min(quorum, len(futures) + len(answers))
+    started = time.monotonic()
+    pending = set(futures)
+
+    while pending and len(answers) < quorum:
+        # Sleep until the next expert finishes, the quorum wait ends or the deadline passes
+        wake_at = [deadline] if deadline is not None else []
+        if quorum_wait is not None and time.monotonic() < started + quorum_wait:
+            wake_at.append(started + quorum_wait)
+        wait_for = max(min(wake_at) - time.monotonic(), 0) if wake_at else None
+
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            correction = future.result()
+            if on_expert:
+                on_expert(text, futures[future], correction)
+            # Drop experts that failed or returned no {{...}} correction
+            if correction:
+                answers[futures[future]] = correction
+
+        now = time.monotonic()
+        if deadline is not None and now >= deadline:
+            break
+        if quorum_wait is not None and answers and now - started >= quorum_wait:
+            break
+
+    for future in pending:
+        # Stragglers that have not started yet are cancelled; running ones time out on their own
+        future.cancel()
+        logger.info("Proceeding without %s: no answer in time", futures[future], extra={"provider": futures[future]})
+        record("experts", futures[future], abandoned=1)
+        EXPERTS_ABANDONED.inc(futures[future])
+
+    return [(name, answers[name]) for name, _ in EXPERTS if name in answers]
+
+def escalation_reason(text, correction):
+    """Why the fast expert's correction needs the full flow ("no_answer", "change" or "edits"), or None."""
+    if not correction:
+        return "no_answer"
+    edits, changed_tokens, changed = edit_size(text, correction)
+    if changed > ESCALATE_CHANGE and changed_tokens >= ESCALATE_MIN_TOKENS:
+        return "change"
+    if edits > ESCALATE_EDITS:
+        return "edits"
+    return None
+
+def fast_tier_enabled():
+    return ROUTING_MODE == "tiered" and any(name == FAST_EXPERT for name, _ in EXPERTS)
+
+def route_fast_answer(text, correction):
+    """Decide on the fast expert's answer: (final result, or None to escalate; known answers for the full flow)."""
+    reason = escalation_reason(text, correction)
+    annotate(tier="full" if reason else "fast", reason=reason)
+    ROUTED.inc("full" if reason else "fast", reason or "accepted")
+    if reason:
+        return None, {FAST_EXPERT: correction}
+    result = vote_locally(text, [(FAST_EXPERT, correction)])
+    result["tier"] = "fast"
+    result["overall_explanation"] = (
+        f"{FAST_EXPERT} made a small enough change not to need the other experts." if result["corrections"]
+        else f"{FAST_EXPERT} found nothing to correct."
+    )
+    return result, None
+
+def get_routed_corrections(text, concurrent=None, quorum=None, quorum_wait=None, deadline=None, on_expert=None):
+    """(expert corrections, fast result) for text under ROUTING_MODE.
+
+    In tiered mode FAST_EXPERT answers first. If its answer can be used as is,
+    the fast result is the final correction built from it; otherwise, as in
+    full mode, the fast result is None and every expert's corrections are returned.
+    """
+    known = None
+    if fast_tier_enabled():
+        with span("routing", expert=FAST_EXPERT):
+            correction = dict(EXPERTS)[FAST_EXPERT](text, timeout=remaining_time(deadline))
+            if on_expert:
+                on_expert(text, FAST_EXPERT, correction)
+            result, known = route_fast_answer(text, correction)
+        if result:
+            return [(FAST_EXPERT, correction)], result
+    return get_expert_corrections(text, concurrent=concurrent, quorum=quorum, quorum_wait=quorum_wait,
+                                  deadline=deadline, on_expert=on_expert, known=known), None
+
+def result_cache_ttl(corrections, result, arbiter=None):
+    """Seconds to cache a pipeline result: the full TTL when it is complete, else DEGRADED_CACHE_TTL.
+
+    Complete means every configured expert answered (or the fast tier answered on
+    its own) and the arbiter the mode calls for made the final correction.
+    """
+    if arbiter is None:
+        arbiter = ARBITER_MODE
+    if result.get("tier") == "fast":
+        return correction_cache.ttl
+    all_answered = len(corrections) == len(EXPERTS)
+    if result.get("arbiter") != "local":
+        arbiter_ran = True
+    else:
+        arbiter_ran = arbiter == "local" or (arbiter == "auto" and len(corrections) >= 2 and experts_agree(corrections))
+    return correction_cache.ttl if all_answered and arbiter_ran else DEGRADED_CACHE_TTL
+
+def cache_result(key, corrections, result, arbiter=None):
+    """Store a pipeline result under key, briefly if it is degraded (see result_cache_ttl)."""
+    ttl = result_cache_ttl(corrections, result, arbiter=arbiter)
+    if ttl > 0:
+        correction_cache.set(key, result, ttl=ttl)
+
+def get_routing_stats():
+    """How many sentences each routing tier answered, and why sentences escalated."""
+    counts = ROUTED.values()
+    fast = sum(count for (tier, _), count in counts.items() if tier == "fast")
+    full = sum(count for (tier, _), count in counts.items() if tier == "full")
+    return {
+        "mode": ROUTING_MODE,
+        "fast_expert": FAST_EXPERT,
+        "thresholds": {"change": ESCALATE_CHANGE, "min_tokens": ESCALATE_MIN_TOKENS, "edits": ESCALATE_EDITS},
+        "fast": fast,
+        "escalated": full,
+        "fast_share": fast / (fast + full) if fast + full else 0.0,
+        "escalations": {reason: count for (tier, reason), count in sorted(counts.items()) if tier == "full"},
+    }
+
+def resolves_locally(corrections, arbiter):
+    """True when corrections are reconciled by local voting rather than the OpenAI arbiter."""
+    if arbiter == "local":
+        return True
+    if arbiter == "auto" and len(corrections) >= 2 and experts_agree(corrections):
+        return True
+    # With the arbiter's breaker open, auto mode votes locally instead of failing
+    return arbiter == "auto" and not arbiter_available()
+
+def resolve_corrections(text, corrections, arbiter=None, timeout=None):
+    """Reconcile expert corrections locally or with the OpenAI arbiter."""
+    if arbiter is None:
+        arbiter = ARBITER_MODE
+    if resolves_locally(corrections, arbiter):
+        return vote_locally(text, corrections)
+    return get_final_correction(text, corrections, timeout=timeout)
+
+def pipeline_cache_key(text, arbiter=None):
+    """Cache key for a full pipeline run: normalized text plus models and prompts."""
+    # Tiered results depend on the routing settings; full-flow keys stay as they were
+    routing = [FAST_EXPERT, ESCALATE_CHANGE, ESCALATE_EDITS] if ROUTING_MODE == "tiered" else []
+    return make_key(
+        "pipeline",
+        PROMPT_VERSION,
+        arbiter or ARBITER_MODE,
+        [backend_model(model) for model in [MISTRAL_MODEL, ANTHROPIC_MODEL, GEMINI_MODEL, OPENAI_MODEL]],
+        expert_system_prompt(),
+        ARBITER_SYSTEM_PROMPT,
+        normalize_text(text),
+        *routing,
+    )
+
+def cache_hit_ratios():
+    """Hit ratio of the pipeline cache and each expert memo, for /metrics."""
+    ratios = {("pipeline",): correction_cache.stats()["hit_ratio"]}
+    for name, cache in expert_caches.items():
+        ratios[(f"expert:{name}",)] = cache.stats()["hit_ratio"]
+    return ratios
+
+registry.collector("stylecheck_cache_hit_ratio", "Share of cache lookups served from memory or SQLite.", "gauge",
+                   ["cache"], cache_hit_ratios)
+
+def get_cache_stats():
+    """Hit/miss counters for the pipeline cache and each expert memo, plus request coalescing."""
+    stats = correction_cache.stats()
+    stats["experts"] = {name: cache.stats() for name, cache in expert_caches.items()}
+    stats["single_flight"] = single_flight.stats()
+    return stats
+
+def single_flight_deadline(timeout=None):
+    """How long a coalesced caller waits on the shared run: its own request budget."""
+    timeout = timeout or REQUEST_TIMEOUT
+    return time.monotonic() + timeout if timeout else None
+
+def get_all_corrections(text, concurrent=None, use_cache=True, quorum=None, quorum_wait=None, timeout=None,
+                        arbiter=None, on_expert=None):
+    """Get corrections from all LLMs.
+
+    `timeout` is the overall budget for the request in seconds; the result's
+    "experts" field lists the experts whose corrections reached the arbiter.
+    Concurrent calls for the same text share a single run, whose
+    `on_expert` callbacks go to the caller that started it.
+    """
+    use_cache = use_cache and CACHE_ENABLED
+    key = pipeline_cache_key(text, arbiter=arbiter)
+    if use_cache:
+        with span("cache_lookup", cache="pipeline") as lookup:
+            cached = correction_cache.get(key)
+            lookup.set(hit=cached is not None)
+        if cached is not None:
+            record_cache("hit")
+            return cached
+
+    ran = False
+
+    def run():
+        nonlocal ran
+        ran = True
+        record_cache("miss" if use_cache else "bypass")
+        return run_pipeline(text, concurrent=concurrent, use_cache=use_cache, quorum=quorum, quorum_wait=quorum_wait,
+                            timeout=timeout, arbiter=arbiter, on_expert=on_expert)
+
+    if not SINGLE_FLIGHT:
+        return run()
+    # Identical requests in flight attach to one run; other processes' results arrive through the cache
+    try:
+        result = single_flight.do(
+            make_key(key, concurrent, quorum, quorum_wait), run,
+            recheck=(lambda: correction_cache.get(key)) if use_cache else None,
+            deadline=single_flight_deadline(timeout),
+        )
+    except SingleFlightTimeout as e:
+        logger.warning("Gave up waiting on a coalesced request: %s", e)
+        return None
+    if not ran:
+        record_cache("coalesced")
+    return result
+
+def run_pipeline(text, concurrent=None, use_cache=True, quorum=None, quorum_wait=None, timeout=None, arbiter=None,
+                 on_expert=None):
+    """Run the experts and arbiter for one text and cache the result; get_all_corrections without the coalescing."""
+    key = pipeline_cache_key(text, arbiter=arbiter)
+    timeout = timeout or REQUEST_TIMEOUT
+    deadline = time.monotonic() + timeout if timeout else None
+    corrections, final_correction = get_routed_corrections(
+        text, concurrent=concurrent, quorum=quorum, quorum_wait=quorum_wait, deadline=deadline,
+        on_expert=on_expert
+    )
     
-    # If we have corrections, get final analysis from OpenAI
+    # If we have corrections, reconcile them locally or get final analysis from OpenAI
     if corrections:
-        return get_final_correction(text, corrections)
+        if final_correction is None:
+            final_correction = resolve_corrections(text, corrections, arbiter=arbiter, timeout=remaining_time(deadline))
+        if final_correction:
+            final_correction["experts"] = [name for name, _ in corrections]
+        if final_correction and use_cache:
+            cache_result(key, corrections, final_correction, arbiter=arbiter)
+        return final_correction
     
     return None
+
+def unique_texts(texts):
+    """{normalized text: text}, keeping the first spelling of each normalized text."""
+    unique = {}
+    for text in texts:
+        unique.setdefault(normalize_text(text), text)
+    return unique
+
+def lookup_batch(unique, use_cache, arbiter):
+    """Split a batch into ({normalized: {"result"}} cache hits, [(normalized, text)] still to correct)."""
+    outcomes = {}
+    pending = []
+    with span("cache_lookup", cache="pipeline", sentences=len(unique)) as lookup:
+        for normalized, text in unique.items():
+            cached = correction_cache.get(pipeline_cache_key(text, arbiter=arbiter)) if use_cache else None
+            if cached is not None:
+                record_cache("hit")
+                outcomes[normalized] = {"result": cached}
+            else:
+                record_cache("miss" if use_cache else "bypass")
+                pending.append((normalized, text))
+        lookup.set(hits=len(outcomes))
+    return outcomes, pending
+
+def triage_expert_results(pending, expert_results, arbiter, outcomes):
+    """Record the outcome of every pending text that needs no OpenAI arbiter; returns those that do.
+
+    expert_results are (corrections, fast result) pairs aligned with pending;
+    the texts left for the arbiter come back as (normalized, text, corrections).
+    """
+    needs_arbiter = []
+    for (normalized, text), (corrections, fast_result) in zip(pending, expert_results):
+        if not corrections:
+            outcomes[normalized] = {"error": "Failed to get corrections from the experts"}
+        elif fast_result is not None:
+            outcomes[normalized] = {"result": fast_result, "corrections": corrections}
+        elif resolves_locally(corrections, arbiter):
+            outcomes[normalized] = {"result": vote_locally(text, corrections), "corrections": corrections}
+        else:
+            needs_arbiter.append((normalized, text, corrections))
+    return needs_arbiter
+
+def pack_arbiter_items(items):
+    """Items for the OpenAI arbiter in chunks of ARBITER_BATCH_SIZE, one packed call each."""
+    return [items[i:i + ARBITER_BATCH_SIZE] for i in range(0, len(items), ARBITER_BATCH_SIZE)]
+
+def record_arbiter_results(items, results, outcomes):
+    """Record the arbiter's results for (normalized, text, corrections) items; returns the ones left unanswered."""
+    unanswered = []
+    for item, result in zip(items, results):
+        if result is None:
+            unanswered.append(item)
+        else:
+            outcomes[item[0]] = {"result": result, "corrections": item[2]}
+    return unanswered
+
+def finish_batch(pending, outcomes, use_cache, arbiter):
+    """Tag each new result with its experts and cache it."""
+    for normalized, text in pending:
+        outcome = outcomes[normalized]
+        if "result" in outcome:
+            corrections = outcome.pop("corrections")
+            outcome["result"]["experts"] = [name for name, _ in corrections]
+            if use_cache:
+                cache_result(pipeline_cache_key(text, arbiter=arbiter), corrections, outcome["result"], arbiter=arbiter)
+
+def get_batch_corrections(texts, use_cache=True, timeout=None, arbiter=None, on_expert=None):
+    """Correct many texts at once, returning one {"result"} or {"error"} dict per text, in order.
+
+    Identical inputs (after normalization) are corrected once. Uncached texts go
+    through the experts with bounded concurrency, and the ones that still need
+    the OpenAI arbiter are packed ARBITER_BATCH_SIZE to a call.
+    """
+    if arbiter is None:
+        arbiter = ARBITER_MODE
+    use_cache = use_cache and CACHE_ENABLED
+    timeout = timeout or REQUEST_TIMEOUT
+    deadline = time.monotonic() + timeout if timeout else None
+
+    unique = unique_texts(texts)
+    outcomes, pending = lookup_batch(unique, use_cache, arbiter)
+
+    # Expert fan-out (or the fast tier first), a bounded number of sentences at a time
+    expert_results = batch_map(lambda item: get_routed_corrections(item[1], deadline=deadline, on_expert=on_expert),
+                               pending)
+    needs_arbiter = triage_expert_results(pending, expert_results, arbiter, outcomes)
+
+    # Packed arbiter calls, falling back to a single call for anything left unanswered
+    chunks = pack_arbiter_items(needs_arbiter)
+    batch_results = batch_map(
+        lambda chunk: get_final_corrections_batch(
+            [(text, corrections) for _, text, corrections in chunk], timeout=remaining_time(deadline)
+        ),
+        chunks,
+    )
+    unanswered = record_arbiter_results(needs_arbiter, [result for results in batch_results for result in results],
+                                        outcomes)
+    # The single-sentence fallbacks run side by side, like the packed calls
+    fallback_results = batch_map(
+        lambda item: get_final_correction(item[1], item[2], timeout=remaining_time(deadline)), unanswered
+    )
+    for normalized, _, _ in record_arbiter_results(unanswered, fallback_results, outcomes):
+        outcomes[normalized] = {"error": "Failed to get corrections"}
+
+    finish_batch(pending, outcomes, use_cache, arbiter)
+    # Copy per input so duplicate texts don't share mutable result dicts
+    return [copy.deepcopy(outcomes[normalize_text(text)]) for text in texts]
+
+def get_document_corrections(text, use_cache=True, timeout=None, arbiter=None, on_expert=None):
+    """Correct a paragraph by splitting it into sentences and correcting them in parallel.
+
+    Sentences go through get_batch_corrections (so repeats are corrected once)
+    and are stitched back together by stitch_document. Single sentences go
+    straight to get_all_corrections.
+    """
+    sentences = split_sentences(text)
+    if not PARAGRAPH_MODE or len(sentences) <= 1:
+        return get_all_corrections(text, use_cache=use_cache, timeout=timeout, arbiter=arbiter, on_expert=on_expert)
+
+    def run():
+        outcomes = get_batch_corrections(
+            [sentence for sentence, _, _ in sentences], use_cache=use_cache, timeout=timeout, arbiter=arbiter,
+            on_expert=on_expert
+        )
+        if not any("result" in outcome for outcome in outcomes):
+            return None
+        return stitch_document(text, sentences, outcomes)
+
+    if not SINGLE_FLIGHT:
+        return run()
+    try:
+        return single_flight.do(make_key("document", pipeline_cache_key(text, arbiter=arbiter), use_cache), run,
+                                deadline=single_flight_deadline(timeout))
+    except SingleFlightTimeout as e:
+        logger.warning("Gave up waiting on a coalesced request: %s", e)
+        return None
+
+def stitch_document(text, sentences, outcomes):
+    """Reassemble per-sentence outcomes into one correction for the whole text.
+
+    Corrected sentences replace their spans in the original, keeping the
+    whitespace between them. Every correction carries its sentence index and
+    the character offsets of its original span in the input.
+    """
+    pieces = []
+    position = 0
+    corrections = []
+    explanations = []
+    experts = []
+    sentence_results = []
+    for index, ((sentence, start, end), outcome) in enumerate(zip(sentences, outcomes)):
+        result = outcome.get("result")
+        corrected = (result.get("corrected_phrase") or sentence) if result else sentence
+        pieces.append(text[position:start])
+        pieces.append(corrected)
+        position = end
+
+        sentence_result = {"index": index, "start": start, "end": end, "original": sentence, "corrected": corrected}
+        if not result:
+            sentence_result["error"] = outcome.get("error", "Failed to get corrections")
+            sentence_results.append(sentence_result)
+            continue
+        sentence_results.append(sentence_result)
+
+        for correction in result.get("corrections") or []:
+            correction["sentence_index"] = index
+            offset = text.find(correction.get("original") or "", start, end)
+            if correction.get("original") and offset != -1:
+                correction["start"] = offset
+                correction["end"] = offset + len(correction["original"])
+            corrections.append(correction)
+        if result.get("overall_explanation") and result.get("corrections") \
+                and result["overall_explanation"] not in explanations:
+            explanations.append(result["overall_explanation"])
+        experts.extend(name for name in result.get("experts", []) if name not in experts)
+    pieces.append(text[position:])
+
+    return {
+        "original_phrase": text,
+        "corrected_phrase": "".join(pieces),
+        "corrections": corrections,
+        "overall_explanation": " ".join(explanations) or "No corrections were needed.",
+        "experts": experts,
+        "sentences": sentence_results,
+    }
+
+def stream_corrections(text, timeout=None, arbiter=None, timings=False):
+    """Run get_document_corrections in the background, yielding (event, data) pairs as it goes.
+
+    Yields an "expert" event for each expert answer (with the sentence it was
+    for), then a single "result" event with the final correction, or an
+    "error" event if the pipeline raised. With `timings`, the result carries
+    the run's "timings" block.
+    """
+    events = queue.Queue()
+
+    def on_expert(sentence, name, correction):
+        events.put(("expert", {"sentence": sentence, "name": name, "correction": correction}))
+
+    def run():
+        try:
+            with start_trace("check_stream", text_length=len(text)), track_timings() as request_timings:
+                result = get_document_corrections(text, timeout=timeout, arbiter=arbiter, on_expert=on_expert)
+            if result and timings:
+                result = dict(result, timings=request_timings.as_dict())
+            events.put(("result", result))
+        except Exception as e:
+            events.put(("error", {"error": str(e)}))
+
+    # bind_context: the pipeline thread logs under the streaming request's ID
+    threading.Thread(target=bind_context(run), name="stylecheck-stream", daemon=True).start()
+    while True:
+        event, data = events.get()
+        yield event, data
+        if event != "expert":
+            return
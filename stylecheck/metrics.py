@@ -0,0 +1,224 @@
+import bisect
+import threading
+from rate_limiter import RateLimitTimeout, status_code
+
+# Prometheus-style metrics, rendered in the plain-text exposition format at
+# /metrics. Recording is cheap enough to leave on under load: every thread
+# updates its own shard of each metric without taking a lock, and shards are
+# only summed when the endpoint is scraped.
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+def format_labels(labelnames, labels, extra=()):
+    pairs = list(zip(labelnames, labels)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class Metric:
+    """A metric whose samples are kept in per-thread shards.
+
+    A thread registers its shard (under the lock) the first time it records;
+    after that it only touches its own dict, keyed by label values. Shards of
+    threads that have exited are folded into one retired shard whenever a new
+    shard registers or the metric is read, so a thread per request does not
+    leave a shard per request behind.
+    """
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []  # (thread, values)
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                self._sweep()
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    def _sweep(self):
+        """Fold the shards of exited threads into the retired shard; call with the lock held."""
+        live = []
+        for thread, values in self._shards:
+            if thread.is_alive():
+                live.append((thread, values))
+            else:
+                # The thread is gone, so nothing writes to its shard any more
+                self._merge(self._retired, values)
+        self._shards = live
+
+    def _merge(self, into, values):
+        raise NotImplementedError
+
+    def _snapshots(self):
+        with self._lock:
+            self._sweep()
+            retired = {}
+            self._merge(retired, self._retired)
+            shards = [values for _, values in self._shards]
+        # Copying a dict is atomic under the GIL, so a shard is never read mid-resize
+        return [retired] + [dict(shard) for shard in shards]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def _merge(self, into, values):
+        for labels, value in values.items():
+            into[labels] = into.get(labels, 0) + value
+
+    def values(self):
+        totals = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def samples(self):
+        for labels, value in sorted(self.values().items()):
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+
+class Gauge(Counter):
+    """Up/down gauge; each thread's shard holds its net change, so inc() and dec() may run on different threads."""
+    type = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            # One count per bucket, then +Inf, then the sum of observed values
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def _merge(self, into, values):
+        for labels, counts in values.items():
+            merged = into.setdefault(labels, [0] * len(counts))
+            for i, count in enumerate(list(counts)):
+                merged[i] += count
+
+    def samples(self):
+        totals = {}
+        for shard in self._snapshots():
+            for labels, counts in shard.items():
+                merged = totals.setdefault(labels, [0] * len(counts))
+                for i, count in enumerate(list(counts)):
+                    merged[i] += count
+        for labels, counts in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield (f"{self.name}_bucket{format_labels(self.labelnames, labels, [('le', format_value(bound))])} "
+                       f"{cumulative}")
+            yield f"{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(counts[-1])}"
+            yield f"{self.name}_count{format_labels(self.labelnames, labels)} {cumulative}"
+
+class Collector:
+    """Samples read from elsewhere at scrape time: func() returns {label values: value}."""
+
+    def __init__(self, name, help, type, labelnames, func):
+        self.name = name
+        self.help = help
+        self.type = type
+        self.labelnames = tuple(labelnames)
+        self.func = func
+
+    def samples(self):
+        for labels, value in sorted(self.func().items()):
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+
+    render = Metric.render
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, name, help, type, labelnames, func):
+        return self._register(Collector(name, help, type, labelnames, func))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+registry = Registry()
+
+REQUESTS = registry.counter(
+    "stylecheck_requests_total", "HTTP requests handled, by endpoint, method and status.",
+    ["endpoint", "method", "status"])
+REQUEST_SECONDS = registry.histogram(
+    "stylecheck_request_seconds", "Time to respond to an HTTP request (to the first event for streams).",
+    ["endpoint", "method"])
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "stylecheck_requests_in_flight", "HTTP requests currently being handled.", ["endpoint"])
+PROVIDER_CALL_SECONDS = registry.histogram(
+    "stylecheck_provider_call_seconds", "Latency of each provider API call attempt, by outcome.",
+    ["provider", "outcome"])
+PROVIDER_ERRORS = registry.counter(
+    "stylecheck_provider_errors_total", "Failed provider API call attempts, by kind (error, timeout, rate_limited).",
+    ["provider", "kind"])
+PROVIDER_SKIPS = registry.counter(
+    "stylecheck_provider_skipped_total", "Provider calls skipped because the circuit breaker was open.", ["provider"])
+EXPERTS_ABANDONED = registry.counter(
+    "stylecheck_experts_abandoned_total", "Expert answers not waited for (quorum reached or deadline passed).",
+    ["provider"])
+ARBITER_JSON_ERRORS = registry.counter(
+    "stylecheck_arbiter_json_errors_total", "Arbiter responses that were not valid JSON.", ["call"])
+
+ROUTED = registry.counter(
+    "stylecheck_routed_total", "Sentences answered by each routing tier (fast expert or full flow), by reason.",
+    ["tier", "reason"])
+
+def error_kind(error):
+    """Classify a failed provider call for PROVIDER_ERRORS."""
+    if status_code(error) == 429 or isinstance(error, RateLimitTimeout):
+        return "rate_limited"
+    if status_code(error) == 408 or isinstance(error, TimeoutError) or any(
+            "Timeout" in cls.__name__ or cls.__name__ == "DeadlineExceeded" for cls in type(error).__mro__):
+        return "timeout"
+    return "error"
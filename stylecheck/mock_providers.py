@@ -0,0 +1,501 @@
+import os
+import re
+import ast
+import csv
+import json
+import time
+import random
+import asyncio
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+from consensus import vote_corrections
+from correction_cache import normalize_text
+
+# Offline stand-ins for the provider SDK clients. With STYLECHECK_MOCK_PROVIDERS=1,
+# provider_clients hands these out instead of the real clients, so the whole
+# pipeline (rate limits, breakers, retries, streaming, extraction, arbiter JSON)
+# runs without API keys or network. Corrections come from the evaluation and
+# behavioral test data, falling back to a few rules. Latency and failures are
+# drawn from a seeded RNG per (provider, sentence, attempt), so a run is
+# reproducible regardless of thread scheduling.
+#
+# Canned corrections are the data's ground truth, so by default every expert is
+# right and quality metrics from a mock run only reflect the pipeline's own
+# losses (timeouts, quorum, breakers). Set STYLECHECK_MOCK_WRONG_RATE and
+# STYLECHECK_MOCK_DISAGREE_RATE to have experts err and see quality move.
+#
+# Settings, each overridable per provider (e.g. STYLECHECK_MOCK_GEMINI_ERROR_RATE):
+#   STYLECHECK_MOCK_LATENCY         median seconds per call (lognormal)
+#   STYLECHECK_MOCK_LATENCY_SIGMA   spread of the lognormal latency
+#   STYLECHECK_MOCK_ERROR_RATE      share of calls failing with a 503
+#   STYLECHECK_MOCK_RATE_LIMIT_RATE share of calls failing with a 429
+#   STYLECHECK_MOCK_MALFORMED_RATE  share of answers without {{...}} (or invalid JSON from the arbiter)
+#   STYLECHECK_MOCK_DISAGREE_RATE   share of expert answers that leave the sentence unchanged
+#   STYLECHECK_MOCK_WRONG_RATE      share of expert answers with a word of the correction dropped
+#   STYLECHECK_MOCK_SEED            RNG seed
+DEFAULTS = {
+    "latency": 0.5,
+    "latency_sigma": 0.5,
+    "error_rate": 0.0,
+    "rate_limit_rate": 0.0,
+    "malformed_rate": 0.0,
+    "disagree_rate": 0.0,
+    "wrong_rate": 0.0,
+    "seed": 0,
+}
+# (provider, sentence) attempt counters kept; the least recently used are forgotten
+MAX_TRACKED_ATTEMPTS = 10000
+
+STYLECHECK_ROOT = os.path.dirname(os.path.abspath(__file__))
+CANNED_SOURCES = [
+    os.path.join(STYLECHECK_ROOT, "evaluation", "data", "test_sentences.csv"),
+    os.path.join(STYLECHECK_ROOT, "evaluation", "behavioral_tests", "test_cases.json"),
+    os.path.join(STYLECHECK_ROOT, "evaluation", "behavioral_tests", "advanced_test_cases.json"),
+]
+
+# (pattern, replacement) rules for sentences without a canned correction
+RULES = [
+    (r"\b(he|she|it) don't\b", r"\1 doesn't"),
+    (r"\b(I|you|we|they) doesn't\b", r"\1 don't"),
+    (r"\bI has\b", "I have"),
+    (r"\b(he|she|it) have\b", r"\1 has"),
+    (r"\b(we|they|you) is\b", r"\1 are"),
+    (r"\b(we|they|you) was\b", r"\1 were"),
+    (r"\b(doesn't|don't|didn't) (\w+?)s\b", r"\1 \2"),
+    (r"\ba ([aeiou])", r"an \1"),
+    (r"\bcould of\b", "could have"),
+    (r"\bshould of\b", "should have"),
+    (r" {2,}", " "),
+]
+
+class MockProviderError(Exception):
+    """Failure raised by a mock client, carrying an HTTP status like the real SDK errors."""
+
+    def __init__(self, status_code, message):
+        super().__init__(f"Error code: {status_code} - {message}")
+        self.status_code = status_code
+
+_overrides = {}
+_attempts = OrderedDict()
+_lock = threading.Lock()
+_canned = None
+
+def configure_mock(provider=None, **settings):
+    """Override mock settings at runtime, for every provider or just one."""
+    with _lock:
+        _overrides.setdefault(provider, {}).update(settings)
+        _attempts.clear()
+
+def setting(provider, name):
+    """A mock setting for provider: runtime override, then provider env var, then global env var."""
+    for scope in (provider, None):
+        if name in _overrides.get(scope, {}):
+            return _overrides[scope][name]
+    for variable in (f"STYLECHECK_MOCK_{provider.upper()}_{name.upper()}", f"STYLECHECK_MOCK_{name.upper()}"):
+        if os.getenv(variable):
+            return float(os.getenv(variable))
+    return DEFAULTS[name]
+
+def canned_corrections():
+    """Known-good corrections from the evaluation and behavioral test data, by normalized input."""
+    global _canned
+    if _canned is None:
+        canned = {}
+        for path in CANNED_SOURCES:
+            if not os.path.exists(path):
+                continue
+            with open(path, newline="", encoding="utf-8") as f:
+                if path.endswith(".csv"):
+                    pairs = [(row["original"], row["ground_truth"]) for row in csv.DictReader(f)]
+                else:
+                    pairs = [(case["input_text"], case["expected_output"]) for case in json.load(f)["test_cases"]]
+            for original, corrected in pairs:
+                canned.setdefault(normalize_text(original), corrected)
+        _canned = canned
+    return _canned
+
+def mock_correct(text):
+    """The mock experts' correction of a sentence."""
+    canned = canned_corrections().get(normalize_text(text))
+    if canned is not None:
+        return canned
+    corrected = normalize_text(text)
+    for pattern, replacement in RULES:
+        corrected = re.sub(pattern, replacement, corrected, flags=re.IGNORECASE)
+    if corrected:
+        corrected = corrected[0].upper() + corrected[1:]
+        if corrected[-1] not in ".!?":
+            corrected += "."
+    return corrected
+
+def plan_call(provider, text):
+    """Decide latency and outcome of one call, deterministically for its (provider, text, attempt)."""
+    with _lock:
+        key = (provider, text)
+        attempt = _attempts[key] = _attempts.get(key, 0) + 1
+        _attempts.move_to_end(key)
+        if len(_attempts) > MAX_TRACKED_ATTEMPTS:
+            _attempts.popitem(last=False)
+    rng = random.Random(f"{setting(provider, 'seed')}:{provider}:{text}:{attempt}")
+    latency = setting(provider, "latency") * rng.lognormvariate(0, setting(provider, "latency_sigma"))
+    roll = rng.random()
+    outcome = "ok"
+    for name, rate in (("error", setting(provider, "error_rate")),
+                       ("rate_limit", setting(provider, "rate_limit_rate")),
+                       ("malformed", setting(provider, "malformed_rate")),
+                       ("disagree", setting(provider, "disagree_rate")),
+                       ("wrong", setting(provider, "wrong_rate"))):
+        if roll < rate:
+            outcome = name
+            break
+        roll -= rate
+    return latency, outcome
+
+def raise_for(provider, outcome):
+    if outcome == "error":
+        raise MockProviderError(503, f"{provider} mock: service unavailable")
+    if outcome == "rate_limit":
+        raise MockProviderError(429, f"{provider} mock: rate limit exceeded")
+
+def user_text(messages):
+    """Text of the last user message, in either the plain or content-block format."""
+    content = [message for message in messages if message["role"] == "user"][-1]["content"]
+    if isinstance(content, list):
+        content = "".join(block.get("text", "") for block in content)
+    return content
+
+def sentence_of(prompt):
+    return prompt[len("Sentence: "):] if prompt.startswith("Sentence: ") else prompt
+
+def expert_answer(provider, sentence, outcome):
+    """An expert-style answer: a line of reasoning, the {{...}} correction and some trailing chatter."""
+    if outcome == "malformed":
+        return f"The sentence {sentence} looks mostly fine to me."
+    corrected = sentence if outcome == "disagree" else mock_correct(sentence)
+    if outcome == "wrong":
+        corrected = drop_word(provider, corrected)
+    return (f"Checking agreement, tense and word choice in the sentence. {{{{{corrected}}}}} "
+            f"I hope this helps; let me know if you would like more detail on any change.")
+
+def drop_word(provider, sentence):
+    """The sentence with one word left out, chosen per (provider, sentence) so experts err differently."""
+    words = sentence.split(" ")
+    if len(words) < 2:
+        return sentence
+    del words[random.Random(f"{provider}:{sentence}").randrange(len(words) - 1)]
+    return " ".join(words)
+
+def split_stream(answer, stop):
+    """Chunks of an answer as a stream would deliver them, cut at a stop sequence if one is hit."""
+    finish_reason = "end"
+    for sequence in stop or []:
+        index = answer.find(sequence)
+        if index != -1:
+            answer = answer[:index]
+            finish_reason = "stop_sequence"
+    words = re.findall(r"\S+\s*", answer)
+    chunks = ["".join(words[i:i + 3]) for i in range(0, len(words), 3)]
+    return chunks, finish_reason
+
+def chunk_delays(latency, chunks):
+    """Time to first chunk, then the rest of the latency spread over the chunks."""
+    first = latency * 0.3
+    per_chunk = (latency - first) / max(len(chunks), 1)
+    return [first + per_chunk] + [per_chunk] * (len(chunks) - 1)
+
+def token_count(text):
+    return max(len(text) // 4, 1)
+
+def arbiter_answer(provider, prompt, outcome, batch):
+    """The arbiter's JSON: the experts' corrections majority-voted, per sentence."""
+    if outcome == "malformed":
+        return '{"corrections": [{"original": "'
+    items = []
+    for block in prompt.split("\n\nSentence ") if batch else [prompt]:
+        header, _, corrections = block.partition("Received corrections from Experts: ")
+        sentence = re.sub(r"^(Sentence )?\d+: ", "", header.strip()) if batch else sentence_of(header.strip())
+        items.append((sentence, ast.literal_eval(corrections.strip() or "[]")))
+
+    results = []
+    for index, (sentence, corrections) in enumerate(items, 1):
+        result = vote_corrections(sentence, [tuple(item) for item in corrections])
+        result.pop("arbiter")
+        results.append({"index": index, **result} if batch else result)
+    return json.dumps({"results": results} if batch else results[0])
+
+class _MockStream:
+    """Context manager over a chunk list, sleeping between chunks; sync and async."""
+
+    def __init__(self, chunks, delays, make_event):
+        self.chunks = chunks
+        self.delays = delays
+        self.make_event = make_event
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        for i, (chunk, delay) in enumerate(zip(self.chunks, self.delays)):
+            time.sleep(delay)
+            yield self.make_event(chunk, i == len(self.chunks) - 1)
+
+    async def __aiter__(self):
+        for i, (chunk, delay) in enumerate(zip(self.chunks, self.delays)):
+            await asyncio.sleep(delay)
+            yield self.make_event(chunk, i == len(self.chunks) - 1)
+
+class _Expert:
+    """Shared call planning for the mock expert clients."""
+    provider = None
+
+    def _plan(self, messages_text, stop=None):
+        sentence = sentence_of(messages_text)
+        latency, outcome = plan_call(self.provider, sentence)
+        answer = expert_answer(self.provider, sentence, outcome)
+        chunks, finish_reason = split_stream(answer, stop)
+        return latency, outcome, answer, chunks, finish_reason
+
+class MockMistralChat(_Expert):
+    provider = "Mistral"
+
+    def _response(self, messages, stop=None):
+        latency, outcome, answer, _, _ = self._plan(user_text(messages), stop)
+        return latency, outcome, SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=answer), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=token_count(str(messages)), completion_tokens=token_count(answer)),
+        )
+
+    def complete(self, model, messages, stop=None, **kwargs):
+        latency, outcome, response = self._response(messages, stop)
+        time.sleep(latency)
+        raise_for(self.provider, outcome)
+        return response
+
+    async def complete_async(self, model, messages, stop=None, **kwargs):
+        latency, outcome, response = self._response(messages, stop)
+        await asyncio.sleep(latency)
+        raise_for(self.provider, outcome)
+        return response
+
+    def _stream(self, messages, stop):
+        latency, outcome, _, chunks, finish_reason = self._plan(user_text(messages), stop)
+        prompt_tokens = token_count(str(messages))
+        completion_tokens = token_count("".join(chunks))
+
+        def event(chunk, last):
+            return SimpleNamespace(data=SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk), finish_reason="stop" if last else None)],
+                usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens) if last else None,
+            ))
+        return latency, outcome, _MockStream(chunks, chunk_delays(latency, chunks), event)
+
+    def stream(self, model, messages, stop=None, **kwargs):
+        latency, outcome, stream = self._stream(messages, stop)
+        if outcome in ("error", "rate_limit"):
+            time.sleep(latency * 0.3)
+            raise_for(self.provider, outcome)
+        return stream
+
+    async def stream_async(self, model, messages, stop=None, **kwargs):
+        latency, outcome, stream = self._stream(messages, stop)
+        if outcome in ("error", "rate_limit"):
+            await asyncio.sleep(latency * 0.3)
+            raise_for(self.provider, outcome)
+        return stream
+
+class MockMistral:
+    """Stand-in for mistralai.Mistral."""
+
+    def __init__(self, **kwargs):
+        self.chat = MockMistralChat()
+
+class MockAnthropicMessages(_Expert):
+    provider = "Anthropic"
+
+    def _message(self, system, messages, stop_sequences=None):
+        latency, outcome, answer, chunks, finish_reason = self._plan(user_text(messages), stop_sequences)
+        message = SimpleNamespace(
+            content=[SimpleNamespace(type="text", text=answer)],
+            stop_reason="end_turn",
+            usage=SimpleNamespace(input_tokens=token_count(system + str(messages)), output_tokens=token_count(answer)),
+        )
+        return latency, outcome, message, chunks, finish_reason
+
+    def create(self, model, messages, system="", **kwargs):
+        latency, outcome, message, _, _ = self._message(system, messages)
+        time.sleep(latency)
+        raise_for(self.provider, outcome)
+        return message
+
+    def stream(self, model, messages, system="", stop_sequences=None, **kwargs):
+        latency, outcome, message, chunks, finish_reason = self._message(system, messages, stop_sequences)
+        return _MockAnthropicStream(self.provider, latency, outcome, message, chunks, finish_reason)
+
+class _MockAnthropicStream:
+    """Stand-in for anthropic's MessageStreamManager and the MessageStream it yields (sync and async)."""
+
+    def __init__(self, provider, latency, outcome, message, chunks, finish_reason):
+        self.provider = provider
+        self.latency = latency
+        self.outcome = outcome
+        self.chunks = chunks
+        self.delays = chunk_delays(latency, chunks)
+        message.stop_reason = "stop_sequence" if finish_reason == "stop_sequence" else "end_turn"
+        message.usage.output_tokens = token_count("".join(chunks))
+        self.current_message_snapshot = message
+
+    def __enter__(self):
+        if self.outcome in ("error", "rate_limit"):
+            time.sleep(self.latency * 0.3)
+            raise_for(self.provider, self.outcome)
+        self.text_stream = self._text()
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    async def __aenter__(self):
+        if self.outcome in ("error", "rate_limit"):
+            await asyncio.sleep(self.latency * 0.3)
+            raise_for(self.provider, self.outcome)
+        self.text_stream = self._text_async()
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def _text(self):
+        for chunk, delay in zip(self.chunks, self.delays):
+            time.sleep(delay)
+            yield chunk
+
+    async def _text_async(self):
+        for chunk, delay in zip(self.chunks, self.delays):
+            await asyncio.sleep(delay)
+            yield chunk
+
+class MockAsyncAnthropicMessages(MockAnthropicMessages):
+    async def create(self, model, messages, system="", **kwargs):
+        latency, outcome, message, _, _ = self._message(system, messages)
+        await asyncio.sleep(latency)
+        raise_for(self.provider, outcome)
+        return message
+
+class MockAnthropic:
+    """Stand-in for anthropic.Anthropic."""
+
+    def __init__(self, **kwargs):
+        self.messages = MockAnthropicMessages()
+
+class MockAsyncAnthropic:
+    """Stand-in for anthropic.AsyncAnthropic."""
+
+    def __init__(self, **kwargs):
+        self.messages = MockAsyncAnthropicMessages()
+
+class MockGeminiModel(_Expert):
+    """Stand-in for google.generativeai.GenerativeModel."""
+    provider = "Gemini"
+
+    def __init__(self, model_name=None, generation_config=None, system_instruction="", **kwargs):
+        self.system_instruction = system_instruction or ""
+
+    def _chunk(self, text, finish_reason, usage):
+        return SimpleNamespace(
+            text=text,
+            candidates=[SimpleNamespace(
+                content=SimpleNamespace(parts=[SimpleNamespace(text=text)]),
+                finish_reason=SimpleNamespace(name=finish_reason) if finish_reason else 0,
+            )],
+            usage_metadata=usage,
+        )
+
+    def _stream(self, latency, events, usage):
+        """A streamed response; like the SDK's, it reports the usage of the whole generation."""
+        stream = _MockStream(events, self._stream_delays(latency, events), lambda event, last: event)
+        stream.usage_metadata = usage
+        return stream
+
+    def _stream_delays(self, latency, events):
+        """Chunk delays once the time to first chunk has already been waited before returning the stream."""
+        delays = chunk_delays(latency, events)
+        delays[0] -= latency * 0.3
+        return delays
+
+    def _plan_content(self, contents, generation_config):
+        stop = (generation_config or {}).get("stop_sequences")
+        latency, outcome, answer, chunks, _ = self._plan(contents, stop)
+        usage = SimpleNamespace(prompt_token_count=token_count(self.system_instruction + contents),
+                                candidates_token_count=token_count("".join(chunks)))
+        events = [self._chunk(chunk, "STOP" if i == len(chunks) - 1 else None, usage if i == len(chunks) - 1 else None)
+                  for i, chunk in enumerate(chunks)]
+        return latency, outcome, answer, usage, events
+
+    def generate_content(self, contents, generation_config=None, stream=False, request_options=None, **kwargs):
+        latency, outcome, answer, usage, events = self._plan_content(contents, generation_config)
+        if not stream:
+            time.sleep(latency)
+            raise_for(self.provider, outcome)
+            return self._chunk(answer, "STOP", usage)
+        time.sleep(latency * 0.3)
+        raise_for(self.provider, outcome)
+        return self._stream(latency, events, usage)
+
+    async def generate_content_async(self, contents, generation_config=None, stream=False, request_options=None,
+                                     **kwargs):
+        latency, outcome, answer, usage, events = self._plan_content(contents, generation_config)
+        if not stream:
+            await asyncio.sleep(latency)
+            raise_for(self.provider, outcome)
+            return self._chunk(answer, "STOP", usage)
+        await asyncio.sleep(latency * 0.3)
+        raise_for(self.provider, outcome)
+        return self._stream(latency, events, usage)
+
+class MockOpenAICompletions:
+    provider = "OpenAI"
+
+    def _response(self, messages, response_format=None, **kwargs):
+        system = messages[0]["content"]
+        prompt = user_text(messages)
+        latency, outcome = plan_call(self.provider, prompt)
+        content = arbiter_answer(self.provider, prompt, outcome, batch="# Multiple Sentences" in system)
+        return latency, outcome, SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=token_count(system + prompt), completion_tokens=token_count(content)),
+        )
+
+    def create(self, model, messages, **kwargs):
+        latency, outcome, response = self._response(messages, **kwargs)
+        time.sleep(latency)
+        raise_for(self.provider, outcome)
+        return response
+
+class MockAsyncOpenAICompletions(MockOpenAICompletions):
+    async def create(self, model, messages, **kwargs):
+        latency, outcome, response = self._response(messages, **kwargs)
+        await asyncio.sleep(latency)
+        raise_for(self.provider, outcome)
+        return response
+
+class MockOpenAI:
+    """Stand-in for openai.OpenAI."""
+
+    def __init__(self, **kwargs):
+        self.chat = SimpleNamespace(completions=MockOpenAICompletions())
+
+class MockAsyncOpenAI:
+    """Stand-in for openai.AsyncOpenAI."""
+
+    def __init__(self, **kwargs):
+        self.chat = SimpleNamespace(completions=MockAsyncOpenAICompletions())
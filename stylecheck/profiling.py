@@ -0,0 +1,154 @@
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# On-demand sampling profiles of single requests. A request that asks for one
+# (X-Profile header, or "profile" in a /check body) is sampled from a background
+# thread: every STYLECHECK_PROFILE_INTERVAL seconds it records the Python stack of
+# the request's thread and of the pool threads running the request's experts
+# and arbiter calls (they join through stage_timings.bind_context). Nothing is
+# sampled for other requests; they only pay for a header lookup.
+# Off by default: any client could otherwise make the server sample itself and
+# write files. Only the newest STYLECHECK_PROFILE_MAX_FILES saved profiles are kept.
+PROFILING_ENABLED = os.getenv("STYLECHECK_PROFILING", "0") == "1"
+PROFILE_INTERVAL = float(os.getenv("STYLECHECK_PROFILE_INTERVAL", "0.002"))
+PROFILE_DIR = os.getenv("STYLECHECK_PROFILE_DIR", "profiles")
+PROFILE_MAX_FILES = int(os.getenv("STYLECHECK_PROFILE_MAX_FILES", "100"))
+# Functions listed in a returned profile
+PROFILE_TOP = 40
+
+MODES = ("return", "save")
+
+_active = contextvars.ContextVar("stylecheck_profile", default=None)
+
+def profile_mode(value):
+    """"return" or "save" for a truthy X-Profile header or "profile" flag, else None ("1"/true mean "return")."""
+    if not PROFILING_ENABLED or value in (None, False, "", "0", "false"):
+        return None
+    return value if value in MODES else "return"
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Samples the stacks of the threads attached to it until stopped."""
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()  # (outermost, ..., innermost frame label) -> samples
+        self.samples = 0
+        self.duration = 0.0
+        self._threads = Counter()  # thread ident -> attach depth
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler = None
+        self._started = None
+
+    def start(self):
+        self.attach_thread()
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run, name="stylecheck-profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._sampler.join()
+        self.duration = time.perf_counter() - self._started
+        self.detach_thread()
+        return self
+
+    def attach_thread(self):
+        with self._lock:
+            self._threads[threading.get_ident()] += 1
+
+    def detach_thread(self):
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] -= 1
+            if self._threads[ident] <= 0:
+                del self._threads[ident]
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            with self._lock:
+                threads = list(self._threads)
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[tuple(reversed(stack))] += 1
+                    self.samples += 1
+
+    def functions(self, limit=PROFILE_TOP):
+        """Hottest functions by samples on top of the stack ("self"), with samples anywhere in it ("total")."""
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                total[label] += count
+        ranked = sorted(total, key=lambda label: (own[label], total[label]), reverse=True)[:limit]
+        return [{"function": label, "self": own[label], "total": total[label],
+                 "self_share": own[label] / self.samples if self.samples else 0.0} for label in ranked]
+
+    def folded(self):
+        """Collapsed stacks, one "frame;frame;frame count" line each, as read by flamegraph.pl and speedscope."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def save(self, directory=PROFILE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"profile-{time.strftime('%Y%m%d-%H%M%S')}-{os.urandom(3).hex()}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.folded())
+        remove_old_profiles(directory)
+        return path
+
+    def as_dict(self):
+        return {
+            "duration": self.duration,
+            "interval": self.interval,
+            "samples": self.samples,
+            "functions": self.functions(),
+        }
+
+def remove_old_profiles(directory, keep=PROFILE_MAX_FILES):
+    """Delete all but the newest `keep` saved profiles in directory."""
+    # File names start with the save time, so they sort oldest first
+    saved = sorted(name for name in os.listdir(directory) if name.startswith("profile-") and name.endswith(".folded"))
+    for name in saved[:max(len(saved) - keep, 0)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass  # Another worker removed it first
+
+def start_profile():
+    """Start sampling the current request; returns (profiler, token) for finish_profile()."""
+    profiler = SamplingProfiler().start()
+    return profiler, _active.set(profiler)
+
+def finish_profile(profiler, token, mode):
+    """Stop sampling; returns the profile summary, with the saved stack file's path in "save" mode."""
+    _active.reset(token)
+    profiler.stop()
+    summary = profiler.as_dict()
+    if mode == "save":
+        summary["file"] = profiler.save()
+    return summary
+
+def run_in_profile(func, *args, **kwargs):
+    """func(*args, **kwargs), with this thread sampled too if the calling request is being profiled."""
+    profiler = _active.get()
+    if profiler is None:
+        return func(*args, **kwargs)
+    profiler.attach_thread()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.detach_thread()
@@ -0,0 +1,111 @@
+import os
+import threading
+
+# Process-wide registry of provider SDK clients. Each client owns an HTTP
+# connection pool, so building it once keeps keep-alive and TLS sessions warm
+# across requests. The SDK clients are safe to share between Flask threads; the
+# async clients (and Mistral's *_async methods) serve the ASGI app's event loop.
+#
+# Retries are done by llm_integrations.call_provider, in step with its rate
+# limiters, so the Anthropic and OpenAI clients' own retries are turned off.
+#
+# The SDKs are heavy to import, so each one is only imported when its client is
+# first built: a process with an expert disabled never loads that SDK.
+_clients = {}
+_clients_pid = os.getpid()
+_lock = threading.Lock()
+
+def get_client(key, factory):
+    """Return the shared client for key, building it with factory on first use."""
+    global _clients_pid
+    client = _clients.get(key)
+    if client is not None and _clients_pid == os.getpid():
+        return client
+
+    with _lock:
+        # Connection pools must not be shared with a forked worker process
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        client = _clients.get(key)
+        if client is None:
+            client = factory()
+            _clients[key] = client
+    return client
+
+def reset_clients():
+    """Drop every cached client, e.g. after rotating API keys."""
+    with _lock:
+        _clients.clear()
+
+def mock_enabled():
+    """True when STYLECHECK_MOCK_PROVIDERS=1 swaps in the offline clients from mock_providers."""
+    return os.getenv("STYLECHECK_MOCK_PROVIDERS", "0") != "0"
+
+def get_mistral_client():
+    """Get the shared Mistral client."""
+    def build():
+        if mock_enabled():
+            from mock_providers import MockMistral as Mistral
+        else:
+            from mistralai import Mistral
+        return Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
+    return get_client("mistral", build)
+
+def get_anthropic_client():
+    """Get the shared Anthropic client."""
+    def build():
+        if mock_enabled():
+            from mock_providers import MockAnthropic
+            return MockAnthropic()
+        import anthropic
+        return anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"), max_retries=0)
+    return get_client("anthropic", build)
+
+def get_openai_client():
+    """Get the shared OpenAI client."""
+    def build():
+        if mock_enabled():
+            from mock_providers import MockOpenAI as OpenAI
+        else:
+            from openai import OpenAI
+        return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    return get_client("openai", build)
+
+def get_async_anthropic_client():
+    """Get the shared asyncio Anthropic client for the ASGI app."""
+    def build():
+        if mock_enabled():
+            from mock_providers import MockAsyncAnthropic
+            return MockAsyncAnthropic()
+        import anthropic
+        return anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"), max_retries=0)
+    return get_client("anthropic-async", build)
+
+def get_async_openai_client():
+    """Get the shared asyncio OpenAI client for the ASGI app."""
+    def build():
+        if mock_enabled():
+            from mock_providers import MockAsyncOpenAI as AsyncOpenAI
+        else:
+            from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    return get_client("openai-async", build)
+
+def get_gemini_model(model_name, generation_config, system_instruction):
+    """Get a shared Gemini model, configuring the SDK when it is first built."""
+    def build():
+        if mock_enabled():
+            from mock_providers import MockGeminiModel
+            return MockGeminiModel(model_name=model_name, generation_config=generation_config,
+                                   system_instruction=system_instruction)
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        return genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=generation_config,
+            system_instruction=system_instruction,
+        )
+
+    key = ("gemini", model_name, system_instruction, tuple(sorted(generation_config.items())))
+    return get_client(key, build)
@@ -0,0 +1,169 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+class RateLimitTimeout(Exception):
+    """A call could not be admitted by a provider's rate limiter within its wait budget."""
+
+class TokenBucket:
+    """Refills at `per_minute` units a minute, holding at most one minute's worth."""
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` units are available (amounts above capacity wait for a full bucket)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.available
+        return max(missing / self.rate, 0.0)
+
+    def take(self, amount):
+        self.available -= min(amount, self.capacity)
+
+class RateLimiter:
+    """Client-side requests/min and tokens/min limits for one provider.
+
+    Callers are admitted strictly in arrival order: a call only takes from the
+    buckets once every call queued before it has been admitted or has given
+    up, so a burst drains at the provider's limit instead of hammering it.
+    A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, name, requests_per_minute=0, tokens_per_minute=0, max_wait=10):
+        self.name = name
+        self.max_wait = max_wait
+        self._buckets = []
+        if requests_per_minute:
+            self._buckets.append(("requests", TokenBucket(requests_per_minute)))
+        if tokens_per_minute:
+            self._buckets.append(("tokens", TokenBucket(tokens_per_minute)))
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._stats = {"admitted": 0, "timed_out": 0, "queued": 0, "wait_seconds": 0.0}
+
+    @property
+    def enabled(self):
+        return bool(self._buckets)
+
+    def _try_admit(self, waiter, tokens):
+        """Admit waiter if it is first in line and the buckets allow it; else return the wait in seconds."""
+        if self._queue[0] is not waiter:
+            return None
+        now = time.monotonic()
+        amounts = {"requests": 1, "tokens": tokens}
+        wait = max(bucket.wait_time(amounts[kind], now) for kind, bucket in self._buckets)
+        if wait > 0:
+            return wait
+        for kind, bucket in self._buckets:
+            bucket.take(amounts[kind])
+        return 0.0
+
+    def _enqueue(self, timeout):
+        budget = self.max_wait if timeout is None else min(self.max_wait, timeout)
+        waiter = object()
+        self._queue.append(waiter)
+        if len(self._queue) > 1:
+            self._stats["queued"] += 1
+        return waiter, time.monotonic(), time.monotonic() + budget
+
+    def _leave(self, waiter, started, admitted):
+        self._queue.remove(waiter)
+        self._stats["admitted" if admitted else "timed_out"] += 1
+        self._stats["wait_seconds"] += time.monotonic() - started
+        self._cond.notify_all()
+
+    def acquire(self, tokens=1, timeout=None):
+        """Block until one request of `tokens` estimated tokens is admitted.
+
+        Waits at most max_wait seconds (or `timeout`, if shorter) and raises
+        RateLimitTimeout when the call cannot be admitted in that time.
+        """
+        if not self.enabled:
+            return
+        with self._cond:
+            waiter, started, deadline = self._enqueue(timeout)
+            admitted = False
+            try:
+                while True:
+                    wait = self._try_admit(waiter, tokens)
+                    if wait == 0:
+                        admitted = True
+                        return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or (wait is not None and wait > remaining):
+                        raise RateLimitTimeout(f"{self.name}: not admitted within {self.max_wait:g}s")
+                    self._cond.wait(min(wait, remaining) if wait is not None else remaining)
+            finally:
+                self._leave(waiter, started, admitted)
+
+    async def acquire_async(self, tokens=1, timeout=None):
+        """asyncio version of acquire(); sleeps instead of blocking the event loop."""
+        if not self.enabled:
+            return
+        with self._cond:
+            waiter, started, deadline = self._enqueue(timeout)
+        admitted = False
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_admit(waiter, tokens)
+                if wait == 0:
+                    admitted = True
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or (wait is not None and wait > remaining):
+                    raise RateLimitTimeout(f"{self.name}: not admitted within {self.max_wait:g}s")
+                # Calls queued behind others poll until they reach the front
+                await asyncio.sleep(min(wait if wait is not None else 0.01, remaining))
+        finally:
+            with self._cond:
+                self._leave(waiter, started, admitted)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["waiting"] = len(self._queue)
+            now = time.monotonic()
+            for kind, bucket in self._buckets:
+                bucket.wait_time(0, now)
+                stats[f"{kind}_available"] = round(bucket.available, 1)
+        stats["enabled"] = self.enabled
+        return stats
+
+def estimate_tokens(*texts, completion=256):
+    """Rough token count of a call: about four characters a token, plus the expected completion."""
+    return sum(len(text) for text in texts) // 4 + completion
+
+def status_code(exc):
+    """HTTP status of a provider SDK error, if it carries one."""
+    for attribute in ("status_code", "code", "status"):
+        value = getattr(exc, attribute, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+def is_transient(exc):
+    """Errors worth retrying: rate limits, overload and server-side failures."""
+    code = status_code(exc)
+    return code is not None and (code in (408, 409, 429) or code >= 500)
+
+def retry_after(exc):
+    """Seconds the provider asked us to wait in a Retry-After header, if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, base, cap):
+    """Exponential backoff with full jitter for the given 0-based retry attempt."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,63 @@
+import re
+
+# Abbreviations that are always followed by more of the sentence
+TITLES = {"mr", "mrs", "ms", "dr", "prof", "vs", "e.g", "i.e", "approx"}
+
+# Abbreviations that may also end a sentence ("He lives on Main St. He likes
+# it."): the period is a boundary when the next word starts with a capital
+ABBREVIATIONS = {
+    "sr", "jr", "st", "etc", "fig", "inc", "ltd", "co", "jan", "feb", "mar", "apr",
+    "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec", "a.m", "p.m", "u.s",
+}
+
+# Terminal punctuation (plus any closing quotes/brackets) followed by whitespace,
+# or a line break
+BOUNDARY_PATTERN = re.compile(r'[.!?]+["\'”’)\]]*(?=\s|$)|\n+')
+WORD_BEFORE_PATTERN = re.compile(r'([\w.]+)\.$')
+# First letter or digit after a boundary, skipping opening quotes and brackets
+NEXT_WORD_PATTERN = re.compile(r'\s*["\'“‘(\[]*(\w)')
+
+def is_abbreviation(text, end):
+    """True when the period ending at text[end - 1] belongs to an abbreviation or initial mid-sentence."""
+    match = WORD_BEFORE_PATTERN.search(text[:end])
+    if not match:
+        return False
+    word = match.group(1).lower()
+    # Single-letter initials like "J." in "J. K. Rowling"
+    if len(word) == 1 and word.isalpha():
+        return True
+    if word in TITLES:
+        return True
+    if word in ABBREVIATIONS:
+        next_word = NEXT_WORD_PATTERN.match(text, end)
+        return not (next_word and next_word.group(1).isupper())
+    return False
+
+def split_sentences(text):
+    """Split text into (sentence, start, end) triples with character offsets into text.
+
+    A fast rule-based segmenter: sentences end at ., ! or ? followed by
+    whitespace (skipping titles, initials, decimals, and abbreviations not
+    followed by a capitalized word) or at a line break. Surrounding whitespace is excluded from each span.
+    """
+    sentences = []
+    start = 0
+    for match in BOUNDARY_PATTERN.finditer(text):
+        end = match.end()
+        if match.group(0).startswith("\n"):
+            end = match.start()
+        elif match.group(0) == "." and is_abbreviation(text, end):
+            continue
+        _append_span(text, start, end, sentences)
+        start = match.end()
+    _append_span(text, start, len(text), sentences)
+    return sentences
+
+def _append_span(text, start, end, sentences):
+    """Append text[start:end] without its surrounding whitespace, if anything is left."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if start < end:
+        sentences.append((text[start:end], start, end))
@@ -0,0 +1,190 @@
+import os
+import copy
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+
+# How often a caller waiting on another process's lock file retries it
+LOCK_POLL_INTERVAL = 0.05
+
+class SingleFlightTimeout(TimeoutError):
+    """The shared run did not finish before the waiting caller's deadline."""
+
+def copy_error(error):
+    """A copy of a shared run's exception for one waiter, so waiters don't share one __traceback__."""
+    try:
+        return copy.copy(error)
+    except Exception:
+        return error
+
+def remaining(deadline):
+    """Seconds left before a time.monotonic() deadline (never negative), or None without one."""
+    return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for it and receive a copy of its result (or of its exception).
+    With `lock_dir` set, the running caller also holds an flock on a
+    per-key file, so a worker process starting the same key waits for the
+    first one and can then pick its result up from a shared cache.
+
+    Waiting is bounded by the caller's deadline: a follower raises
+    SingleFlightTimeout when the shared run outlasts it, and a process that
+    cannot get the lock file in time runs func without it.
+    """
+
+    def __init__(self, lock_dir=None):
+        self.lock_dir = lock_dir
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "followers": 0, "process_waits": 0, "lock_timeouts": 0, "timeouts": 0}
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    def do(self, key, func, recheck=None, deadline=None):
+        """Return func(), shared with concurrent callers of the same key.
+
+        `recheck()` is tried after waiting on another process; a non-None
+        value is returned instead of calling func. `deadline` is a
+        time.monotonic() value after which this caller stops waiting.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._stats["leaders" if leader else "followers"] += 1
+
+        if not leader:
+            if not call.done.wait(remaining(deadline)):
+                with self._lock:
+                    self._stats["timeouts"] += 1
+                raise SingleFlightTimeout(f"Shared run for {key} still in flight at the deadline")
+            if call.error is not None:
+                raise copy_error(call.error) from call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            with self._process_lock(key, deadline) as waited:
+                result = recheck() if waited and recheck else None
+                if result is None:
+                    result = func()
+            # Followers copy from a snapshot taken before the leader's caller can mutate it
+            call.result = copy.deepcopy(result)
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @contextmanager
+    def _process_lock(self, key, deadline=None):
+        """Hold an exclusive flock on key's lock file; yields whether another process held it first.
+
+        If the other process still holds it at the deadline, the body runs without the lock.
+        """
+        if not self.lock_dir:
+            yield False
+            return
+        try:
+            import fcntl
+        except ImportError:
+            # No flock on this platform: coalesce within the process only
+            yield False
+            return
+
+        path = os.path.join(self.lock_dir, f"{key}.lock")
+        with open(path, "a") as lock_file:
+            waited = False
+            locked = False
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked = True
+                    break
+                except BlockingIOError:
+                    if not waited:
+                        waited = True
+                        with self._lock:
+                            self._stats["process_waits"] += 1
+                    left = remaining(deadline)
+                    if left == 0:
+                        with self._lock:
+                            self._stats["lock_timeouts"] += 1
+                        break
+                    time.sleep(LOCK_POLL_INTERVAL if left is None else min(LOCK_POLL_INTERVAL, left))
+            try:
+                yield waited
+            finally:
+                if locked:
+                    # Removing the file can let a late arrival lock a fresh one and
+                    # repeat the work, which is cheaper than keeping one file per text
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
+
+class AsyncSingleFlight:
+    """asyncio version of SingleFlight, coalescing coroutines on one event loop.
+
+    The shared run is its own task, so a caller that is cancelled (e.g. a
+    client hanging up) does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._stats = {"leaders": 0, "followers": 0, "timeouts": 0}
+
+    def _finished(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Retrieve the exception even when every caller has gone away
+            task.exception()
+
+    async def do(self, key, func, deadline=None):
+        """Return a copy of await func(), shared with concurrent callers of the same key.
+
+        A caller still waiting at `deadline` (time.monotonic()) gets SingleFlightTimeout;
+        the shared run carries on for the others.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self._stats["leaders"] += 1
+            task = self._calls[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda finished: self._finished(key, finished))
+        else:
+            self._stats["followers"] += 1
+        # Shielded, so a waiter that is cancelled or gives up leaves the run going for the others
+        done, _ = await asyncio.wait({asyncio.shield(task)}, timeout=remaining(deadline))
+        if not done:
+            self._stats["timeouts"] += 1
+            raise SingleFlightTimeout(f"Shared run for {key} still in flight at the deadline")
+        if task.cancelled():
+            raise asyncio.CancelledError()
+        if task.exception() is not None:
+            # Every waiter of the task would otherwise raise the same exception object
+            raise copy_error(task.exception()) from task.exception()
+        return copy.deepcopy(task.result())
+
+    def stats(self):
+        return {**self._stats, "in_flight": len(self._calls)}
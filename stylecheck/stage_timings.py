@@ -0,0 +1,228 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from profiling import run_in_profile
+from logs import get_logger
+
+# Per-request stage timing and token accounting. A request that runs inside
+# track_timings() collects wall time, queue waits, retries, cache status and
+# token usage from every stage of the pipeline that records into it; outside
+# one, recording is a no-op. Finished requests are folded into timing_stats.
+# STYLECHECK_TIMINGS=0 turns recording off.
+TIMINGS_ENABLED = os.getenv("STYLECHECK_TIMINGS", "1") != "0"
+
+_current = contextvars.ContextVar("stylecheck_timings", default=None)
+
+logger = get_logger("stage_timings")
+
+# (prompt, completion) token count attributes of each SDK's usage object
+USAGE_FIELDS = [
+    ("prompt_tokens", "completion_tokens"),  # OpenAI, Mistral
+    ("input_tokens", "output_tokens"),  # Anthropic
+    ("prompt_token_count", "candidates_token_count"),  # Gemini
+]
+
+def usage_counts(usage):
+    """{"prompt_tokens", "completion_tokens"} from any provider SDK's usage object; {} without one."""
+    if usage is None:
+        return {}
+    for prompt_field, completion_field in USAGE_FIELDS:
+        if getattr(usage, prompt_field, None) is not None:
+            return {
+                "prompt_tokens": getattr(usage, prompt_field) or 0,
+                "completion_tokens": getattr(usage, completion_field, 0) or 0,
+            }
+    return {}
+
+class RequestTimings:
+    """Timings and token counts for one request, summed per stage ("experts", "arbiter") and provider.
+
+    Updated from the expert threads concurrently, so every change takes the lock.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.total = None
+        self._cache = {}
+        self._stages = {"experts": {}, "arbiter": {}}
+        self._lock = threading.Lock()
+
+    def add(self, stage, name, **amounts):
+        with self._lock:
+            entry = self._stages.setdefault(stage, {}).setdefault(name, {})
+            for field, amount in amounts.items():
+                entry[field] = entry.get(field, 0) + amount
+
+    def count_cache(self, status):
+        with self._lock:
+            self._cache[status] = self._cache.get(status, 0) + 1
+
+    def finish(self):
+        self.total = time.monotonic() - self.started
+
+    def as_dict(self):
+        """The "timings" block of a response."""
+        with self._lock:
+            stages = {stage: {name: dict(entry) for name, entry in entries.items()}
+                      for stage, entries in self._stages.items()}
+            cache = dict(self._cache)
+        entries = [entry for entries in stages.values() for entry in entries.values()]
+        return {
+            "total": self.total if self.total is not None else time.monotonic() - self.started,
+            "cache": cache,
+            **stages,
+            "tokens": {
+                "prompt_tokens": sum(entry.get("prompt_tokens", 0) for entry in entries),
+                "completion_tokens": sum(entry.get("completion_tokens", 0) for entry in entries),
+            },
+        }
+
+    def summary(self):
+        """One log line: total time, cache status, then each provider's time and tokens."""
+        data = self.as_dict()
+        parts = [f"total {data['total']:.3f}s"]
+        if data["cache"]:
+            parts.append("cache " + ",".join(f"{status}={count}" for status, count in data["cache"].items()))
+        for stage in ("experts", "arbiter"):
+            for name, entry in data[stage].items():
+                part = f"{name} {entry.get('seconds', 0):.3f}s"
+                if "prompt_tokens" in entry:
+                    part += f" {entry['prompt_tokens']}+{entry['completion_tokens']} tokens"
+                parts.append(part)
+        return ", ".join(parts)
+
+def current_timings():
+    """The RequestTimings of the request running in this context, or None."""
+    return _current.get()
+
+def record(stage, name, **amounts):
+    """Add amounts (seconds, counts, tokens) to a provider's entry in the current request's timings."""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(stage, name, **amounts)
+
+def record_cache(status):
+    """Count a pipeline cache lookup ("hit", "miss", "bypass" or "coalesced") for the current request."""
+    timings = _current.get()
+    if timings is not None:
+        timings.count_cache(status)
+
+def bind_context(func):
+    """func, run in a copy of the caller's context, so pool threads record into (and are profiled with) the caller's request."""
+    context = contextvars.copy_context()
+    # A context can only be entered by one thread at a time, so each call gets its own copy
+    return lambda *args, **kwargs: context.copy().run(run_in_profile, func, *args, **kwargs)
+
+def timed_stage(stage, name, succeeded=lambda result: result is not None):
+    """Record calls, failures and wall time of a sync or async function under stage/name."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.monotonic()
+                result = await func(*args, **kwargs)
+                record(stage, name, calls=1, failures=int(not succeeded(result)), seconds=time.monotonic() - started)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            result = func(*args, **kwargs)
+            record(stage, name, calls=1, failures=int(not succeeded(result)), seconds=time.monotonic() - started)
+            return result
+        return wrapper
+    return decorator
+
+class TimingStats:
+    """In-memory aggregate of finished requests' timings.
+
+    Keeps running totals per stage and provider, plus the per-request seconds
+    of the last `window` requests for percentiles, and each provider's share
+    of all recorded time and tokens.
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._requests = 0
+        self._cache = {}
+        self._totals = {}  # "experts.Mistral" -> summed amounts
+        self._recent = {}  # "total" / "experts.Mistral" -> deque of per-request seconds
+        self._lock = threading.Lock()
+
+    def _sample(self, key, seconds):
+        self._recent.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def observe(self, timings):
+        data = timings.as_dict()
+        with self._lock:
+            self._requests += 1
+            for status, count in data["cache"].items():
+                self._cache[status] = self._cache.get(status, 0) + count
+            self._sample("total", data["total"])
+            for stage in ("experts", "arbiter"):
+                for name, entry in data[stage].items():
+                    key = f"{stage}.{name}"
+                    totals = self._totals.setdefault(key, {})
+                    for field, amount in entry.items():
+                        totals[field] = totals.get(field, 0) + amount
+                    if "seconds" in entry:
+                        self._sample(key, entry["seconds"])
+
+    @staticmethod
+    def _percentiles(values):
+        if not values:
+            return {}
+        ordered = sorted(values)
+        return {
+            "mean": sum(ordered) / len(ordered),
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)],
+        }
+
+    def stats(self):
+        with self._lock:
+            totals = {key: dict(entry) for key, entry in self._totals.items()}
+            recent = {key: list(values) for key, values in self._recent.items()}
+            stats = {"requests": self._requests, "cache": dict(self._cache)}
+
+        all_seconds = sum(entry.get("seconds", 0) for entry in totals.values())
+        all_tokens = sum(entry.get("prompt_tokens", 0) + entry.get("completion_tokens", 0)
+                         for entry in totals.values())
+        stats["total"] = self._percentiles(recent.get("total", []))
+        stats["stages"] = {}
+        for key, entry in sorted(totals.items()):
+            tokens = entry.get("prompt_tokens", 0) + entry.get("completion_tokens", 0)
+            stats["stages"][key] = {
+                **entry,
+                **self._percentiles(recent.get(key, [])),
+                "share_of_time": entry.get("seconds", 0) / all_seconds if all_seconds else 0.0,
+                "share_of_tokens": tokens / all_tokens if all_tokens else 0.0,
+            }
+        return stats
+
+timing_stats = TimingStats(window=int(os.getenv("STYLECHECK_TIMINGS_WINDOW", "1000")))
+
+@contextmanager
+def track_timings():
+    """Collect the timings of the pipeline work done inside the block; yields its RequestTimings.
+
+    On exit the request is added to timing_stats and summarized in the log.
+    """
+    timings = RequestTimings()
+    if not TIMINGS_ENABLED:
+        yield timings
+        return
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+        timings.finish()
+        timing_stats.observe(timings)
+        logger.info("Timings: %s", timings.summary())
@@ -14,7 +14,7 @@ async function checkGrammar() {
         checkButton.classList.add('loading');
         resultsSection.style.display = 'none';
 
-        const response = await fetch('/check', {
+        const response = await fetch('/check/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -26,13 +26,23 @@ async function checkGrammar() {
             throw new Error('Server error');
         }
 
-        const data = await response.json();
-        
-        if (data.error) {
-            throw new Error(data.error);
-        }
+        // Render each event as it arrives: expert suggestions first, then the final result
+        const results = { expertCorrections: [] };
+        await readEventStream(response, (event, data) => {
+            if (event === 'error') {
+                throw new Error(data.error);
+            }
+            if (event === 'expert') {
+                results.expertCorrections.push(data);
+            } else if (event === 'result') {
+                Object.assign(results, data, { complete: true });
+            }
+            displayResults(results, inputText);
+        });
 
-        displayResults(data, inputText);
+        if (!results.complete) {
+            throw new Error('Stream ended before the final result');
+        }
     } catch (error) {
         console.error('Error:', error);
         alert('An error occurred while checking the text. Please try again.');
@@ -43,32 +53,92 @@ async function checkGrammar() {
     }
 }
 
+async function readEventStream(response, onEvent) {
+    // Parse a text/event-stream body into (event, data) callbacks
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) {
+            break;
+        }
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            message.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) {
+                    event = line.slice(7);
+                } else if (line.startsWith('data: ')) {
+                    data += line.slice(6);
+                }
+            });
+            onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
+// Text from the user or an LLM, made safe to put into innerHTML
+function escapeHtml(text) {
+    return String(text)
+        .replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;')
+        .replace(/"/g, '&quot;')
+        .replace(/'/g, '&#39;');
+}
+
 function displayResults(data, inputText) {
     const resultsSection = document.getElementById('results');
     const correctedTextDiv = document.getElementById('correctedText');
+    const expertCorrectionsDiv = document.getElementById('expertCorrections');
     const correctionsDiv = document.getElementById('corrections');
 
+    // Expert suggestions arrive first and stay visible next to the final result
+    const expertCorrections = data.expertCorrections || [];
+    expertCorrectionsDiv.innerHTML = expertCorrections.map(expert => `
+        <div class="expert-item${expert.correction ? '' : ' expert-failed'}">
+            <strong>${escapeHtml(expert.name)}:</strong> ${escapeHtml(expert.correction || 'no answer')}
+        </div>
+    `).join('');
+
+    // Until the final result arrives, only the expert suggestions are shown
+    if (!data.complete) {
+        correctedTextDiv.textContent = 'Waiting for the final analysis...';
+        correctionsDiv.innerHTML = '';
+        resultsSection.style.display = 'block';
+        return;
+    }
+
     // Display corrected text
-    correctedTextDiv.textContent = data.corrected_phrase;
+    correctedTextDiv.textContent = data.corrected_text;
 
     // Display corrections
     correctionsDiv.innerHTML = data.corrections.map(correction => {
         // Create a copy of the input text and wrap the original error in a span
-        const highlightedText = inputText.replace(
-            correction.original,
-            `<span class="highlight-error">${correction.original}</span>`
+        const original = escapeHtml(correction.original);
+        const highlightedText = escapeHtml(inputText).replace(
+            original,
+            () => `<span class="highlight-error">${original}</span>`
         );
         
         return `
         <div class="correction-item">
             <div class="correction-header">
-                <div class="correction-number">${correction.id}</div>
-                <strong>Correction ${correction.id}</strong>
+                <div class="correction-number">${escapeHtml(correction.id)}</div>
+                <strong>Correction ${escapeHtml(correction.id)}</strong>
             </div>
             <div>
                 <div><strong>Original:</strong> <span class="original">${highlightedText}</span></div>
-                <div><strong>Corrected:</strong> <span class="corrected">${correction.corrected}</span></div>
-                <div class="explanation"><strong>Explanation:</strong> ${correction.explanation}</div>
+                <div><strong>Corrected:</strong> <span class="corrected">${escapeHtml(correction.corrected)}</span></div>
+                <div class="explanation"><strong>Explanation:</strong> ${escapeHtml(correction.explanation)}</div>
             </div>
         </div>
     `}).join('');
@@ -80,7 +150,7 @@ function displayResults(data, inputText) {
             <div class="correction-header">
                 <strong>Overall Analysis</strong>
             </div>
-            <div class="explanation">${data.overall_explanation}</div>
+            <div class="explanation">${escapeHtml(data.overall_explanation)}</div>
         </div>
         `;
     }
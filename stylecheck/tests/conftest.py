@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The stylecheck modules import each other by bare name, so the tests run with
+# the stylecheck directory on the path, the way the app and scripts do
+STYLECHECK_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, STYLECHECK_ROOT)
+os.environ.setdefault("STYLECHECK_LOG_FILE", os.devnull)
@@ -0,0 +1,69 @@
+from consensus import edit_size, experts_agree, normalize_sentence, vote_corrections
+
+TEXT = "She go to school yesterday."
+
+def test_unanimous_experts():
+    result = vote_corrections(TEXT, [(name, "She went to school yesterday.") for name in ("A", "B", "C")])
+    assert result["corrected_phrase"] == "She went to school yesterday."
+    assert result["corrections"] == [{
+        "original": "go",
+        "corrected": "went",
+        "explanation": "3 of 3 experts (A, B, C) made this change.",
+    }]
+    assert result["overall_explanation"] == "All 3 experts proposed the same correction."
+    assert result["arbiter"] == "local"
+
+def test_split_vote_applies_majority_edits_only():
+    result = vote_corrections(TEXT, [
+        ("A", "She went to school yesterday."),
+        ("B", "She went to the school yesterday."),
+        ("C", "She goes to school yesterday."),
+    ])
+    assert result["corrected_phrase"] == "She went to school yesterday."
+    assert [c["corrected"] for c in result["corrections"]] == ["went"]
+    assert result["corrections"][0]["explanation"] == "2 of 3 experts (A, B) made this change."
+    assert result["overall_explanation"] == "Applied the changes that a majority of the 3 experts agreed on."
+
+def test_tie_applies_neither_edit():
+    result = vote_corrections(TEXT, [
+        ("A", "She went to school yesterday."),
+        ("B", "She went to school yesterday."),
+        ("C", "She goes to school yesterday."),
+        ("D", "She goes to school yesterday."),
+    ])
+    assert result["corrected_phrase"] == TEXT
+    assert result["corrections"] == []
+    assert result["overall_explanation"] == "The experts found nothing that a majority agreed needed correcting."
+
+def test_min_votes_lowers_the_bar():
+    result = vote_corrections(TEXT, [
+        ("A", "She went to school yesterday."),
+        ("B", "She went to school yesterday."),
+        ("C", "She goes to school yesterday."),
+        ("D", "She goes to school yesterday."),
+    ], min_votes=2)
+    # Both edits have two votes and overlap, so only one of them is applied
+    assert len(result["corrections"]) == 1
+    assert result["corrected_phrase"] in ("She went to school yesterday.", "She goes to school yesterday.")
+
+def test_no_expert_answers():
+    result = vote_corrections(TEXT, [])
+    assert result["corrected_phrase"] == TEXT
+    assert result["corrections"] == []
+    assert result["overall_explanation"] == "The experts found nothing that a majority agreed needed correcting."
+
+def test_separate_edits_are_applied_together():
+    text = "He go to school and eat lunch."
+    result = vote_corrections(text, [(name, "He goes to school and eats lunch.") for name in ("A", "B")])
+    assert result["corrected_phrase"] == "He goes to school and eats lunch."
+    assert [(c["original"], c["corrected"]) for c in result["corrections"]] == [("go", "goes"), ("eat", "eats")]
+
+def test_experts_agree_ignores_whitespace():
+    assert experts_agree([("A", "She went home ."), ("B", "She  went home.")])
+    assert not experts_agree([("A", "She went home."), ("B", "She goes home.")])
+    assert normalize_sentence("She  went home.") == "She went home ."
+
+def test_edit_size():
+    assert edit_size(TEXT, TEXT) == (0, 0, 0.0)
+    assert edit_size(TEXT, "She went to school yesterday.") == (1, 1, 1 / 6)
+    assert edit_size("He go home.", "He has gone back home.") == (1, 3, 1 / 4)
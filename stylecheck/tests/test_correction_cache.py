@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+from correction_cache import CorrectionCache, make_key, normalize_text
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+def rows(cache):
+    return cache._connection().execute("SELECT key FROM cache ORDER BY key").fetchall()
+
+def test_normalize_text_and_make_key():
+    assert normalize_text("  She  go\tto school. ") == "She go to school."
+    assert make_key("a", {"x": 1, "y": 2}) == make_key("a", {"y": 2, "x": 1})
+    assert make_key("a") != make_key("b")
+
+def test_set_get_returns_copies():
+    cache = CorrectionCache()
+    cache.set("k", {"corrections": [1]})
+    value = cache.get("k")
+    value["corrections"].append(2)
+    assert cache.get("k") == {"corrections": [1]}
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+def test_lru_evicts_oldest_entry():
+    cache = CorrectionCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_per_entry_ttl_expires():
+    cache = CorrectionCache(ttl=3600)
+    cache.set("short", 1, ttl=0.01)
+    cache.set("long", 2)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+
+def test_sqlite_tier_is_shared(db_path):
+    CorrectionCache(db_path=db_path).set("k", {"v": 1})
+    other = CorrectionCache(db_path=db_path)
+    assert other.get("k") == {"v": 1}
+    assert other.stats()["disk_hits"] == 1
+    assert CorrectionCache(namespace="other", db_path=db_path).get("k") is None
+
+def test_expired_row_is_deleted_on_lookup(db_path):
+    cache = CorrectionCache(db_path=db_path)
+    cache.set("k", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert CorrectionCache(db_path=db_path).get("k") is None
+    assert rows(cache) == []
+
+def test_prune_removes_expired_rows_and_enforces_row_cap(db_path):
+    cache = CorrectionCache(db_path=db_path, max_rows=3, prune_every=1000)
+    cache.set("expired", 0, ttl=0.01)
+    for i in range(5):
+        cache.set(f"k{i}", i, ttl=100 + i)
+    time.sleep(0.02)
+    assert cache.prune() == 3
+    # The rows closest to expiry go first
+    assert rows(cache) == [("k2",), ("k3",), ("k4",)]
+    assert cache.stats()["pruned"] == 3
+
+def test_writes_trigger_pruning(db_path):
+    cache = CorrectionCache(db_path=db_path, max_rows=4, prune_every=5)
+    for i in range(10):
+        cache.set(f"k{i}", i)
+    assert len(rows(cache)) == 4
+
+def test_clear_only_touches_its_namespace(db_path):
+    first = CorrectionCache(namespace="first", db_path=db_path)
+    second = CorrectionCache(namespace="second", db_path=db_path)
+    first.set("k", 1)
+    second.set("k", 2)
+    first.clear()
+    assert first.get("k") is None
+    assert second.get("k") == 2
@@ -0,0 +1,63 @@
+import pytest
+
+import llm_integrations
+from llm_integrations import escalation_reason, route_fast_answer
+
+@pytest.fixture(autouse=True)
+def routing_settings(monkeypatch):
+    monkeypatch.setattr(llm_integrations, "FAST_EXPERT", "Gemini")
+    monkeypatch.setattr(llm_integrations, "ESCALATE_CHANGE", 0.2)
+    monkeypatch.setattr(llm_integrations, "ESCALATE_MIN_TOKENS", 2)
+    monkeypatch.setattr(llm_integrations, "ESCALATE_EDITS", 2)
+
+@pytest.mark.parametrize("text, correction", [
+    ("She go to school yesterday.", "She went to school yesterday."),
+    # One changed token is a third of this sentence, but below the token floor
+    ("He go home.", "He goes home."),
+    ("Nothing is wrong here.", "Nothing is wrong here."),
+])
+def test_small_changes_are_accepted(text, correction):
+    assert escalation_reason(text, correction) is None
+
+@pytest.mark.parametrize("correction", [None, ""])
+def test_missing_answer_escalates(correction):
+    assert escalation_reason("He go home.", correction) == "no_answer"
+
+def test_large_rewrite_escalates():
+    assert escalation_reason("He go home.", "He has gone back home.") == "change"
+
+def test_many_separate_edits_escalate():
+    text = "He go to the shop and buy milk and eat bread every single day of the week ."
+    correction = "He goes to the shop and buys milk and eats bread every single day of the week ."
+    assert escalation_reason(text, correction) == "edits"
+
+def test_route_fast_answer_accepts():
+    result, known = route_fast_answer("He go home.", "He goes home.")
+    assert known is None
+    assert result["tier"] == "fast"
+    assert result["corrected_phrase"] == "He goes home."
+    assert result["overall_explanation"] == "Gemini made a small enough change not to need the other experts."
+
+def test_route_fast_answer_with_nothing_to_correct():
+    result, _ = route_fast_answer("He goes home.", "He goes home.")
+    assert result["corrections"] == []
+    assert result["overall_explanation"] == "Gemini found nothing to correct."
+
+@pytest.mark.parametrize("text, correction", [
+    ("He go home.", None),
+    ("He go home.", "He has gone back home."),
+    ("He go to the shop and buy milk and eat bread every single day of the week .",
+     "He goes to the shop and buys milk and eats bread every single day of the week ."),
+])
+def test_route_fast_answer_escalates_with_the_answer_known(text, correction):
+    result, known = route_fast_answer(text, correction)
+    assert result is None
+    assert known == {"Gemini": correction}
+
+def test_routed_counter(monkeypatch):
+    before = llm_integrations.ROUTED.values()
+    route_fast_answer("He go home.", "He goes home.")
+    route_fast_answer("He go home.", None)
+    after = llm_integrations.ROUTED.values()
+    assert after.get(("fast", "accepted"), 0) - before.get(("fast", "accepted"), 0) == 1
+    assert after.get(("full", "no_answer"), 0) - before.get(("full", "no_answer"), 0) == 1
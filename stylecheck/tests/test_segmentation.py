@@ -0,0 +1,50 @@
+import pytest
+
+from segmentation import split_sentences
+
+def sentences(text):
+    return [sentence for sentence, _, _ in split_sentences(text)]
+
+@pytest.mark.parametrize("text, expected", [
+    ("She go to school. He like apples!", ["She go to school.", "He like apples!"]),
+    ("Is it? Yes.", ["Is it?", "Yes."]),
+    ("First line\nSecond line", ["First line", "Second line"]),
+    ("", []),
+    ("   ", []),
+])
+def test_splits_at_terminal_punctuation_and_line_breaks(text, expected):
+    assert sentences(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("The answer is no. He left.", ["The answer is no.", "He left."]),
+    ("He is from the U.S. He likes it.", ["He is from the U.S.", "He likes it."]),
+    ("They live on Main St. It is quiet.", ["They live on Main St.", "It is quiet."]),
+    ("I ate a fig. It was sweet.", ["I ate a fig.", "It was sweet."]),
+    ("Bring pens, paper, etc. The shop opens at 9 a.m. Be early.",
+     ["Bring pens, paper, etc.", "The shop opens at 9 a.m.", "Be early."]),
+])
+def test_abbreviation_before_a_capitalized_word_ends_the_sentence(text, expected):
+    assert sentences(text) == expected
+
+@pytest.mark.parametrize("text", [
+    "Mr. Smith met Dr. Jones at noon.",
+    "Apples vs. Oranges is a close match.",
+    "J. K. Rowling wrote it.",
+    "The shop opens at 9 a.m. tomorrow.",
+    "Acme Co. announced a merger.",
+    "Use a fruit, e.g. Apples, in the pie.",
+    "It weighs approx. 3.5 kg.",
+    "It opened on Jan. 5 this year.",
+    "He was born in the U.S. during the war.",
+])
+def test_abbreviations_inside_a_sentence_do_not_split_it(text):
+    assert sentences(text) == [text]
+
+def test_offsets_point_into_the_text():
+    text = "  She go home.   He stay.\n"
+    for sentence, start, end in split_sentences(text):
+        assert text[start:end] == sentence
+    assert sentences(text) == ["She go home.", "He stay."]
+
+def test_closing_quotes_stay_with_the_sentence():
+    assert sentences('He said "stop." Then he left.') == ['He said "stop."', "Then he left."]
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from single_flight import AsyncSingleFlight, SingleFlight, SingleFlightTimeout
+
+def run_followers(flight, key, func, count, **kwargs):
+    """Start a leader, then `count` followers of the same key; returns {thread index: result or exception}."""
+    outcomes = {}
+    started = threading.Event()
+
+    def leader():
+        def wrapped():
+            started.set()
+            return func()
+        try:
+            outcomes["leader"] = flight.do(key, wrapped)
+        except BaseException as e:
+            outcomes["leader"] = e
+
+    def follower(i):
+        try:
+            outcomes[i] = flight.do(key, func, **kwargs)
+        except BaseException as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=leader)]
+    threads[0].start()
+    started.wait()
+    threads += [threading.Thread(target=follower, args=(i,)) for i in range(count)]
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+def test_followers_share_one_run_and_get_copies():
+    calls = []
+
+    def func():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": [1]}
+
+    outcomes = run_followers(SingleFlight(), "k", func, 3)
+    assert len(calls) == 1
+    assert all(outcome == {"value": [1]} for outcome in outcomes.values())
+    assert len({id(outcome) for outcome in outcomes.values()}) == 4
+
+def test_followers_get_their_own_copy_of_the_error():
+    def func():
+        time.sleep(0.1)
+        raise ValueError("boom")
+
+    outcomes = run_followers(SingleFlight(), "k", func, 2)
+    errors = list(outcomes.values())
+    assert all(isinstance(error, ValueError) and error.args == ("boom",) for error in errors)
+    assert len({id(error) for error in errors}) == 3
+
+def test_follower_stops_waiting_at_its_deadline():
+    release = threading.Event()
+    flight = SingleFlight()
+    began = time.monotonic()
+    outcomes = {}
+
+    def follower():
+        try:
+            flight.do("k", lambda: None, deadline=time.monotonic() + 0.1)
+        except SingleFlightTimeout as e:
+            outcomes["follower"] = e
+        finally:
+            release.set()
+
+    def stalled():
+        threading.Thread(target=follower).start()
+        release.wait()
+        return "late"
+
+    assert flight.do("k", stalled) == "late"
+    assert isinstance(outcomes["follower"], SingleFlightTimeout)
+    assert time.monotonic() - began < 1
+    assert flight.stats()["timeouts"] == 1
+
+def test_process_lock_is_not_waited_on_past_the_deadline(tmp_path):
+    fcntl = pytest.importorskip("fcntl")
+    flight = SingleFlight(lock_dir=str(tmp_path))
+    with open(tmp_path / "k.lock", "a") as held:
+        # A lock held by another open file description, as another process would
+        fcntl.flock(held, fcntl.LOCK_EX)
+        began = time.monotonic()
+        assert flight.do("k", lambda: "ran", deadline=time.monotonic() + 0.1) == "ran"
+        assert time.monotonic() - began < 1
+    assert flight.stats()["lock_timeouts"] == 1
+
+def test_async_followers_share_one_run_and_time_out():
+    async def main():
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def func():
+            calls.append(1)
+            await asyncio.sleep(0.2)
+            return {"value": 1}
+
+        waiters = [flight.do("k", func) for _ in range(3)]
+        impatient = flight.do("k", func, deadline=time.monotonic() + 0.05)
+        results = await asyncio.gather(*waiters, impatient, return_exceptions=True)
+        assert len(calls) == 1
+        assert results[:3] == [{"value": 1}] * 3
+        assert isinstance(results[3], SingleFlightTimeout)
+
+    asyncio.run(main())
+
+def test_async_waiters_get_their_own_copy_of_the_error():
+    async def main():
+        flight = AsyncSingleFlight()
+
+        async def func():
+            await asyncio.sleep(0.05)
+            raise ValueError("boom")
+
+        errors = await asyncio.gather(*(flight.do("k", func) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(error, ValueError) for error in errors)
+        assert len({id(error) for error in errors}) == 3
+
+    asyncio.run(main())
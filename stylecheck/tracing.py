@@ -0,0 +1,210 @@
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Per-request span trees for slow-request forensics, without an external
+# collector. A request opened with start_trace() records a span for every
+# stage run inside it (cache lookup, each expert and provider call, extraction,
+# arbiter, JSON decode, response build), including work handed to the expert
+# threads through stage_timings.bind_context. Finished traces are kept in an
+# in-process ring buffer (served at /debug/traces) and, with
+# STYLECHECK_TRACE_FILE, appended to a JSONL file, one span per line.
+TRACING_ENABLED = os.getenv("STYLECHECK_TRACING", "1") != "0"
+TRACE_BUFFER_SIZE = int(os.getenv("STYLECHECK_TRACE_BUFFER", "200"))
+TRACE_FILE = os.getenv("STYLECHECK_TRACE_FILE") or None
+
+_current = contextvars.ContextVar("stylecheck_span", default=None)
+
+class Span:
+    """One timed operation in a trace, with free-form attributes."""
+
+    def __init__(self, name, trace_id, parent_id=None, attributes=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, error):
+        self.status = "error"
+        self.attributes["error"] = f"{type(error).__name__}: {error}"
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration": self.duration,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+class _NoSpan:
+    """Stands in for a span outside a trace, so callers never check."""
+    trace_id = None
+
+    def set(self, **attributes):
+        pass
+
+    def fail(self, error):
+        pass
+
+NO_SPAN = _NoSpan()
+
+class TraceBuffer:
+    """The last `max_traces` traces, each a list of finished span dicts, optionally mirrored to a JSONL file.
+
+    A trace is written to the file in one go when its root span finishes;
+    spans finishing after that (abandoned experts) are appended on their own.
+    """
+
+    def __init__(self, max_traces=200, path=None):
+        self.max_traces = max_traces
+        self.path = path
+        self._traces = OrderedDict()  # trace_id -> {"spans": [...], "written": bool}
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+
+    def add(self, span, root=False):
+        record = span.to_dict()
+        with self._lock:
+            trace = self._traces.get(span.trace_id)
+            if trace is None:
+                trace = self._traces[span.trace_id] = {"spans": [], "written": False}
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            trace["spans"].append(record)
+            if not self.path:
+                return
+            if root:
+                pending, trace["written"] = list(trace["spans"]), True
+            elif trace["written"]:
+                pending = [record]
+            else:
+                return
+        self._write(pending)
+
+    def _write(self, records):
+        lines = "".join(json.dumps(record, default=str) + "\n" for record in records)
+        with self._file_lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def recent(self, limit=50, min_duration=0.0):
+        """Newest first: one summary per trace whose root span took at least min_duration seconds."""
+        with self._lock:
+            traces = [(trace_id, list(trace["spans"])) for trace_id, trace in reversed(self._traces.items())]
+        summaries = []
+        for trace_id, spans in traces:
+            root = next((span for span in spans if span["parent_id"] is None), None)
+            if root is None or (root["duration"] or 0) < min_duration:
+                continue
+            summaries.append({
+                "trace_id": trace_id,
+                "name": root["name"],
+                "start_time": root["start_time"],
+                "duration": root["duration"],
+                "status": root["status"],
+                "spans": len(spans),
+                "attributes": root["attributes"],
+            })
+            if len(summaries) >= limit:
+                break
+        return summaries
+
+    def tree(self, trace_id):
+        """A trace's spans nested under their parents ("children", in start order), or None."""
+        with self._lock:
+            trace = self._traces.get(trace_id)
+            spans = [dict(span, children=[]) for span in trace["spans"]] if trace else None
+        if spans is None:
+            return None
+        by_id = {span["span_id"]: span for span in spans}
+        roots = []
+        for span in sorted(spans, key=lambda span: span["start_time"]):
+            parent = by_id.get(span["parent_id"])
+            (parent["children"] if parent else roots).append(span)
+        return {"trace_id": trace_id, "spans": roots}
+
+traces = TraceBuffer(max_traces=TRACE_BUFFER_SIZE, path=TRACE_FILE)
+
+def current_span():
+    """The innermost open span in this context, or a no-op stand-in outside a trace."""
+    return _current.get() or NO_SPAN
+
+def annotate(**attributes):
+    """Set attributes on the innermost open span, if any."""
+    span = _current.get()
+    if span is not None:
+        span.set(**attributes)
+
+@contextmanager
+def _open(span, root=False):
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.fail(e)
+        raise
+    finally:
+        _current.reset(token)
+        span.finish()
+        traces.add(span, root=root)
+
+@contextmanager
+def start_trace(name, **attributes):
+    """Open the root span of a new trace for one request; yields it (a no-op span when tracing is off)."""
+    if not TRACING_ENABLED:
+        yield NO_SPAN
+        return
+    with _open(Span(name, uuid.uuid4().hex, attributes=attributes), root=True) as span:
+        yield span
+
+@contextmanager
+def span(name, **attributes):
+    """Open a child of the current span; outside a trace this records nothing."""
+    parent = _current.get()
+    if parent is None:
+        yield NO_SPAN
+        return
+    with _open(Span(name, parent.trace_id, parent.span_id, attributes)) as child:
+        yield child
+
+def traced(name, succeeded=lambda result: result is not None, **attributes):
+    """Run a sync or async function in a span, with outcome "ok" or "failed" by succeeded(result)."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **attributes) as current:
+                    result = await func(*args, **kwargs)
+                    current.set(outcome="ok" if succeeded(result) else "failed")
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes) as current:
+                result = func(*args, **kwargs)
+                current.set(outcome="ok" if succeeded(result) else "failed")
+                return result
+        return wrapper
+    return decorator